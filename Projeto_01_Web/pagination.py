@@ -0,0 +1,220 @@
+"""
+Keyset (cursor) pagination shared by the HTML list views and the REST API.
+
+Instead of OFFSET, each page is fetched with a range condition on an indexed
+(field, id) pair, e.g. `start_date > x OR (start_date = x AND id > y)`, so
+page 1000 costs the same as page 1. Cursors are opaque base64 tokens
+carrying the (field, id) values of the row at the edge of the current page.
+"""
+
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import Http404
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values, reverse=False):
+    payload = json.dumps({'v': values, 'r': reverse}, default=str, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return payload['v'], bool(payload['r'])
+    except (ValueError, TypeError, KeyError):
+        raise InvalidCursor('Cursor inválido.')
+
+
+class KeysetPage:
+    """A page of results, with the cursors to reach its neighbours"""
+
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset on an ordering of one or two fields with the same
+    direction, the last one being unique (usually the primary key):
+    ('start_date', 'id') or ('-timestamp', '-id').
+    """
+
+    def __init__(self, queryset, per_page, ordering):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = ordering
+        self.fields = [name.lstrip('-') for name in ordering]
+        self.descending = ordering[0].startswith('-')
+
+    def _boundary(self, values, forward):
+        """Q object selecting rows after (or before) the given key"""
+        # Going forward on an ascending ordering means "greater than"
+        lookup = 'gt' if forward != self.descending else 'lt'
+        first = self.fields[0]
+        if len(self.fields) == 1:
+            return Q(**{f'{first}__{lookup}': values[0]})
+        # The leading inclusive bound lets the database seek straight into the
+        # (first, second) index; the OR only resolves ties on the first field.
+        return Q(**{f'{first}__{lookup}e': values[0]}) & (
+            Q(**{f'{first}__{lookup}': values[0]}) |
+            Q(**{f'{self.fields[1]}__{lookup}': values[1]})
+        )
+
+    def _key(self, obj):
+        return [getattr(obj, field) for field in self.fields]
+
+    def page(self, cursor=None):
+        queryset = self.queryset.order_by(*self.ordering)
+        reverse = False
+
+        if cursor:
+            values, reverse = decode_cursor(cursor)
+            if not isinstance(values, list) or len(values) != len(self.fields):
+                raise InvalidCursor('Cursor inválido.')
+            if reverse:
+                queryset = self.queryset.order_by(*self._reversed_ordering())
+            try:
+                queryset = queryset.filter(self._boundary(values, forward=not reverse))
+            except (ValueError, TypeError, ValidationError):
+                raise InvalidCursor('Cursor inválido.')
+
+        # One extra row tells whether there is another page in that direction
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if reverse:
+            rows.reverse()
+
+        if not rows:
+            return KeysetPage([], None, None)
+
+        if reverse:
+            next_cursor = encode_cursor(self._key(rows[-1]))
+            previous_cursor = encode_cursor(self._key(rows[0]), reverse=True) if has_more else None
+        else:
+            next_cursor = encode_cursor(self._key(rows[-1])) if has_more else None
+            previous_cursor = encode_cursor(self._key(rows[0]), reverse=True) if cursor else None
+        return KeysetPage(rows, next_cursor, previous_cursor)
+
+    def _reversed_ordering(self):
+        return [name[1:] if name.startswith('-') else f'-{name}' for name in self.ordering]
+
+
+class KeysetPaginationMixin:
+    """
+    ListView mixin replacing OFFSET pagination with keyset pagination.
+    Set `keyset_ordering`, and `paginate_by` as usual; the template receives
+    `next_page_query` / `previous_page_query` ready to append after "?".
+    """
+    keyset_ordering = ('id',)
+    cursor_param = 'cursor'
+
+    def use_keyset_pagination(self):
+        return True
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.use_keyset_pagination():
+            return super().paginate_queryset(queryset, page_size)
+
+        paginator = KeysetPaginator(queryset, page_size, self.keyset_ordering)
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_param))
+        except InvalidCursor as exc:
+            raise Http404(str(exc))
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        page = context.get('page_obj')
+        context['next_page_query'] = None
+        context['previous_page_query'] = None
+        if page is None:
+            return context
+
+        if isinstance(page, KeysetPage):
+            if page.has_next():
+                context['next_page_query'] = self._page_query(self.cursor_param, page.next_cursor)
+            if page.has_previous():
+                context['previous_page_query'] = self._page_query(self.cursor_param, page.previous_cursor)
+        else:
+            if page.has_next():
+                context['next_page_query'] = self._page_query(self.page_kwarg, page.next_page_number())
+            if page.has_previous():
+                context['previous_page_query'] = self._page_query(self.page_kwarg, page.previous_page_number())
+        return context
+
+    def _page_query(self, param, value):
+        query = self.request.GET.copy()
+        query.pop(self.cursor_param, None)
+        query.pop(self.page_kwarg, None)
+        query[param] = value
+        return query.urlencode()
+
+
+class KeysetAPIPagination(BasePagination):
+    """DRF pagination class answering {next, previous, results}"""
+    page_size = 20
+    ordering = ('id',)
+    cursor_query_param = 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        paginator = KeysetPaginator(queryset, self.page_size, self.ordering)
+        try:
+            self.page = paginator.page(request.query_params.get(self.cursor_query_param))
+        except InvalidCursor as exc:
+            raise NotFound(str(exc))
+        return self.page.object_list
+
+    def _link(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self._link(self.page.next_cursor),
+            'previous': self._link(self.page.previous_cursor),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -97,9 +97,82 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Take the write lock at BEGIN so concurrent enrollments queue on
+            # the busy timeout instead of failing with "database is locked"
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+        'TEST': {
+            # File-backed test database: the in-memory shared cache fails
+            # immediately on lock contention instead of waiting
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
+    }
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Local memory is per process; set CACHE_DIR to share the event cache
+# between several server workers.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'sgea',
+    }
+}
+
+if os.environ.get('CACHE_DIR'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ['CACHE_DIR'],
     }
+
+# Public certificate verification gets its own cache, so lookups (and misses)
+# neither evict the event pages nor reach the database twice
+CACHES['verification'] = {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'LOCATION': 'sgea-verification',
+    'OPTIONS': {'MAX_ENTRIES': 50000},
 }
 
+# Seconds an event listing/detail stays cached (invalidated earlier on change)
+EVENT_CACHE_TIMEOUT = 300
+
+# Sessions of recurring events are created this many days ahead
+RECURRENCE_WINDOW_DAYS = 120
+
+# How long a seat hold lasts before the seat can be reclaimed
+SEAT_HOLD_SECONDS = 600
+
+# Overlapping registrations on enrollment: 'warn', 'block' or 'off'
+ENROLLMENT_SCHEDULE_CONFLICTS = 'warn'
+
+# QR check-in: token lifetime, and how scans are batched before hitting the database
+CHECKIN_TOKEN_MAX_AGE = 60 * 60 * 24 * 365
+CHECKIN_BATCH_SIZE = 200
+CHECKIN_FLUSH_INTERVAL = 2
+
+# PDF certificates: optional background image and TrueType font (paths)
+CERTIFICATE_BACKGROUND = os.environ.get('CERTIFICATE_BACKGROUND')
+CERTIFICATE_FONT = os.environ.get('CERTIFICATE_FONT')
+# 'eager' writes each PDF when the certificate is issued, 'lazy' on its first
+# download, into a size-bounded cache folder (default MEDIA_ROOT/certificates/cache)
+CERTIFICATE_RENDERING = os.environ.get('CERTIFICATE_RENDERING', 'eager')
+CERTIFICATE_CACHE_DIR = os.environ.get('CERTIFICATE_CACHE_DIR')
+CERTIFICATE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+# Printed next to the verification code, e.g. https://sgea.example.edu/certificados/verificar/
+CERTIFICATE_VERIFY_URL = os.environ.get('CERTIFICATE_VERIFY_URL', '')
+CERTIFICATE_VERIFICATION_CACHE_TIMEOUT = 60 * 60
+
+# Live vacancy stream (SSE, ASGI): seconds between change checks, and stream lifetime
+LIVE_VACANCY_INTERVAL = 1
+LIVE_VACANCY_MAX_SECONDS = 300
+# Seconds between the vacancy polls of pages served without a stream (WSGI)
+LIVE_VACANCY_POLL_INTERVAL = 10
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -160,6 +233,8 @@ REST_FRAMEWORK = {
     'DEFAULT_THROTTLE_RATES': {
         'event_list': '20/day',
         'registration': '50/day',
+        'certificate_verification': '60/min',
+        'checkin': '3000/min',
     },
 }
 
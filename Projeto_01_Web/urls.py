@@ -7,8 +7,11 @@ from django.views.generic import TemplateView
 
 # Import API views directly
 from apps.usuarios.views import UserRegistrationAPIView, ConfirmRegistrationAPIView, UserDetailAPIView
-from apps.eventos.views import EventListAPIView, EventCreateAPIView, EventDetailAPIView, RegisterForEventAPIView
-from apps.certificados.views import CertificadoListAPIView
+from apps.eventos.views import (
+    EventListAPIView, EventCreateAPIView, EventDetailAPIView, RegisterForEventAPIView, BatchRegisterForEventAPIView,
+    EventAttendanceAPIView, EventCheckinAPIView, SeatHoldAPIView,
+)
+from apps.certificados.views import CertificadoListAPIView, CertificateVerifyAPIView
 from apps.audit.views import AuditLogListAPIView
 
 urlpatterns = [
@@ -36,10 +39,15 @@ urlpatterns = [
     path('api/events/', EventListAPIView.as_view(), name='api-event-list'),
     path('api/events/create/', EventCreateAPIView.as_view(), name='api-event-create'),
     path('api/events/<int:pk>/', EventDetailAPIView.as_view(), name='api-event-detail'),
+    path('api/events/<int:pk>/attendance/', EventAttendanceAPIView.as_view(), name='api-event-attendance'),
+    path('api/events/<int:pk>/checkin/', EventCheckinAPIView.as_view(), name='api-event-checkin'),
+    path('api/events/<int:pk>/hold/', SeatHoldAPIView.as_view(), name='api-event-hold'),
     path('api/events/register/', RegisterForEventAPIView.as_view(), name='api-event-register'),
+    path('api/events/register/batch/', BatchRegisterForEventAPIView.as_view(), name='api-event-register-batch'),
     
     # Certificates API
     path('api/certificates/', CertificadoListAPIView.as_view(), name='api-certificate-list'),
+    path('api/certificates/verify/<str:code>/', CertificateVerifyAPIView.as_view(), name='api-certificate-verify'),
     
     # Audit API
     path('api/audit/', AuditLogListAPIView.as_view(), name='api-audit-list'),
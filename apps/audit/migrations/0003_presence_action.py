@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0002_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='auditlog',
+            name='action',
+            field=models.CharField(choices=[('create_user', 'Criação de usuário'), ('create_event', 'Criação de evento'), ('update_event', 'Alteração de evento'), ('delete_event', 'Exclusão de evento'), ('api_event_list', 'Consulta eventos via API'), ('issue_certificate', 'Geração/consulta certificado'), ('registration', 'Inscrição evento'), ('confirm_presence', 'Confirmação de presença')], max_length=50),
+        ),
+    ]
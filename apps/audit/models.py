@@ -10,6 +10,7 @@ class AuditLog(models.Model):
         ('api_event_list','Consulta eventos via API'),
         ('issue_certificate','Geração/consulta certificado'),
         ('registration','Inscrição evento'),
+        ('confirm_presence','Confirmação de presença'),
     )
     user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, on_delete=models.SET_NULL)
     action = models.CharField(max_length=50, choices=ACTION_CHOICES)
@@ -19,6 +20,10 @@ class AuditLog(models.Model):
 
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            # keyset pagination of the log listing
+            models.Index(fields=['timestamp', 'id'], name='audit_timestamp_id_idx'),
+        ]
 
     def __str__(self):
         return f'{self.timestamp} - {self.action} - {self.user}'
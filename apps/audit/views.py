@@ -4,6 +4,7 @@ from django.shortcuts import redirect
 from django.views.generic import ListView
 
 from .models import AuditLog
+from Projeto_01_Web.pagination import KeysetPaginationMixin, KeysetAPIPagination
 
 
 class OrganizerRequiredMixin(UserPassesTestMixin):
@@ -16,13 +17,14 @@ class OrganizerRequiredMixin(UserPassesTestMixin):
         return redirect('home')
 
 
-class AuditLogListView(LoginRequiredMixin, OrganizerRequiredMixin, ListView):
+class AuditLogListView(LoginRequiredMixin, OrganizerRequiredMixin, KeysetPaginationMixin, ListView):
     """Audit log list view (organizer only)"""
     model = AuditLog
     template_name = 'audit/audit_list.html'
     context_object_name = 'logs'
     paginate_by = 50
-    ordering = ['-timestamp']
+    ordering = ['-timestamp', '-id']
+    keyset_ordering = ('-timestamp', '-id')
     
     def get_queryset(self):
         queryset = super().get_queryset().select_related('user')
@@ -68,11 +70,17 @@ from rest_framework import generics, permissions
 from .serializers import AuditLogSerializer
 
 
+class AuditLogAPIPagination(KeysetAPIPagination):
+    page_size = 50
+    ordering = ('-timestamp', '-id')
+
+
 class AuditLogListAPIView(generics.ListAPIView):
     """API: List audit logs"""
-    queryset = AuditLog.objects.all().order_by('-timestamp')
+    queryset = AuditLog.objects.all().order_by('-timestamp', '-id')
     serializer_class = AuditLogSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = AuditLogAPIPagination
 
     def get_queryset(self):
         if self.request.user.role != 'organizador':
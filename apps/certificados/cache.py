@@ -0,0 +1,104 @@
+"""
+Content-addressed cache of rendered certificate PDFs.
+
+With CERTIFICATE_RENDERING = 'lazy', issuing a certificate only inserts the
+Certificado row; the PDF is rendered on its first download and kept here,
+named after a hash of everything that goes into it (printed fields, layout
+version, font and background). Certificates with identical content share
+a file, and a change to any input simply misses the cache.
+
+The folder is bounded to CERTIFICATE_CACHE_MAX_BYTES: hits refresh a file's
+modification time and, after each write, the least recently used files are
+deleted until it is back under 90% of the limit.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+
+from .rendering import LAYOUT_VERSION, render_pdf
+
+# Context keys that are not printed on the certificate
+UNPRINTED = ('user_id', 'event_id', 'email', 'issued_at')
+
+
+def content_key(context):
+    inputs = {key: value for key, value in context.items() if key not in UNPRINTED}
+    inputs['_layout'] = [LAYOUT_VERSION, str(settings.CERTIFICATE_FONT), str(settings.CERTIFICATE_BACKGROUND)]
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+
+class RenderCache:
+    """Size-bounded LRU folder of PDFs named by content_key"""
+
+    def __init__(self, directory=None, max_bytes=None):
+        self._directory = directory
+        self._max_bytes = max_bytes
+
+    @property
+    def directory(self):
+        return Path(
+            self._directory or settings.CERTIFICATE_CACHE_DIR
+            or Path(settings.MEDIA_ROOT) / 'certificates' / 'cache'
+        )
+
+    @property
+    def max_bytes(self):
+        return self._max_bytes or settings.CERTIFICATE_CACHE_MAX_BYTES
+
+    def path(self, key):
+        return self.directory / key[:2] / f'{key}.pdf'
+
+    def open(self, context):
+        """Open the PDF of a certificate context, rendering it on a miss"""
+        path = self.path(content_key(context))
+        try:
+            handle = open(path, 'rb')
+        except FileNotFoundError:
+            self._write(path, render_pdf(context))
+            return open(path, 'rb')
+        # Mark as recently used; an open handle survives a concurrent eviction
+        os.utime(path)
+        return handle
+
+    def _write(self, path, content):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary name first so readers never see half a file
+        fd, temporary = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as handle:
+            handle.write(content)
+        os.replace(temporary, path)
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used files while the folder is over its limit"""
+        entries = []
+        if not self.directory.exists():
+            return 0
+        for folder in self.directory.iterdir():
+            if folder.is_dir():
+                for entry in os.scandir(folder):
+                    if entry.name.endswith('.pdf'):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return 0
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes * 0.9:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
+
+
+certificate_cache = RenderCache()
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certificados', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='certificado',
+            name='file',
+            field=models.FileField(blank=True, upload_to='certificates/'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+import base64
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.utils.crypto import salted_hmac
+
+CHUNK_SIZE = 2000
+
+
+def verification_code(user_id, event_id, issued_at):
+    # Frozen copy of Certificado's code as of this migration
+    digest = salted_hmac('certificados.verification', f'{user_id}:{event_id}:{issued_at.isoformat()}').digest()
+    code = base64.b32encode(digest).decode()[:12]
+    return '-'.join(code[i:i + 4] for i in range(0, 12, 4))
+
+
+def fill_codes(apps, schema_editor):
+    Certificado = apps.get_model('certificados', 'Certificado')
+    rows = Certificado.objects.only('user_id', 'event_id', 'issued_at').order_by('pk')
+    last_pk = 0
+    # Keyset pages rather than iterator(): SQLite gives no isolation between a
+    # cursor and writes to the same table on that connection
+    while chunk := list(rows.filter(pk__gt=last_pk)[:CHUNK_SIZE]):
+        for certificate in chunk:
+            certificate.verification_code = verification_code(
+                certificate.user_id, certificate.event_id, certificate.issued_at
+            )
+        Certificado.objects.bulk_update(chunk, ['verification_code'])
+        last_pk = chunk[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certificados', '0002_lazy_file'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='certificado',
+            name='issued_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddField(
+            model_name='certificado',
+            name='verification_code',
+            field=models.CharField(editable=False, max_length=14, null=True, verbose_name='Código de verificação'),
+        ),
+        migrations.RunPython(fill_codes, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='certificado',
+            name='verification_code',
+            field=models.CharField(editable=False, max_length=14, unique=True, verbose_name='Código de verificação'),
+        ),
+    ]
@@ -1,14 +1,45 @@
+import base64
+import re
+
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
+from django.utils.crypto import salted_hmac
+
+CODE_LENGTH = 12
+
+
+def verification_code(user_id, event_id, issued_at):
+    """Short code printed on a certificate: HMAC of its user, event and issue time"""
+    digest = salted_hmac('certificados.verification', f'{user_id}:{event_id}:{issued_at.isoformat()}').digest()
+    code = base64.b32encode(digest).decode()[:CODE_LENGTH]
+    return '-'.join(code[i:i + 4] for i in range(0, CODE_LENGTH, 4))
+
+
+def normalize_code(text):
+    """Code typed by a person in the canonical XXXX-XXXX-XXXX form, or None"""
+    code = re.sub(r'[\s-]', '', text or '').upper()
+    if not re.fullmatch(f'[A-Z2-7]{{{CODE_LENGTH}}}', code):
+        return None
+    return '-'.join(code[i:i + 4] for i in range(0, CODE_LENGTH, 4))
+
 
 class Certificado(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='certificates')
     event = models.ForeignKey('eventos.Event', on_delete=models.CASCADE, related_name='certificates')
-    issued_at = models.DateTimeField(auto_now_add=True)
-    file = models.FileField(upload_to='certificates/')
+    # Set before insert (not auto_now_add) because the verification code depends on it
+    issued_at = models.DateTimeField(default=timezone.now, editable=False)
+    # Empty when issued in lazy mode, see apps.certificados.cache
+    file = models.FileField(upload_to='certificates/', blank=True)
+    verification_code = models.CharField('Código de verificação', max_length=14, unique=True, editable=False)
 
     class Meta:
         unique_together = ('user','event')
 
+    def save(self, *args, **kwargs):
+        if not self.verification_code:
+            self.verification_code = verification_code(self.user_id, self.event_id, self.issued_at)
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f'Certificado {self.user} - {self.event}'
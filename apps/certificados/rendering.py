@@ -0,0 +1,154 @@
+"""
+PDF certificates drawn with Pillow.
+
+Everything that is the same for every participant of an event (background,
+logo, frame, headings, event details, signatures) is drawn once into a
+CertificateLayout, compiled per event and kept in an LRU cache. Rendering a
+certificate then only copies that image, stamps the participant name, the
+issue date and the verification code, and encodes the page as a one-page PDF.
+
+CERTIFICATE_BACKGROUND and CERTIFICATE_FONT settings (optional) point to a
+background image and a TrueType font; by default a plain frame in the SGEA
+colors and DejaVu Sans (or Pillow's bundled font, without accents) are used.
+"""
+
+from functools import lru_cache
+from io import BytesIO
+
+from django.conf import settings
+from PIL import Image, ImageDraw, ImageFont
+
+# Bump when the drawing below changes, so cached PDFs are rendered again
+LAYOUT_VERSION = 2
+
+# A4 landscape at 100 dpi: sharp enough for print previews, small and fast
+DPI = 100
+WIDTH, HEIGHT = 1169, 827
+PRIMARY = (67, 5, 78)
+ACCENT = (231, 25, 132)
+TEXT = (40, 40, 40)
+
+# Context keys printed the same for every participant of an event
+EVENT_FIELDS = (
+    'event_id', 'title', 'event_type', 'start_date', 'end_date', 'location', 'professor', 'organizer',
+)
+
+
+@lru_cache(maxsize=64)
+def font(size):
+    if settings.CERTIFICATE_FONT:
+        return ImageFont.truetype(str(settings.CERTIFICATE_FONT), size)
+    try:
+        # Found in the system font folders; Pillow's bundled font has no accents
+        return ImageFont.truetype('DejaVuSans.ttf', size)
+    except OSError:
+        return ImageFont.load_default(size=size)
+
+
+def _fit(text, size, width, minimum=18):
+    """Largest font up to `size` that fits `text` in `width` pixels"""
+    while size > minimum and font(size).getlength(text) > width:
+        size -= 2
+    return font(size)
+
+
+def _wrap(text, size, width, max_lines=2):
+    """Split text into lines that fit in `width` pixels"""
+    lines, current = [], ''
+    for word in text.split():
+        candidate = f'{current} {word}'.strip()
+        if current and font(size).getlength(candidate) > width:
+            lines.append(current)
+            current = word
+        else:
+            current = candidate
+    lines.append(current)
+    if len(lines) > max_lines:
+        lines = lines[:max_lines]
+        lines[-1] = lines[-1].rstrip('.,;') + '…'
+    return lines
+
+
+def _background():
+    if settings.CERTIFICATE_BACKGROUND:
+        return Image.open(settings.CERTIFICATE_BACKGROUND).convert('RGB').resize((WIDTH, HEIGHT))
+    image = Image.new('RGB', (WIDTH, HEIGHT), 'white')
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((20, 20, WIDTH - 21, HEIGHT - 21), outline=PRIMARY, width=8)
+    draw.rectangle((38, 38, WIDTH - 39, HEIGHT - 39), outline=ACCENT, width=2)
+    logo = settings.BASE_DIR / 'static' / 'images' / 'logo.png'
+    if logo.exists():
+        image.paste(Image.open(logo).convert('RGB').resize((90, 90)), (70, 60))
+    return image
+
+
+class CertificateLayout:
+    """Pre-drawn page of one event; stamp() adds the participant fields"""
+
+    NAME_Y = 300
+    ISSUED_Y = HEIGHT - 80
+
+    def __init__(self, event):
+        self.image = _background()
+        draw = ImageDraw.Draw(self.image)
+        center = WIDTH // 2
+
+        draw.text((center, 120), 'CERTIFICADO DE PARTICIPAÇÃO', font=font(46), fill=PRIMARY, anchor='mm')
+        draw.line((center - 260, 160, center + 260, 160), fill=ACCENT, width=3)
+        draw.text((center, 235), 'Certificamos que', font=font(26), fill=TEXT, anchor='mm')
+        draw.text((center, 370), 'participou do evento', font=font(26), fill=TEXT, anchor='mm')
+
+        y = 425
+        for line in _wrap(event['title'], 36, WIDTH - 240):
+            draw.text((center, y), line, font=font(36), fill=PRIMARY, anchor='mm')
+            y += 46
+        details = [
+            f'Tipo: {event["event_type"]}',
+            f'Data: {event["start_date"]} a {event["end_date"]}',
+            f'Local: {event["location"]}',
+        ]
+        for line in details:
+            y += 8
+            draw.text((center, y + 14), line, font=_fit(line, 22, WIDTH - 240), fill=TEXT, anchor='mm')
+            y += 30
+
+        for x, label, name in ((WIDTH // 3, 'Professor Responsável', event['professor']),
+                               (2 * WIDTH // 3, 'Organizador', event['organizer'])):
+            draw.line((x - 150, HEIGHT - 175, x + 150, HEIGHT - 175), fill=TEXT, width=1)
+            draw.text((x, HEIGHT - 155), name, font=_fit(name, 20, 300), fill=TEXT, anchor='mm')
+            draw.text((x, HEIGHT - 130), label, font=font(16), fill=PRIMARY, anchor='mm')
+
+        draw.text((center, HEIGHT - 55), 'SGEA - Sistema de Gestão de Eventos Acadêmicos',
+                  font=font(16), fill=PRIMARY, anchor='mm')
+
+    def stamp(self, context):
+        """Return the page with the participant fields drawn on a copy"""
+        page = self.image.copy()
+        draw = ImageDraw.Draw(page)
+        draw.text((WIDTH // 2, self.NAME_Y), context['name'], font=_fit(context['name'], 48, WIDTH - 200),
+                  fill=ACCENT, anchor='mm')
+        issued = f'Emitido em: {context["issued"]}   ·   Código de verificação: {context["code"]}'
+        if settings.CERTIFICATE_VERIFY_URL:
+            issued += f'   ·   {settings.CERTIFICATE_VERIFY_URL}'
+        draw.text((WIDTH // 2, self.ISSUED_Y), issued, font=_fit(issued, 16, WIDTH - 120, minimum=12),
+                  fill=TEXT, anchor='mm')
+        return page
+
+
+@lru_cache(maxsize=32)
+def _compiled(event_values):
+    return CertificateLayout(dict(zip(EVENT_FIELDS, event_values)))
+
+
+def layout_for(context):
+    """Compiled layout of the context's event; recompiled if its details change"""
+    return _compiled(tuple(context[field] for field in EVENT_FIELDS))
+
+
+def render_pdf(context):
+    """PDF bytes of one certificate, from a services.certificate_context dict"""
+    buffer = BytesIO()
+    layout_for(context).stamp(context).save(
+        buffer, format='PDF', resolution=DPI, title=f'Certificado - {context["title"]}', author='SGEA',
+    )
+    return buffer.getvalue()
@@ -8,7 +8,7 @@ class CertificateSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Certificado
-        fields = ['id','user','event','issued_at','file_url']
+        fields = ['id','user','event','issued_at','verification_code','file_url']
 
     def get_file_url(self, obj):
         request = self.context.get('request')
@@ -0,0 +1,228 @@
+"""
+Certificate issuing shared by the generate_certificates command and the demo view.
+
+Registrations still owed a certificate are found with one anti-join query
+(confirmed presence, event over including every session of a series, no
+Certificado for that user and event),
+so a run with nothing to do costs a single query. Records and their audit
+entries are written with bulk_create, one batch at a time.
+
+Certificates are PDFs drawn by apps.certificados.rendering, either when
+issued or, with CERTIFICATE_RENDERING = 'lazy', on first download through
+apps.certificados.cache. Rendering and writing the files needs no database:
+the parent process turns each registration into a plain dict
+(certificate_context) and the files can be produced by a ProcessPoolExecutor,
+in chunks, while every query and insert stays in the parent.
+
+Each certificate carries a verification code (an HMAC of user, event and
+issue time) printed on the PDF; verify_certificate answers the public lookup
+from one unique-index query, cached apart from the rest of the site.
+"""
+
+import datetime
+import logging
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from apps.audit.models import AuditLog
+from apps.eventos.models import Event, Registration
+from .models import Certificado, normalize_code, verification_code
+from .rendering import render_pdf
+
+logger = logging.getLogger(__name__)
+
+
+def pending_registrations(today=None):
+    """
+    Confirmed registrations of ended events that have no certificate yet.
+    A series (registered on its first session) ends with its last session.
+    """
+    if today is None:
+        today = timezone.localdate()
+    issued = Certificado.objects.filter(user_id=OuterRef('user_id'), event_id=OuterRef('event_id'))
+    running_sessions = Event.objects.filter(parent=OuterRef('event_id'), end_date__gte=today)
+    return Registration.objects.filter(
+        presence_confirmed=True, event__end_date__lt=today
+    ).filter(~Exists(issued), ~Exists(running_sessions)).select_related(
+        'user', 'event__organizer', 'event__professor_in_charge'
+    ).order_by('event_id', 'id')
+
+
+def _name(user):
+    return user.get_full_name() or user.username
+
+
+def certificate_context(user, event, issued_at=None):
+    """Everything printed on a certificate, as picklable values"""
+    if issued_at is None:
+        issued_at = timezone.now()
+    return {
+        'user_id': user.id,
+        'event_id': event.id,
+        'email': user.email,
+        'name': _name(user),
+        'title': event.title,
+        'event_type': event.get_event_type_display(),
+        'start_date': event.start_date.strftime('%d/%m/%Y'),
+        'end_date': event.end_date.strftime('%d/%m/%Y'),
+        'location': event.location,
+        'professor': _name(event.professor_in_charge),
+        'organizer': _name(event.organizer),
+        'issued_at': issued_at.isoformat(),
+        'issued': timezone.localdate(issued_at).strftime('%d/%m/%Y'),
+        'code': verification_code(user.id, event.id, issued_at),
+    }
+
+
+def context_for_certificate(certificate):
+    """Context of an issued certificate, dated on its issue day"""
+    context = certificate_context(certificate.user, certificate.event, certificate.issued_at)
+    context['code'] = certificate.verification_code
+    return context
+
+
+def render_certificates(contexts):
+    """
+    Write the certificate files, without touching the database, so it can
+    run in a worker process. Returns (context, file name, error) per entry.
+    """
+    field = Certificado._meta.get_field('file')
+    results = []
+    for context in contexts:
+        filename = field.generate_filename(None, f'certificado_{context["event_id"]}_{context["user_id"]}.pdf')
+        try:
+            name = field.storage.save(filename, ContentFile(render_pdf(context)))
+        except Exception as e:
+            logger.exception('Could not render the certificate of %s for event %s', context['email'], context['event_id'])
+            results.append((context, None, str(e)))
+        else:
+            results.append((context, name, None))
+    return results
+
+
+def _setup_worker():
+    # Spawned (non-forked) workers start without Django configured
+    import django
+    django.setup()
+
+
+def _chunks(registrations, size):
+    iterator = registrations.iterator(chunk_size=size)
+    while chunk := list(islice(iterator, size)):
+        yield [certificate_context(registration.user, registration.event) for registration in chunk]
+
+
+def render_pending(registrations, chunk_size=100, workers=1):
+    """
+    Yield lists of render_certificates results for the given registrations.
+    With workers > 1 chunks are rendered by a process pool, at most two per
+    worker in flight, and come back in completion order. In lazy mode
+    nothing is rendered: rows get no file until their first download.
+    """
+    if settings.CERTIFICATE_RENDERING == 'lazy':
+        for contexts in _chunks(registrations, chunk_size):
+            yield [(context, '', None) for context in contexts]
+        return
+
+    if workers <= 1:
+        for contexts in _chunks(registrations, chunk_size):
+            yield render_certificates(contexts)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_setup_worker) as pool:
+        running = set()
+        for contexts in _chunks(registrations, chunk_size):
+            running.add(pool.submit(render_certificates, contexts))
+            if len(running) >= workers * 2:
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in running:
+            yield future.result()
+
+
+def save_certificates(rendered):
+    """Insert certificates for (context, file name) pairs, with their audit entries"""
+    with transaction.atomic():
+        Certificado.objects.bulk_create([
+            Certificado(
+                user_id=context['user_id'], event_id=context['event_id'], file=name,
+                issued_at=datetime.datetime.fromisoformat(context['issued_at']), verification_code=context['code'],
+            )
+            for context, name in rendered
+        ])
+        AuditLog.objects.bulk_create([
+            AuditLog(
+                user=None,  # System action
+                action='issue_certificate',
+                description=f'Auto-generated certificate for {context["email"]} - Event: {context["title"]}',
+            )
+            for context, _ in rendered
+        ])
+    return len(rendered)
+
+
+def issue_certificates(registrations, batch_size=500, workers=1):
+    """
+    Create certificates for the given registrations. Returns (number created,
+    list of (context, error) for the ones whose file could not be rendered).
+    """
+    created, batch, failed = 0, [], []
+    for results in render_pending(registrations, min(batch_size, 100), workers):
+        for context, name, error in results:
+            if error is None:
+                batch.append((context, name))
+            else:
+                failed.append((context, error))
+        if len(batch) >= batch_size:
+            created += save_certificates(batch)
+            batch = []
+    if batch:
+        created += save_certificates(batch)
+    return created, failed
+
+
+def _verification_key(code):
+    return f'certificados:verify:{code}'
+
+
+def verify_certificate(code):
+    """
+    Public details of the certificate with this verification code, or None.
+    Malformed codes never reach the database; answers, misses included, are
+    kept in the separate 'verification' cache.
+    """
+    code = normalize_code(code)
+    if code is None:
+        return None
+    cache = caches['verification']
+    result = cache.get(_verification_key(code))
+    if result is None:
+        row = Certificado.objects.filter(verification_code=code).values(
+            'issued_at', 'user__first_name', 'user__last_name', 'user__username',
+            'event__title', 'event__start_date', 'event__end_date',
+        ).first()
+        result = False
+        if row:
+            name = f'{row["user__first_name"]} {row["user__last_name"]}'.strip()
+            result = {
+                'code': code,
+                'participant': name or row['user__username'],
+                'event': row['event__title'],
+                'start_date': row['event__start_date'].isoformat(),
+                'end_date': row['event__end_date'].isoformat(),
+                'issued_at': timezone.localdate(row['issued_at']).isoformat(),
+            }
+        cache.set(_verification_key(code), result, settings.CERTIFICATE_VERIFICATION_CACHE_TIMEOUT)
+    return result or None
+
+
+def forget_verification(code):
+    caches['verification'].delete(_verification_key(code))
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import Certificado
+from .services import forget_verification
+
+
+@receiver(post_delete, sender=Certificado)
+def invalidate_verification(sender, instance, **kwargs):
+    """A deleted certificate must stop verifying right away"""
+    forget_verification(instance.verification_code)
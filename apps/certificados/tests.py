@@ -1,3 +1,297 @@
-from django.test import TestCase
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from apps.audit.models import AuditLog
+from apps.eventos.models import Event, Registration
+from apps.usuarios.models import Usuario
+from .cache import RenderCache, content_key
+from .models import Certificado, normalize_code, verification_code
+from .rendering import layout_for, render_pdf
+from .services import context_for_certificate, issue_certificates, pending_registrations, verify_certificate
+from io import BytesIO, StringIO
+from unittest.mock import patch
+import datetime
+import os
+import shutil
+import tempfile
+import zipfile
 
-# Create your tests here.
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class GenerateCertificatesTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        professor = Usuario.objects.create_user(
+            username='prof', email='prof@example.com', password='password123',
+            role='professor', institution='Test University'
+        )
+        self.students = Usuario.objects.bulk_create([
+            Usuario(username=f'aluno{i}', email=f'aluno{i}@example.com', role='aluno') for i in range(3)
+        ])
+        past = timezone.localdate() - datetime.timedelta(days=5)
+        future = timezone.localdate() + datetime.timedelta(days=5)
+        self.events = [
+            Event.objects.create(
+                title=title, event_type='palestra', start_date=day, end_date=day, location='Auditório',
+                capacity=10, organizer=professor, professor_in_charge=professor
+            )
+            for title, day in (('Encerrado', past), ('Futuro', future))
+        ]
+        Registration.objects.bulk_create([
+            Registration(user=student, event=event, presence_confirmed=index < 2)
+            for event in self.events for index, student in enumerate(self.students)
+        ])
+
+    def test_only_missing_certificates_are_created(self):
+        """Test certificates go to confirmed participants of ended events, once"""
+        ended = self.events[0]
+        Certificado.objects.create(user=self.students[0], event=ended, file='certificates/existente.txt')
+
+        call_command('generate_certificates', stdout=StringIO())
+        self.assertEqual(
+            set(Certificado.objects.values_list('user', 'event')),
+            {(self.students[0].pk, ended.pk), (self.students[1].pk, ended.pk)},
+        )
+        certificate = Certificado.objects.get(user=self.students[1])
+        self.assertTrue(certificate.file.name.endswith('.pdf'))
+        self.assertTrue(certificate.file.read().startswith(b'%PDF'))
+        self.assertEqual(AuditLog.objects.filter(action='issue_certificate').count(), 1)
+
+    def test_series_waits_for_its_last_session(self):
+        """Test a recurring event gets certificates only once every session is over"""
+        series, _ = self.events
+        Event.objects.filter(pk=series.pk).update(recurrence='weekly')
+        session = Event.objects.create(
+            title=series.title, event_type='palestra', start_date=timezone.localdate(), end_date=timezone.localdate(),
+            location='Auditório', capacity=10, organizer=series.organizer,
+            professor_in_charge=series.professor_in_charge, parent=series,
+        )
+        call_command('generate_certificates', stdout=StringIO())
+        self.assertFalse(Certificado.objects.exists())
+
+        Event.objects.filter(pk=session.pk).update(end_date=timezone.localdate() - datetime.timedelta(days=1))
+        call_command('generate_certificates', stdout=StringIO())
+        self.assertEqual(Certificado.objects.filter(event=series).count(), 2)
+
+    def test_nothing_to_do_is_one_query(self):
+        """Test a run with every certificate already issued reads nothing else"""
+        call_command('generate_certificates', stdout=StringIO())
+        with self.assertNumQueries(1):
+            call_command('generate_certificates', stdout=StringIO())
+
+    def test_render_failures_are_reported(self):
+        """Test a certificate that fails to render is logged, returned and counted"""
+        with patch('apps.certificados.services.render_pdf', side_effect=[b'%PDF-1.4', ValueError('fonte')]):
+            with self.assertLogs('apps.certificados.services', 'ERROR'):
+                created, failed = issue_certificates(pending_registrations())
+        self.assertEqual(created, 1)
+        self.assertEqual([(context['email'], error) for context, error in failed], [('aluno1@example.com', 'fonte')])
+
+        out = StringIO()
+        with patch('apps.certificados.services.render_pdf', side_effect=ValueError('fonte')), self.assertLogs():
+            call_command('generate_certificates', stdout=out)
+        self.assertIn('Completed! 0 certificates created, 1 failed.', out.getvalue())
+
+    def test_workers_render_files(self):
+        """Test a process pool renders the files and the parent saves the rows"""
+        out = StringIO()
+        call_command('generate_certificates', workers=2, chunk_size=1, stdout=out)
+        self.assertIn('Completed! 2 certificates created, 0 failed.', out.getvalue())
+        for certificate in Certificado.objects.all():
+            self.assertTrue(certificate.file.read().startswith(b'%PDF'))
+
+
+class CertificateRenderingTests(TestCase):
+    def setUp(self):
+        self.context = {
+            'user_id': 1, 'event_id': 1, 'email': 'ana@example.com', 'name': 'Ana Souza',
+            'title': 'Semana de Computação', 'event_type': 'Palestra', 'start_date': '01/03/2026',
+            'end_date': '01/03/2026', 'location': 'Auditório', 'professor': 'Prof. Lima',
+            'organizer': 'Carla Dias', 'issued': '02/03/2026', 'issued_at': '2026-03-02T12:00:00+00:00',
+            'code': 'ABCD-EFGH-JKLM',
+        }
+
+    def test_layout_is_compiled_once_per_event(self):
+        """Test participants of the same event reuse the compiled layout"""
+        first = layout_for(self.context)
+        self.assertIs(layout_for(dict(self.context, name='Bruno Alves', user_id=2)), first)
+        self.assertIsNot(layout_for(dict(self.context, title='Outro Evento')), first)
+
+    def test_render_pdf(self):
+        """Test a certificate renders as a one-page PDF"""
+        pdf = render_pdf(self.context)
+        self.assertTrue(pdf.startswith(b'%PDF'))
+        self.assertIn(b'/Count 1', pdf)
+
+
+@override_settings(CERTIFICATE_RENDERING='lazy')
+class LazyCertificateTests(TestCase):
+    def setUp(self):
+        professor = Usuario.objects.create_user(
+            username='prof', email='prof@example.com', password='password123',
+            role='professor', institution='Test University'
+        )
+        self.student = Usuario.objects.create_user(
+            username='aluno', email='aluno@example.com', password='password123', role='aluno'
+        )
+        past = timezone.localdate() - datetime.timedelta(days=5)
+        self.event = Event.objects.create(
+            title='Encerrado', event_type='palestra', start_date=past, end_date=past, location='Auditório',
+            capacity=10, organizer=professor, professor_in_charge=professor
+        )
+        Registration.objects.create(user=self.student, event=self.event, presence_confirmed=True)
+        self.cache = RenderCache(tempfile.mkdtemp(), max_bytes=10 ** 6)
+        self.addCleanup(shutil.rmtree, self.cache.directory, ignore_errors=True)
+
+    def test_rendered_on_first_download(self):
+        """Test issuing only creates the row and downloads share the cached PDF"""
+        call_command('generate_certificates', stdout=StringIO())
+        certificate = Certificado.objects.get()
+        self.assertFalse(certificate.file)
+
+        self.client.login(username='aluno', password='password123')
+        with patch('apps.certificados.views.certificate_cache', self.cache):
+            for _ in range(2):
+                response = self.client.get(f'/certificados/{certificate.pk}/download/')
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+        self.assertEqual(len(list(self.cache.directory.glob('*/*.pdf'))), 1)
+
+    def test_least_recently_used_evicted(self):
+        """Test the cache drops the oldest PDFs once it is over its size limit"""
+        certificate = Certificado.objects.create(user=self.student, event=self.event)
+        context = context_for_certificate(certificate)
+        self.cache.open(context).close()
+        size = next(self.cache.directory.glob('*/*.pdf')).stat().st_size
+        self.cache._max_bytes = int(size * 2.5)
+
+        first = self.cache.path(content_key(context))
+        os.utime(first, (0, 0))
+        for name in ('Bruno Alves', 'Carla Dias'):
+            self.cache.open(dict(context, name=name)).close()
+        self.assertFalse(first.exists())
+        self.assertEqual(len(list(self.cache.directory.glob('*/*.pdf'))), 2)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class CertificateZipTests(TestCase):
+    def setUp(self):
+        self.organizer = Usuario.objects.create_user(
+            username='org', email='org@example.com', password='password123', role='organizador'
+        )
+        self.student = Usuario.objects.create_user(
+            username='aluno', email='aluno@example.com', password='password123', role='aluno',
+            first_name='Ana', last_name='Souza'
+        )
+        past = timezone.localdate() - datetime.timedelta(days=5)
+        self.event = Event.objects.create(
+            title='Encerrado', event_type='palestra', start_date=past, end_date=past, location='Auditório',
+            capacity=10, organizer=self.organizer, professor_in_charge=self.organizer
+        )
+        Registration.objects.create(user=self.student, event=self.event, presence_confirmed=True)
+        call_command('generate_certificates', stdout=StringIO())
+        self.url = f'/certificados/evento/{self.event.pk}/certificados.zip'
+
+    def test_organizer_downloads_zip(self):
+        """Test the ZIP streams every certificate, stored uncompressed"""
+        self.client.login(username='org', password='password123')
+        with self.assertNumQueries(6):
+            response = self.client.get(self.url)
+            content = b''.join(response.streaming_content)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+
+        archive = zipfile.ZipFile(BytesIO(content))
+        self.assertIsNone(archive.testzip())
+        [info] = archive.infolist()
+        self.assertEqual(info.filename, f'ana-souza-{self.student.pk}.pdf')
+        self.assertEqual(info.compress_type, zipfile.ZIP_STORED)
+        self.assertTrue(archive.read(info).startswith(b'%PDF'))
+
+    def test_participants_cannot_download_zip(self):
+        """Test only organizers get the archive"""
+        self.client.login(username='aluno', password='password123')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+
+    def test_other_organizers_cannot_download_zip(self):
+        """Test the archive is only served to the event's own organizer"""
+        Usuario.objects.create_user(
+            username='org2', email='org2@example.com', password='password123', role='organizador'
+        )
+        self.client.login(username='org2', password='password123')
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+@override_settings(CERTIFICATE_RENDERING='lazy')
+class CertificateVerificationTests(TestCase):
+    def setUp(self):
+        caches['verification'].clear()
+        professor = Usuario.objects.create_user(
+            username='prof', email='prof@example.com', password='password123', role='professor'
+        )
+        student = Usuario.objects.create_user(
+            username='aluno', email='aluno@example.com', password='password123', role='aluno',
+            first_name='Ana', last_name='Souza'
+        )
+        past = timezone.localdate() - datetime.timedelta(days=5)
+        event = Event.objects.create(
+            title='Encerrado', event_type='palestra', start_date=past, end_date=past, location='Auditório',
+            capacity=10, organizer=professor, professor_in_charge=professor
+        )
+        Registration.objects.create(user=student, event=event, presence_confirmed=True)
+        call_command('generate_certificates', stdout=StringIO())
+        self.certificate = Certificado.objects.get()
+
+    def test_code_matches_signature(self):
+        """Test bulk-issued certificates carry the code of their user, event and issue time"""
+        certificate = self.certificate
+        self.assertEqual(
+            certificate.verification_code,
+            verification_code(certificate.user_id, certificate.event_id, certificate.issued_at),
+        )
+        self.assertEqual(normalize_code(certificate.verification_code.replace('-', ' ').lower()),
+                         certificate.verification_code)
+        self.assertIsNone(normalize_code('ABCD-EFGH-0000'))
+
+    def test_public_lookup_is_cached(self):
+        """Test verification needs no login, one query, then none"""
+        code = self.certificate.verification_code
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/certificates/verify/{code}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['participant'], 'Ana Souza')
+        with self.assertNumQueries(0):
+            self.client.get(f'/api/certificates/verify/{code}/')
+            response = self.client.get('/certificados/verificar/', {'codigo': code.lower()})
+        self.assertContains(response, 'Certificado válido')
+
+        # Malformed codes never reach the database
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/certificates/verify/xyz/').status_code, 404)
+
+    def test_deleted_certificate_stops_verifying(self):
+        """Test deleting a certificate drops its cached verification"""
+        code = self.certificate.verification_code
+        self.assertIsNotNone(verify_certificate(code))
+        self.certificate.delete()
+        self.assertIsNone(verify_certificate(code))
+
+    @patch('apps.certificados.throttles.VerificationThrottle.THROTTLE_RATES', {'certificate_verification': '2/min'})
+    def test_page_and_api_share_rate_limit(self):
+        """Test the verification page is throttled, on the same budget as the API"""
+        code = self.certificate.verification_code
+        self.client.force_login(Usuario.objects.get(username='aluno'))
+        self.assertEqual(self.client.get(f'/api/certificates/verify/{code}/').status_code, 200)
+        self.assertContains(self.client.get('/certificados/verificar/', {'codigo': code}), 'Certificado válido')
+        response = self.client.get('/certificados/verificar/', {'codigo': code})
+        self.assertContains(response, 'Muitas verificações', status_code=429)
+        self.assertEqual(self.client.get(f'/api/certificates/verify/{code}/').status_code, 429)
+        # The empty form is always shown
+        self.assertEqual(self.client.get('/certificados/verificar/').status_code, 200)
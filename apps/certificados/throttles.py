@@ -0,0 +1,14 @@
+from django.core.cache import caches
+from rest_framework.throttling import SimpleRateThrottle
+
+class VerificationThrottle(SimpleRateThrottle):
+    """
+    Per client address, logged in or not. Shared by the verification page
+    and API, so both draw from the same budget.
+    """
+    scope = 'certificate_verification'
+    # Counted in the verification cache, away from the rest of the site
+    cache = caches['verification']
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
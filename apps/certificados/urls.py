@@ -7,7 +7,10 @@ urlpatterns = [
     # Web views
     path('', views.CertificateListView.as_view(), name='list'),
     path('<int:pk>/download/', views.CertificateDownloadView.as_view(), name='download'),
+    path('verificar/', views.CertificateVerifyView.as_view(), name='verify'),
+    path('evento/<int:pk>/certificados.zip', views.EventCertificatesZipView.as_view(), name='event_zip'),
     
     # API views
     path('api/', views.CertificadoListAPIView.as_view(), name='api_list'),
+    path('api/verify/<str:code>/', views.CertificateVerifyAPIView.as_view(), name='api_verify'),
 ]
@@ -1,10 +1,21 @@
+import datetime
+import os
+import zipfile
+
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import FileResponse, Http404
-from django.shortcuts import get_object_or_404
+from django.http import FileResponse, Http404, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, render
+from django.utils import timezone
+from django.utils.text import slugify
 from django.views.generic import ListView, View
 
+from .cache import certificate_cache
 from .models import Certificado
+from .services import context_for_certificate, verify_certificate
+from .throttles import VerificationThrottle
 from apps.audit.models import AuditLog
+from apps.eventos.models import Event
+from apps.eventos.views import OrganizerRequiredMixin
 
 
 class CertificateListView(LoginRequiredMixin, ListView):
@@ -21,10 +32,10 @@ class CertificateListView(LoginRequiredMixin, ListView):
 class CertificateDownloadView(LoginRequiredMixin, View):
     """Download certificate file"""
     def get(self, request, pk):
-        certificate = get_object_or_404(Certificado, pk=pk, user=request.user)
-        
-        if not certificate.file:
-            raise Http404("Certificado não possui arquivo.")
+        certificate = get_object_or_404(
+            Certificado.objects.select_related('user', 'event__organizer', 'event__professor_in_charge'),
+            pk=pk, user=request.user,
+        )
         
         AuditLog.objects.create(
             user=request.user,
@@ -32,13 +43,108 @@ class CertificateDownloadView(LoginRequiredMixin, View):
             description=f'Baixou certificado do evento: {certificate.event.title}'
         )
         
-        response = FileResponse(certificate.file, as_attachment=True)
-        response['Content-Disposition'] = f'attachment; filename="certificado_{certificate.event.id}.txt"'
+        if certificate.file:
+            response = FileResponse(certificate.file, as_attachment=True)
+            # Certificates issued before the PDF renderer are plain text
+            extension = os.path.splitext(certificate.file.name)[1] or '.pdf'
+        else:
+            # Issued in lazy mode: rendered on first download, then cached
+            response = FileResponse(certificate_cache.open(context_for_certificate(certificate)), as_attachment=True)
+            extension = '.pdf'
+        response['Content-Disposition'] = f'attachment; filename="certificado_{certificate.event.id}{extension}"'
+        return response
+
+
+class CertificateVerifyView(View):
+    """Public page where anyone can check a certificate by its verification code"""
+    template_name = 'certificados/verify.html'
+
+    def get(self, request):
+        code = request.GET.get('codigo', '').strip()
+        if code and not VerificationThrottle().allow_request(request, self):
+            return render(request, self.template_name, {'code': code, 'throttled': True}, status=429)
+        certificate = verify_certificate(code) if code else None
+        if certificate:
+            certificate = dict(certificate, issued_date=datetime.date.fromisoformat(certificate['issued_at']))
+        return render(request, self.template_name, {'code': code, 'certificate': certificate})
+
+
+class _ZipStream:
+    """Write-only file object for ZipFile; drain() hands over what was written"""
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data, self.chunks = b''.join(self.chunks), []
+        return data
+
+
+class EventCertificatesZipView(LoginRequiredMixin, OrganizerRequiredMixin, View):
+    """
+    Stream every certificate of an event as one ZIP, built while it is sent:
+    no temporary file, and only one file chunk in memory at a time. PDFs are
+    already compressed, so they are STORED.
+    """
+    chunk_size = 64 * 1024
+
+    def get(self, request, pk):
+        event = get_object_or_404(Event, pk=pk)
+        # Certificates of a recurring event belong to its first session
+        series = Event.objects.select_related('organizer', 'professor_in_charge').get(pk=event.series_id)
+        # Only the event's own organizer (or staff) may see its participants
+        if series.organizer_id != request.user.pk and not request.user.is_staff:
+            raise Http404('Evento não encontrado.')
+        certificates = Certificado.objects.filter(event=series).select_related('user').order_by('id')
+
+        AuditLog.objects.create(
+            user=request.user,
+            action='download_certificate',
+            description=f'Baixou os certificados do evento: {series.title}'
+        )
+
+        response = StreamingHttpResponse(
+            self._stream(certificates.iterator(chunk_size=500), series), content_type='application/zip'
+        )
+        response['Content-Disposition'] = f'attachment; filename="certificados-evento-{series.pk}.zip"'
         return response
 
+    def _open(self, certificate):
+        if certificate.file:
+            return certificate.file.open('rb')
+        return certificate_cache.open(context_for_certificate(certificate))
+
+    def _stream(self, certificates, event):
+        stream = _ZipStream()
+        with zipfile.ZipFile(stream, 'w') as archive:
+            for certificate in certificates:
+                certificate.event = event
+                user = certificate.user
+                extension = os.path.splitext(certificate.file.name)[1] if certificate.file else '.pdf'
+                info = zipfile.ZipInfo(
+                    f'{slugify(user.get_full_name() or user.username)}-{user.pk}{extension}',
+                    date_time=timezone.localtime(certificate.issued_at).timetuple()[:6],
+                )
+                # Old plain-text certificates still compress well
+                info.compress_type = zipfile.ZIP_STORED if extension == '.pdf' else zipfile.ZIP_DEFLATED
+                with self._open(certificate) as source, archive.open(info, 'w') as entry:
+                    while chunk := source.read(self.chunk_size):
+                        entry.write(chunk)
+                        yield stream.drain()
+                yield stream.drain()
+        # Central directory, written when the archive is closed
+        yield stream.drain()
+
 
 # API views for backwards compatibility
-from rest_framework import generics, permissions
+from rest_framework import generics, permissions, status
+from rest_framework.response import Response
 from .serializers import CertificateSerializer
 
 
@@ -49,3 +155,16 @@ class CertificadoListAPIView(generics.ListAPIView):
 
     def get_queryset(self):
         return Certificado.objects.filter(user=self.request.user)
+
+
+class CertificateVerifyAPIView(generics.GenericAPIView):
+    """API: Public certificate verification by code (no authentication)"""
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = []
+    throttle_classes = [VerificationThrottle]
+
+    def get(self, request, code):
+        certificate = verify_certificate(code)
+        if certificate is None:
+            return Response({'valid': False, 'detail': 'Certificado não encontrado.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({'valid': True, **certificate})
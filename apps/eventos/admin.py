@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import Event, Registration
+from django.db.models import F
+from django.db.models.functions import Now
+from .models import Event, Registration, SeatHold, WaitlistEntry
+from .services import release_hold
 
 @admin.register(Event)
 class EventAdmin(admin.ModelAdmin):
@@ -10,3 +13,36 @@ class EventAdmin(admin.ModelAdmin):
 class RegistrationAdmin(admin.ModelAdmin):
     list_display = ('user','event','registered_at','presence_confirmed')
     list_filter = ('presence_confirmed',)
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if not change:
+            Event.objects.filter(pk=obj.event_id).update(
+                registrations_count=F('registrations_count') + 1, updated_at=Now()
+            )
+
+
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(admin.ModelAdmin):
+    list_display = ('user','event','position','created_at')
+    list_filter = ('event',)
+
+
+@admin.register(SeatHold)
+class SeatHoldAdmin(admin.ModelAdmin):
+    list_display = ('user','event','expires_at')
+    list_filter = ('event',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def delete_model(self, request, obj):
+        # Also gives the seat back to the event
+        release_hold(obj.user, obj.event)
+
+    def delete_queryset(self, request, queryset):
+        for hold in queryset.select_related('user', 'event'):
+            release_hold(hold.user, hold.event)
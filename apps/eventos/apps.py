@@ -3,3 +3,6 @@ from django.apps import AppConfig
 class EventosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.eventos'
+
+    def ready(self):
+        from . import signals  # noqa: F401
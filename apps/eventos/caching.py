@@ -0,0 +1,58 @@
+"""
+Versioned cache for the public event pages and API.
+
+Cache keys embed a version counter: a global one for listings and one per
+event for detail pages. Saving or deleting an Event or Registration bumps the
+counters (see apps.eventos.signals), so stale entries are never read again and
+simply expire. Works with any Django cache backend; use the file-based one
+(CACHE_DIR setting) when running several worker processes so they share
+both the entries and the counters.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+
+GLOBAL_VERSION_KEY = 'eventos:version'
+EVENT_VERSION_KEY = 'eventos:version:{}'
+
+
+def _timeout():
+    return getattr(settings, 'EVENT_CACHE_TIMEOUT', 300)
+
+
+def _version(key):
+    version = cache.get(key)
+    if version is None:
+        # Counters must outlive the entries they version
+        cache.add(key, 1, timeout=None)
+        version = cache.get(key, 1)
+    return version
+
+
+def bump_version(event_id=None):
+    """Invalidate every listing, and the detail page of event_id if given"""
+    keys = [GLOBAL_VERSION_KEY]
+    if event_id is not None:
+        keys.append(EVENT_VERSION_KEY.format(event_id))
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 2, timeout=None)
+
+
+def listing_key(*parts):
+    return ':'.join(['eventos:list', str(_version(GLOBAL_VERSION_KEY)), *map(str, parts)])
+
+
+def detail_key(event_id, *parts):
+    version = _version(EVENT_VERSION_KEY.format(event_id))
+    return ':'.join(['eventos:detail', str(event_id), str(version), *map(str, parts)])
+
+
+def get_or_set(key, builder):
+    value = cache.get(key)
+    if value is None:
+        value = builder()
+        cache.set(key, value, _timeout())
+    return value
@@ -0,0 +1,149 @@
+"""
+Signed check-in tokens for the QR codes shown on "Minhas Inscrições".
+
+A token is "<event id>.<registration id>" signed with TimestampSigner, the
+same mechanism used for e-mail confirmation, so a door scanner endpoint can
+verify it without reading the database. The scanner itself proves it works
+the door with a per-event key (scanner_key, an HMAC of the event id shown to
+the event organizer), also checked without a query.
+
+Valid scans only enter an in-process queue: pending ids are written with one
+UPDATE ... WHERE id IN (...) once the batch fills up or CHECKIN_FLUSH_INTERVAL
+seconds have passed, and only then join a seen-set that absorbs repeated
+scans of the same code. A failed write keeps them pending for the next flush.
+"""
+
+import atexit
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+import qrcode
+from django.conf import settings
+from django.core.signing import TimestampSigner, BadSignature
+from django.db import connection
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from .models import Registration
+
+signer = TimestampSigner(salt='eventos.checkin')
+
+# Registration ids remembered by the seen-set before the oldest are dropped
+SEEN_LIMIT = 100_000
+
+
+def make_token(registration):
+    return signer.sign(f'{registration.event_id}.{registration.pk}')
+
+
+def read_token(token, max_age=None):
+    """
+    Return (event_id, registration_id) from a token.
+    Raises BadSignature (or SignatureExpired) if it was tampered with or is too old.
+    """
+    if max_age is None:
+        max_age = settings.CHECKIN_TOKEN_MAX_AGE
+    value = signer.unsign(token, max_age=max_age)
+    try:
+        event_id, registration_id = (int(part) for part in value.split('.'))
+    except ValueError:
+        raise BadSignature('Token de check-in malformado.')
+    return event_id, registration_id
+
+
+def scanner_key(event_id):
+    """Key a door scanner sends for one event, derived from SECRET_KEY"""
+    return salted_hmac('eventos.checkin.scanner', str(event_id)).hexdigest()[:32]
+
+
+def is_scanner_key(event_id, key):
+    return bool(key) and constant_time_compare(scanner_key(event_id), key)
+
+
+def qr_png(token, box_size=6):
+    """Render a token as a PNG QR code (Pillow image backend)"""
+    image = qrcode.make(token, box_size=box_size, border=2)
+    buffer = BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+class CheckinQueue:
+    """Deduplicate scans in memory and write presence in batches"""
+
+    def __init__(self, batch_size=None, interval=None):
+        self.batch_size = batch_size or settings.CHECKIN_BATCH_SIZE
+        self.interval = interval if interval is not None else settings.CHECKIN_FLUSH_INTERVAL
+        self.seen = OrderedDict()
+        # Insertion-ordered sets: waiting for a flush, and being written
+        self.pending = {}
+        self.flushing = {}
+        self.lock = threading.Lock()
+        self.timer = None
+
+    def add(self, registration_id):
+        """Queue a registration; returns False if it was already scanned"""
+        with self.lock:
+            if registration_id in self.seen or registration_id in self.pending or registration_id in self.flushing:
+                return False
+            self.pending[registration_id] = True
+            full = len(self.pending) >= self.batch_size
+            if not full:
+                self._schedule()
+        if full:
+            self.flush()
+        return True
+
+    def _schedule(self):
+        # Called with the lock held
+        if self.timer is None:
+            self.timer = threading.Timer(self.interval, self._flush_in_thread)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def flush(self):
+        """Write every pending check-in, returns how many rows were updated"""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            self.flushing.update(pending)
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+        if not pending:
+            return 0
+        try:
+            updated = Registration.objects.filter(
+                id__in=list(pending), presence_confirmed=False
+            ).update(presence_confirmed=True)
+        except Exception:
+            # Keep the scans for the next flush instead of dropping them
+            with self.lock:
+                for registration_id in pending:
+                    del self.flushing[registration_id]
+                self.pending = {**pending, **self.pending}
+                self._schedule()
+            raise
+        with self.lock:
+            for registration_id in pending:
+                del self.flushing[registration_id]
+                self.seen[registration_id] = True
+            while len(self.seen) > SEEN_LIMIT:
+                self.seen.popitem(last=False)
+        return updated
+
+    def forget(self):
+        """Drop the seen-set, e.g. between events"""
+        with self.lock:
+            self.seen.clear()
+
+    def _flush_in_thread(self):
+        try:
+            self.flush()
+        finally:
+            # Timer threads get their own connection; don't leak it
+            connection.close()
+
+
+checkin_queue = CheckinQueue()
+# Don't lose scans still waiting for the next batch when the worker stops
+atexit.register(checkin_queue.flush)
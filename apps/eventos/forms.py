@@ -1,6 +1,7 @@
 from django import forms
 from django.utils import timezone
-from .models import Event, Registration
+from .models import Event
+from .services import enroll, EnrollmentOutcome, ENROLLMENT_MESSAGES
 from apps.usuarios.models import Usuario
 
 
@@ -11,7 +12,8 @@ class EventForm(forms.ModelForm):
         model = Event
         fields = [
             'title', 'description', 'event_type', 'start_date', 'end_date',
-            'start_time', 'end_time', 'location', 'capacity', 'professor_in_charge', 'banner'
+            'start_time', 'end_time', 'recurrence', 'recurrence_until',
+            'location', 'capacity', 'professor_in_charge', 'banner'
         ]
         widgets = {
             'title': forms.TextInput(attrs={
@@ -40,6 +42,11 @@ class EventForm(forms.ModelForm):
                 'class': 'form-control',
                 'type': 'time'
             }),
+            'recurrence': forms.Select(attrs={'class': 'form-control'}),
+            'recurrence_until': forms.DateInput(attrs={
+                'class': 'form-control',
+                'type': 'date'
+            }),
             'location': forms.TextInput(attrs={
                 'class': 'form-control',
                 'placeholder': 'Local do evento'
@@ -63,6 +70,8 @@ class EventForm(forms.ModelForm):
             'end_date': 'Data de Término',
             'start_time': 'Horário de Início',
             'end_time': 'Horário de Término',
+            'recurrence': 'Repetição',
+            'recurrence_until': 'Repetir até',
             'location': 'Local',
             'capacity': 'Número de Vagas',
             'professor_in_charge': 'Professor Responsável',
@@ -75,6 +84,10 @@ class EventForm(forms.ModelForm):
         self.fields['professor_in_charge'].queryset = Usuario.objects.filter(
             role='professor', is_active=True
         )
+        # A session of a series cannot start its own repetition
+        if self.instance.parent_id:
+            del self.fields['recurrence']
+            del self.fields['recurrence_until']
 
     def clean_start_date(self):
         start_date = self.cleaned_data.get('start_date')
@@ -97,6 +110,13 @@ class EventForm(forms.ModelForm):
             if end_time < start_time:
                 self.add_error('end_time', 'O horário de término não pode ser anterior ao horário de início.')
         
+        recurrence = cleaned_data.get('recurrence')
+        recurrence_until = cleaned_data.get('recurrence_until')
+        if recurrence_until and not recurrence:
+            self.add_error('recurrence', 'Escolha a repetição ou deixe "Repetir até" em branco.')
+        elif start_date and recurrence_until and recurrence_until < start_date:
+            self.add_error('recurrence_until', 'A repetição não pode terminar antes da data de início.')
+        
         # Validate banner is an image
         banner = cleaned_data.get('banner')
         if banner and hasattr(banner, 'content_type'):
@@ -123,17 +143,17 @@ class RegistrationForm(forms.Form):
         except Event.DoesNotExist:
             raise forms.ValidationError('Evento não encontrado.')
         
-        # Check if already registered
-        if Registration.objects.filter(user=self.user, event=event).exists():
-            raise forms.ValidationError('Você já está inscrito neste evento.')
-        
-        # Check capacity
-        if event.registrations.count() >= event.capacity:
-            raise forms.ValidationError('Este evento atingiu a capacidade máxima.')
-        
         # Check if organizer
         if self.user.role == 'organizador':
             raise forms.ValidationError('Organizadores não podem se inscrever em eventos.')
         
+        # Seat availability and duplicates are checked atomically in save()
         cleaned_data['event'] = event
-        return cleaned_data
\ No newline at end of file
+        return cleaned_data
+
+    def save(self):
+        """Enroll the user, returns the registration or None with a form error"""
+        outcome, registration = enroll(self.user, self.cleaned_data['event'])
+        if outcome != EnrollmentOutcome.ENROLLED:
+            self.add_error(None, ENROLLMENT_MESSAGES[outcome])
+        return registration
@@ -0,0 +1,99 @@
+"""
+iCalendar (RFC 5545) feeds of events, for calendar apps to subscribe to.
+
+The public feed lists every event; the personal feed lists the events a user
+is registered in and is authenticated by a signed token in the URL, since
+calendar clients cannot log in. Feeds are generated line by line from a
+chunked queryset iterator.
+"""
+
+import datetime
+
+from django.core.signing import Signer, BadSignature
+from django.utils import timezone
+
+signer = Signer(salt='eventos.ical')
+
+FIELDS = (
+    'id', 'title', 'description', 'location', 'start_date', 'end_date',
+    'start_time', 'end_time', 'updated_at',
+)
+
+
+def feed_token(user):
+    return signer.sign(str(user.pk))
+
+
+def read_feed_token(token):
+    """Return the user id in a feed token, raises BadSignature if forged"""
+    value = signer.unsign(token)
+    if not value.isdigit():
+        raise BadSignature('Token de calendário malformado.')
+    return int(value)
+
+
+def _escape(text):
+    return (
+        (text or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def _fold(line):
+    """Split content lines longer than 75 octets, as the RFC requires"""
+    data = line.encode()
+    if len(data) <= 75:
+        return line + '\r\n'
+    parts = []
+    while data:
+        size = 75 if not parts else 74
+        # Never cut a multi-byte UTF-8 character in half
+        while size < len(data) and (data[size] & 0xC0) == 0x80:
+            size -= 1
+        parts.append(data[:size].decode())
+        data = data[size:]
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def _utc(value):
+    return value.astimezone(datetime.timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _event_lines(event, url):
+    yield 'BEGIN:VEVENT'
+    yield f'UID:evento-{event.id}@{url.split("/")[2]}'
+    yield f'DTSTAMP:{_utc(event.updated_at)}'
+    if event.start_time:
+        tz = timezone.get_current_timezone()
+        start = timezone.make_aware(datetime.datetime.combine(event.start_date, event.start_time), tz)
+        if event.end_time:
+            end = timezone.make_aware(datetime.datetime.combine(event.end_date, event.end_time), tz)
+        else:
+            end = timezone.make_aware(datetime.datetime.combine(event.end_date, event.start_time), tz)
+            end += datetime.timedelta(hours=1)
+        yield f'DTSTART:{_utc(start)}'
+        yield f'DTEND:{_utc(end)}'
+    else:
+        # All-day event; DTEND is exclusive
+        yield f'DTSTART;VALUE=DATE:{event.start_date:%Y%m%d}'
+        yield f'DTEND;VALUE=DATE:{event.end_date + datetime.timedelta(days=1):%Y%m%d}'
+    yield f'SUMMARY:{_escape(event.title)}'
+    yield f'LOCATION:{_escape(event.location)}'
+    if event.description:
+        yield f'DESCRIPTION:{_escape(event.description)}'
+    yield f'URL:{url}'
+    yield 'END:VEVENT'
+
+
+def generate(events, name, detail_url):
+    """
+    Yield the calendar as text chunks, one per event.
+    `detail_url(event_id)` must return the absolute URL of the event page.
+    """
+    header = ['BEGIN:VCALENDAR', 'VERSION:2.0', 'PRODID:-//SGEA//Eventos//PT-BR',
+              'CALSCALE:GREGORIAN', f'X-WR-CALNAME:{_escape(name)}']
+    yield ''.join(_fold(line) for line in header)
+    for event in events.only(*FIELDS).order_by('start_date', 'id').iterator(chunk_size=500):
+        yield ''.join(_fold(line) for line in _event_lines(event, detail_url(event.id)))
+    yield _fold('END:VCALENDAR')
+
@@ -0,0 +1,120 @@
+"""
+Live vacancy counts pushed to browsers with Server-Sent Events (ASGI).
+
+Every watcher of an event subscribes to one in-process VacancyBroker. A
+single publisher task wakes up every LIVE_VACANCY_INTERVAL seconds, compares
+the cache version counters of the watched events (bumped on every
+registration, hold or edit, see apps.eventos.caching) and only reads the
+events whose version moved, all in one query. Changes within an interval
+are coalesced, so thousands of watchers cost one cache read per interval
+plus one query per actual change. With a shared cache backend (CACHE_DIR)
+changes made by other worker processes are seen too.
+
+Streams need an ASGI server. Under WSGI the stream endpoint answers 204 and
+the page falls back to polling EventVacanciesView.
+"""
+
+import asyncio
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .caching import EVENT_VERSION_KEY
+from .models import Event
+
+
+def vacancies(capacity, registrations_count, held_count):
+    return max(0, capacity - registrations_count - held_count)
+
+
+class VacancyBroker:
+    """Fan-out of vacancy changes from one publisher task to many watchers"""
+
+    def __init__(self):
+        self.watchers = {}    # event id -> set of queues
+        self.versions = {}    # event id -> last seen cache version
+        self.vacancies = {}   # event id -> last published value
+        self.task = None
+
+    def subscribe(self, event_id, current):
+        """Register a watcher, returns the queue its updates are put in"""
+        queue = asyncio.Queue(maxsize=1)
+        if event_id not in self.watchers:
+            self.watchers[event_id] = set()
+            self.versions[event_id] = cache.get(EVENT_VERSION_KEY.format(event_id))
+            self.vacancies[event_id] = current
+        self.watchers[event_id].add(queue)
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self.run())
+        return queue
+
+    def unsubscribe(self, event_id, queue):
+        queues = self.watchers.get(event_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self.watchers[event_id]
+            self.versions.pop(event_id, None)
+            self.vacancies.pop(event_id, None)
+
+    async def run(self):
+        while self.watchers:
+            await asyncio.sleep(settings.LIVE_VACANCY_INTERVAL)
+            await self.poll()
+
+    async def poll(self):
+        """Publish the events whose cache version changed since the last poll"""
+        keys = {EVENT_VERSION_KEY.format(event_id): event_id for event_id in self.watchers}
+        current = await cache.aget_many(list(keys))
+        changed = [
+            event_id for key, event_id in keys.items()
+            if current.get(key) != self.versions.get(event_id)
+        ]
+        if not changed:
+            return
+        rows = Event.objects.filter(pk__in=changed).values_list('id', 'capacity', 'registrations_count', 'held_count')
+        async for event_id, capacity, registrations_count, held_count in rows:
+            self.versions[event_id] = current.get(EVENT_VERSION_KEY.format(event_id))
+            value = vacancies(capacity, registrations_count, held_count)
+            if value != self.vacancies.get(event_id):
+                self.vacancies[event_id] = value
+                self.publish(event_id, value)
+
+    def publish(self, event_id, value):
+        for queue in self.watchers.get(event_id, ()):
+            # Slow watchers only ever get the latest value
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(value)
+
+
+broker = VacancyBroker()
+
+
+def sse_message(event_id, value):
+    data = json.dumps({'event': event_id, 'vacancies_left': value})
+    return f'event: vacancies\ndata: {data}\n\n'
+
+
+async def vacancy_stream(event_id, current, duration=None, heartbeat=15):
+    """
+    Yield SSE messages for one watcher: the current value, then every change.
+    Ends after `duration` seconds; EventSource reconnects by itself.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + (duration or settings.LIVE_VACANCY_MAX_SECONDS)
+    queue = broker.subscribe(event_id, current)
+    try:
+        yield f'retry: 3000\n{sse_message(event_id, current)}'
+        while (remaining := deadline - loop.time()) > 0:
+            try:
+                value = await asyncio.wait_for(queue.get(), timeout=min(heartbeat, remaining))
+            except asyncio.TimeoutError:
+                # Comment line, keeps proxies from closing an idle connection
+                yield ': ping\n\n'
+                continue
+            yield sse_message(event_id, value)
+    finally:
+        broker.unsubscribe(event_id, queue)
@@ -0,0 +1,77 @@
+"""
+Management command to confirm presence from an attendance list.
+Run with: python manage.py import_attendance <event_id> presenca.csv [--dry-run] [--chunk-size 500]
+
+The file has one user identifier (id, e-mail or username) per line, in the
+first column. A header row named user, id, email or username is skipped.
+Identifiers are resolved in a single query and presence is flipped with one
+UPDATE per chunk.
+"""
+
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.audit.models import AuditLog
+from apps.eventos.models import Event
+from apps.eventos.services import confirm_attendance, read_identifier_csv, AttendanceOutcome
+
+
+class Command(BaseCommand):
+    help = 'Confirms presence for the users listed in a CSV file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('event_id', type=int, help='Event whose registrations are checked in')
+        parser.add_argument('path', help='Attendance file, or - for stdin')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Registrations updated per UPDATE statement',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show what would be done without confirming presence',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        dry_run = options['dry_run']
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive.')
+
+        try:
+            event = Event.objects.get(pk=options['event_id'])
+        except Event.DoesNotExist:
+            raise CommandError(f'Event {options["event_id"]} does not exist.')
+
+        try:
+            handle = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        except OSError as e:
+            raise CommandError(f'Could not open {path}: {e}')
+        with handle:
+            identifiers = read_identifier_csv(handle)
+
+        self.stdout.write(f'Event: {event.title} ({len(identifiers)} identifiers)')
+        results, confirmed = confirm_attendance(
+            event, identifiers, chunk_size=options['chunk_size'], dry_run=dry_run
+        )
+
+        missing = 0
+        for identifier, outcome in results:
+            if outcome == AttendanceOutcome.NOT_REGISTERED:
+                missing += 1
+                self.stderr.write(f'  [ERROR] {identifier}: not registered in this event')
+
+        if confirmed and not dry_run:
+            AuditLog.objects.create(
+                user=None,
+                action='confirm_presence',
+                description=f'Confirmou presença de {confirmed} inscritos no evento {event.id} a partir de {path}'
+            )
+
+        style = self.style.SUCCESS if not missing else self.style.WARNING
+        self.stdout.write(
+            style(f'\n{"[DRY RUN] " if dry_run else ""}Completed! {confirmed} presences confirmed, {missing} identifiers not found.')
+        )
@@ -0,0 +1,176 @@
+"""
+Management command to bulk import events from a CSV or NDJSON file.
+Run with: python manage.py import_events calendario.csv [--dry-run] [--batch-size 1000]
+
+Expected columns (CSV header or JSON keys):
+    title, description, event_type, start_date, end_date, start_time, end_time,
+    location, capacity, organizer, professor_in_charge
+
+`organizer` and `professor_in_charge` take a username or e-mail. Dates use
+YYYY-MM-DD and times HH:MM. The file is read one row at a time and inserted
+in batches, so memory stays flat regardless of the file size.
+"""
+
+import csv
+import json
+import sys
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.audit.models import AuditLog
+from apps.eventos import caching
+from apps.eventos.models import Event
+from apps.usuarios.models import Usuario
+
+FIELDS = (
+    'title', 'description', 'event_type', 'start_date', 'end_date',
+    'start_time', 'end_time', 'location', 'capacity',
+)
+PEOPLE_FIELDS = ('organizer', 'professor_in_charge')
+OPTIONAL_FIELDS = ('description', 'start_time', 'end_time')
+
+
+class Command(BaseCommand):
+    help = 'Imports events from a CSV or NDJSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import, or - for stdin')
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'ndjson'],
+            help='Input format (default: guessed from the file extension)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows inserted per bulk_create/transaction',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate every row without inserting anything',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv')
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be positive.')
+
+        # One query per role instead of one per row
+        organizers = self._lookup(Usuario.objects.filter(role=Usuario.ROLE_ORGANIZADOR))
+        professors = self._lookup(Usuario.objects.filter(role=Usuario.ROLE_PROFESSOR, is_active=True))
+
+        imported = errors = 0
+        batch = []
+        try:
+            handle = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        except OSError as e:
+            raise CommandError(f'Could not open {path}: {e}')
+
+        with handle:
+            for line, row in self._rows(handle, fmt):
+                try:
+                    batch.append(self._build_event(row, organizers, professors))
+                except ValidationError as e:
+                    errors += 1
+                    self.stderr.write(f'  [ERROR] line {line}: {self._format_error(e)}')
+                    continue
+
+                if len(batch) >= batch_size:
+                    imported += self._flush(batch, dry_run)
+                    batch = []
+            imported += self._flush(batch, dry_run)
+
+        if imported and not dry_run:
+            caching.bump_version()
+            AuditLog.objects.create(
+                user=None,
+                action='create_event',
+                description=f'Importou {imported} eventos de {path}'
+            )
+
+        style = self.style.SUCCESS if not errors else self.style.WARNING
+        self.stdout.write(
+            style(f'\n{"[DRY RUN] " if dry_run else ""}Completed! {imported} events imported, {errors} rows rejected.')
+        )
+
+    def _lookup(self, queryset):
+        """Map username and e-mail (lowercase) to the user"""
+        lookup = {}
+        for user in queryset.only('id', 'username', 'email', 'role', 'is_active').iterator():
+            lookup[user.username.lower()] = user
+            if user.email:
+                lookup[user.email.lower()] = user
+        return lookup
+
+    def _rows(self, handle, fmt):
+        """Yield (line number, dict) pairs without loading the file"""
+        if fmt == 'csv':
+            reader = csv.DictReader(handle)
+            missing = set(FIELDS + PEOPLE_FIELDS) - set(OPTIONAL_FIELDS) - set(reader.fieldnames or ())
+            if missing:
+                raise CommandError(f'Missing columns: {", ".join(sorted(missing))}')
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for number, text in enumerate(handle, start=1):
+                if not text.strip():
+                    continue
+                try:
+                    row = json.loads(text)
+                except json.JSONDecodeError:
+                    row = None
+                yield number, row
+
+    def _build_event(self, row, organizers, professors):
+        """Validate a row like EventForm/Event.clean and return an unsaved Event"""
+        if not isinstance(row, dict):
+            raise ValidationError('Linha inválida: esperado um objeto JSON.')
+
+        values = {}
+        for field in FIELDS:
+            value = row.get(field)
+            if isinstance(value, str):
+                value = value.strip()
+            # Blank optional columns must become NULL, not ''
+            values[field] = None if value in ('', None) and field != 'description' else value
+        values['description'] = values['description'] or ''
+
+        errors = {}
+        organizer = organizers.get(str(row.get('organizer') or '').strip().lower())
+        if organizer is None:
+            errors['organizer'] = ['Organizador não encontrado.']
+        professor = professors.get(str(row.get('professor_in_charge') or '').strip().lower())
+        if professor is None:
+            errors['professor_in_charge'] = ['Professor responsável não encontrado.']
+        if errors:
+            raise ValidationError(errors)
+
+        event = Event(organizer=organizer, professor_in_charge=professor, **values)
+        # Foreign keys are already resolved; validating them would query per row
+        event.clean_fields(exclude=PEOPLE_FIELDS + ('banner',))
+        event.clean()
+        return event
+
+    def _flush(self, batch, dry_run):
+        if not batch:
+            return 0
+        if not dry_run:
+            with transaction.atomic():
+                Event.objects.bulk_create(batch)
+        self.stdout.write(f'  -> {len(batch)} rows {"validated" if dry_run else "inserted"}')
+        return len(batch)
+
+    def _format_error(self, error):
+        if hasattr(error, 'message_dict'):
+            return '; '.join(
+                f'{field}: {" ".join(messages)}' if field != '__all__' else ' '.join(messages)
+                for field, messages in error.message_dict.items()
+            )
+        return ' '.join(error.messages)
@@ -0,0 +1,51 @@
+"""
+Management command to create the upcoming sessions of recurring events.
+Run with: python manage.py materialize_sessions [--days 120] [--dry-run]
+
+Sessions are only created RECURRENCE_WINDOW_DAYS ahead, so open-ended series
+need this to run as a scheduled task (cron job) daily.
+"""
+
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.eventos.recurrence import materialize_sessions, pending_series, session_dates
+
+
+class Command(BaseCommand):
+    help = 'Creates the sessions of recurring events inside the rolling window'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.RECURRENCE_WINDOW_DAYS,
+            help='How many days ahead sessions should exist',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show what would be done without creating sessions',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        until = timezone.localdate() + datetime.timedelta(days=options['days'])
+        created = 0
+
+        for event in pending_series(until):
+            if dry_run:
+                done = event.materialized_until or event.start_date
+                count = sum(1 for day in session_dates(event, until) if day > done)
+            else:
+                count = materialize_sessions(event, until)
+            if count:
+                created += count
+                self.stdout.write(f'  -> {event.title}: {count} sessions')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'\n{"[DRY RUN] " if dry_run else ""}Completed! {created} sessions created until {until}.')
+        )
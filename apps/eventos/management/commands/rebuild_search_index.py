@@ -0,0 +1,26 @@
+"""
+Management command to rebuild the full-text search index of events.
+Run with: python manage.py rebuild_search_index
+
+The index is kept in sync by database triggers; this is only needed after
+restoring a dump or editing the FTS table by hand.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.eventos.models import Event
+from apps.eventos.search import fts_enabled, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the SQLite FTS5 search index for events'
+
+    def handle(self, *args, **options):
+        if not fts_enabled():
+            raise CommandError('Full-text index is only available on SQLite.')
+
+        rebuild_index()
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Completed! {Event.objects.count()} events indexed.')
+        )
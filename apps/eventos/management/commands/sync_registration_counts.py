@@ -0,0 +1,89 @@
+"""
+Management command to repair the denormalized Event.registrations_count and
+Event.held_count.
+Run with: python manage.py sync_registration_counts
+
+The counters are maintained incrementally on enroll/cancel and hold/release,
+so this is only needed after manual database edits or to double-check
+consistency. It also deletes expired seat holds, which are otherwise only
+reclaimed when a seat claim on their event fails or its page is shown, and
+hands the seats it frees to the waitlists; scheduling it (e.g. every few
+minutes) keeps abandoned holds from hiding vacancies in the listings.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Now
+from django.utils import timezone
+
+from apps.eventos import caching
+from apps.eventos.models import Event, Registration, SeatHold
+from apps.eventos.services import promote_waitlist
+
+
+def _count_per_event(queryset):
+    counts = (
+        queryset.filter(event=OuterRef('pk'))
+        .order_by()
+        .values('event')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts), Value(0))
+
+
+class Command(BaseCommand):
+    help = 'Recomputes Event.registrations_count and Event.held_count from the registrations and seat holds'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report events whose counters are out of sync',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        now = timezone.now()
+
+        expired = SeatHold.objects.filter(expires_at__lte=now)
+        # Events that may get free seats for their waitlist
+        freed = set(expired.values_list('event_id', flat=True))
+        if dry_run:
+            self.stdout.write(f'  {expired.count()} expired seat holds to delete')
+        else:
+            # post_delete gives their seats back; the recount below is authoritative anyway
+            deleted, _ = expired.delete()
+            self.stdout.write(f'  {deleted} expired seat holds deleted')
+
+        actual = _count_per_event(Registration.objects.all())
+        actual_held = _count_per_event(SeatHold.objects.filter(expires_at__gt=now))
+
+        out_of_sync = (
+            Event.objects.annotate(actual_count=actual, actual_held=actual_held)
+            .filter(~Q(registrations_count=F('actual_count')) | ~Q(held_count=F('actual_held')))
+            .values_list('id', 'title', 'registrations_count', 'actual_count', 'held_count', 'actual_held')
+        )
+
+        fixed = []
+        for event_id, title, stored, real, stored_held, real_held in out_of_sync:
+            self.stdout.write(
+                f'  -> {title} (#{event_id}): {stored} -> {real} registrations, {stored_held} -> {real_held} holds'
+            )
+            fixed.append(event_id)
+
+        if not dry_run and fixed:
+            Event.objects.filter(pk__in=fixed).update(
+                registrations_count=actual, held_count=actual_held, updated_at=Now()
+            )
+            # update() skips the signals that invalidate cached pages
+            for event_id in fixed:
+                caching.bump_version(event_id)
+
+        if not dry_run:
+            promoted = sum(len(promote_waitlist(event_id)) for event_id in sorted(freed.union(fixed)))
+            self.stdout.write(f'  {promoted} waitlisted users promoted')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'\n{"[DRY RUN] " if dry_run else ""}Completed! {len(fixed)} events out of sync.')
+        )
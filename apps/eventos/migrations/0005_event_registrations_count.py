@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:48
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_registrations_count(apps, schema_editor):
+    Event = apps.get_model('eventos', 'Event')
+    Registration = apps.get_model('eventos', 'Registration')
+    counts = (
+        Registration.objects.filter(event=OuterRef('pk'))
+        .order_by()
+        .values('event')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    Event.objects.update(registrations_count=Coalesce(Subquery(counts), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eventos', '0004_remove_inscricao_evento_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='registrations_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Inscrições'),
+        ),
+        migrations.RunPython(backfill_registrations_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,84 @@
+from django.db import migrations
+
+FTS_TABLE = 'eventos_event_fts'
+
+PROFESSOR_NAME = (
+    "COALESCE(NULLIF(TRIM(u.first_name || ' ' || u.last_name), ''), u.username)"
+)
+
+INDEX_EVENT = f"""
+    INSERT INTO {FTS_TABLE}(rowid, title, description, location, professor)
+    SELECT new.id, new.title, new.description, new.location, {PROFESSOR_NAME}
+    FROM usuarios_usuario u WHERE u.id = new.professor_in_charge_id;
+"""
+
+FORWARD_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        title, description, location, professor,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON eventos_event BEGIN
+        {INDEX_EVENT}
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_au
+    AFTER UPDATE OF title, description, location, professor_in_charge_id ON eventos_event BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        {INDEX_EVENT}
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON eventos_event BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_professor_au
+    AFTER UPDATE OF first_name, last_name, username ON usuarios_usuario BEGIN
+        UPDATE {FTS_TABLE}
+        SET professor = COALESCE(NULLIF(TRIM(new.first_name || ' ' || new.last_name), ''), new.username)
+        WHERE rowid IN (SELECT id FROM eventos_event WHERE professor_in_charge_id = new.id);
+    END
+    """,
+    f"""
+    INSERT INTO {FTS_TABLE}(rowid, title, description, location, professor)
+    SELECT e.id, e.title, e.description, e.location, {PROFESSOR_NAME}
+    FROM eventos_event e
+    JOIN usuarios_usuario u ON u.id = e.professor_in_charge_id
+    """,
+]
+
+REVERSE_SQL = [
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_professor_au',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_au',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ai',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+
+def run_sql(statements):
+    def run(apps, schema_editor):
+        # FTS5 is SQLite only; other backends fall back to icontains search
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eventos', '0006_waitlistentry'),
+        ('usuarios', '0002_remove_usuario_instituicao_remove_usuario_perfil_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_sql(FORWARD_SQL), run_sql(REVERSE_SQL)),
+    ]
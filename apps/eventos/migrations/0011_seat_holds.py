@@ -0,0 +1,92 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Frozen copy of the eventos_event_fts triggers created in 0007, which
+# SQLite drops when this migration rebuilds eventos_event.
+FTS_TABLE = 'eventos_event_fts'
+
+INDEX_EVENT = f"""
+    INSERT INTO {FTS_TABLE}(rowid, title, description, location, professor)
+    SELECT new.id, new.title, new.description, new.location,
+           COALESCE(NULLIF(TRIM(u.first_name || ' ' || u.last_name), ''), u.username)
+    FROM usuarios_usuario u WHERE u.id = new.professor_in_charge_id;
+"""
+
+TRIGGERS_SQL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON eventos_event BEGIN
+        {INDEX_EVENT}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+    AFTER UPDATE OF title, description, location, professor_in_charge_id ON eventos_event BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        {INDEX_EVENT}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON eventos_event BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_professor_au
+    AFTER UPDATE OF first_name, last_name, username ON usuarios_usuario BEGIN
+        UPDATE {FTS_TABLE}
+        SET professor = COALESCE(NULLIF(TRIM(new.first_name || ' ' || new.last_name), ''), new.username)
+        WHERE rowid IN (SELECT id FROM eventos_event WHERE professor_in_charge_id = new.id);
+    END
+    """,
+]
+
+DROP_TRIGGERS_SQL = [
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}' for suffix in ('ai', 'au', 'ad', 'professor_au')
+]
+
+
+def run_sql(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == 'sqlite':
+            for sql in statements:
+                schema_editor.execute(sql)
+    return run
+
+
+drop_triggers = run_sql(DROP_TRIGGERS_SQL)
+create_triggers = run_sql(TRIGGERS_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eventos', '0010_event_recurrence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Adding the column rebuilds eventos_event on SQLite
+        migrations.RunPython(drop_triggers, create_triggers),
+        migrations.AddField(
+            model_name='event',
+            name='held_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Vagas reservadas'),
+        ),
+        migrations.RunPython(create_triggers, drop_triggers),
+        migrations.CreateModel(
+            name='SeatHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('expires_at', models.DateTimeField(verbose_name='Expira em')),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holds', to='eventos.event')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='seat_holds', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['event', 'expires_at'], name='seathold_event_expires_idx')],
+                'unique_together': {('user', 'event')},
+            },
+        ),
+    ]
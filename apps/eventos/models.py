@@ -1,3 +1,5 @@
+import datetime
+
 from django.db import models
 from django.conf import settings
 from django.core.exceptions import ValidationError
@@ -10,6 +12,12 @@ class Event(models.Model):
         ('workshop','Workshop'),
         ('curso','Curso'),
     )
+    RECURRENCE_CHOICES = (
+        ('', 'Não se repete'),
+        ('weekly', 'Semanal'),
+        ('biweekly', 'Quinzenal'),
+        ('monthly', 'Mensal'),
+    )
 
     title = models.CharField('Título', max_length=255)
     description = models.TextField('Descrição', blank=True)
@@ -23,7 +31,30 @@ class Event(models.Model):
     organizer = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.PROTECT, related_name='organized_events')
     professor_in_charge = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.PROTECT, related_name='events_as_professor')
     banner = models.ImageField('Banner', upload_to='banners/', null=True, blank=True)
+    # Recurring series: this event is the first session, later sessions are
+    # Event rows pointing to it (see apps.eventos.recurrence). Registrations
+    # and seats belong to the first session and cover the whole series.
+    recurrence = models.CharField('Repetição', max_length=10, choices=RECURRENCE_CHOICES, blank=True, default='')
+    recurrence_until = models.DateField('Repetir até', null=True, blank=True)
+    parent = models.ForeignKey(
+        'self', on_delete=models.CASCADE, null=True, blank=True, editable=False, related_name='sessions'
+    )
+    materialized_until = models.DateField(null=True, blank=True, editable=False)
+    # Denormalized count of registrations, kept in sync by apps.eventos.services
+    # and apps.eventos.signals, repairable with `manage.py sync_registration_counts`.
+    registrations_count = models.PositiveIntegerField('Inscrições', default=0, editable=False)
+    # Seats reserved by SeatHolds; expired ones are reclaimed lazily or by sync_registration_counts
+    held_count = models.PositiveIntegerField('Vagas reservadas', default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Also bumped by the queryset updates that change registrations_count,
+    # so it reflects everything shown by the API (conditional GET)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            # keyset pagination of listings
+            models.Index(fields=['start_date', 'id'], name='event_start_date_id_idx'),
+        ]
 
     def clean(self):
         if self.start_date < timezone.localdate():
@@ -33,12 +64,32 @@ class Event(models.Model):
         if self.start_date == self.end_date and self.start_time and self.end_time:
             if self.end_time < self.start_time:
                 raise ValidationError('Horário de término não pode ser anterior ao horário de início.')
+        if self.recurrence_until and not self.recurrence:
+            raise ValidationError('Informe a repetição do evento.')
+        if self.recurrence_until and self.recurrence_until < self.start_date:
+            raise ValidationError('A repetição não pode terminar antes do início do evento.')
         # garantir professor
         if not self.professor_in_charge:
             raise ValidationError('Evento deve ter um professor responsável.')
 
+    @property
+    def series_id(self):
+        """The event that holds registrations for this session"""
+        return self.parent_id or self.pk
+
     def vacancies_left(self):
-        return max(0, self.capacity - self.registrations.count())
+        if self.parent_id:
+            return self.parent.vacancies_left()
+        return max(0, self.capacity - self.registrations_count - self.held_count)
+
+    def time_range(self):
+        """(start, end) as naive datetimes, end exclusive; missing times mean the whole day"""
+        start = datetime.datetime.combine(self.start_date, self.start_time or datetime.time.min)
+        if self.end_time:
+            end = datetime.datetime.combine(self.end_date, self.end_time)
+        else:
+            end = datetime.datetime.combine(self.end_date + datetime.timedelta(days=1), datetime.time.min)
+        return start, end
 
     def __str__(self):
         return f'{self.title} ({self.start_date})'
@@ -58,5 +109,42 @@ class Registration(models.Model):
         if self.user.role == getattr(settings, 'ORGANIZER_ROLE', 'organizador'):
             raise ValidationError('Organizadores não podem se inscrever em eventos.')
         # capacidade
-        if self.pk is None and self.event.registrations.count() >= self.event.capacity:
-            raise ValidationError('Capacidade do evento atingida.')
\ No newline at end of file
+        if self.pk is None and self.event.registrations_count >= self.event.capacity:
+            raise ValidationError('Capacidade do evento atingida.')
+
+class WaitlistEntry(models.Model):
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='waitlist_entries')
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='waitlist')
+    # Monotonic queue position per event, the head is the lowest position
+    position = models.PositiveIntegerField('Posição')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = (('user','event'), ('event','position'))
+        ordering = ['event', 'position']
+
+    def rank(self):
+        """1-based place in the queue (indexed range count)"""
+        return WaitlistEntry.objects.filter(event_id=self.event_id, position__lt=self.position).count() + 1
+
+    def __str__(self):
+        return f'{self.user} - {self.event} (#{self.position})'
+
+class SeatHold(models.Model):
+    """A seat reserved for a user while they finish enrolling"""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='seat_holds')
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='holds')
+    expires_at = models.DateTimeField('Expira em')
+
+    class Meta:
+        unique_together = ('user', 'event')
+        indexes = [
+            # lazy reclaim of the expired holds of one event
+            models.Index(fields=['event', 'expires_at'], name='seathold_event_expires_idx'),
+        ]
+
+    def is_active(self):
+        return self.expires_at > timezone.now()
+
+    def __str__(self):
+        return f'{self.user} - {self.event} (até {self.expires_at:%H:%M})'
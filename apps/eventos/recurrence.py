@@ -0,0 +1,168 @@
+"""
+Recurring events (weekly seminars, multi-session courses).
+
+A series is its first session plus one Event row per later session, created
+with bulk_create and pointing to the first one through `parent`. Listings,
+search and feeds therefore keep querying plain Event rows by date. Sessions
+are materialized up to RECURRENCE_WINDOW_DAYS ahead; open-ended series are
+extended by `manage.py materialize_sessions`, run daily.
+"""
+
+import calendar
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Q
+from django.db.models.functions import Coalesce, Now
+from django.utils import timezone
+
+from . import caching
+from .models import Event, Registration
+
+# Fields copied from the first session to the others
+SHARED_FIELDS = (
+    'title', 'description', 'event_type', 'start_time', 'end_time', 'location',
+    'capacity', 'organizer_id', 'professor_in_charge_id', 'banner',
+)
+
+
+def _add_months(day, months):
+    month = day.month - 1 + months
+    year, month = day.year + month // 12, month % 12 + 1
+    # Months without that day (e.g. the 31st) are skipped
+    if day.day > calendar.monthrange(year, month)[1]:
+        return None
+    return day.replace(year=year, month=month)
+
+
+def session_dates(event, until):
+    """Start dates of the sessions after the first one, up to `until` included"""
+    if not event.recurrence:
+        return
+    if event.recurrence_until:
+        until = min(until, event.recurrence_until)
+    step = {'weekly': 7, 'biweekly': 14}.get(event.recurrence)
+    index = 1
+    while True:
+        if step:
+            day = event.start_date + datetime.timedelta(days=step * index)
+        else:
+            day = _add_months(event.start_date, index)
+            if day is None:
+                index += 1
+                continue
+        if day > until:
+            return
+        yield day
+        index += 1
+
+
+def session_ranges(event, until=None):
+    """(start, end) of every session of a series, computed from the rule"""
+    if until is None:
+        until = timezone.localdate() + datetime.timedelta(days=settings.RECURRENCE_WINDOW_DAYS)
+    length = event.end_date - event.start_date
+    ranges = [event.time_range()]
+    for day in session_dates(event, until):
+        session = Event(
+            start_date=day, end_date=day + length, start_time=event.start_time, end_time=event.end_time
+        )
+        ranges.append(session.time_range())
+    return ranges
+
+
+def materialize_sessions(event, until=None):
+    """
+    Create the sessions of a series up to `until` (default: the rolling
+    window) that do not exist yet, in one bulk insert. Returns how many.
+    """
+    if not event.recurrence or event.parent_id:
+        return 0
+    if until is None:
+        until = timezone.localdate() + datetime.timedelta(days=settings.RECURRENCE_WINDOW_DAYS)
+    done = event.materialized_until or event.start_date
+    length = event.end_date - event.start_date
+
+    sessions = [
+        Event(
+            parent_id=event.pk, start_date=day, end_date=day + length,
+            **{field: getattr(event, field) for field in SHARED_FIELDS},
+        )
+        for day in session_dates(event, until) if day > done
+    ]
+    if not sessions:
+        return 0
+    with transaction.atomic():
+        Event.objects.bulk_create(sessions)
+        last = sessions[-1].start_date
+        Event.objects.filter(pk=event.pk).update(materialized_until=last, updated_at=Now())
+        event.materialized_until = last
+        # bulk_create skips post_save, so invalidate cached pages here
+        transaction.on_commit(caching.bump_version)
+    return len(sessions)
+
+
+def _bump_sessions(sessions):
+    caching.bump_version()
+    for session in sessions:
+        caching.bump_version(session.pk)
+
+
+def update_sessions(event, until=None):
+    """
+    Bring the future sessions of a series in line with its first session
+    after an edit: copy the shared fields, delete the sessions the rule no
+    longer produces (shortened end, other repetition) and create the missing
+    ones up to `until`. Past sessions and sessions with registrations are left
+    as they are. Returns (updated, deleted, created).
+    """
+    if event.parent_id:
+        return 0, 0, 0
+    if until is None:
+        until = timezone.localdate() + datetime.timedelta(days=settings.RECURRENCE_WINDOW_DAYS)
+    today = timezone.localdate()
+    length = event.end_date - event.start_date
+    shared = {field: getattr(event, field) for field in SHARED_FIELDS}
+    rule_dates = list(session_dates(event, until))
+    expected = {day for day in rule_dates if day >= today}
+
+    future = list(
+        Event.objects.filter(parent_id=event.pk, start_date__gte=today).annotate(
+            registered=Exists(Registration.objects.filter(event=OuterRef('pk')))
+        )
+    )
+    existing = {session.start_date for session in future}
+    stale = [session.pk for session in future if session.start_date not in expected and not session.registered]
+    kept = [session for session in future if session.start_date in expected and not session.registered]
+    now = timezone.now()
+    for session in kept:
+        session.end_date = session.start_date + length
+        session.updated_at = now
+        for field, value in shared.items():
+            setattr(session, field, value)
+    missing = [
+        Event(parent_id=event.pk, start_date=day, end_date=day + length, **shared)
+        for day in sorted(expected - existing)
+    ]
+
+    with transaction.atomic():
+        if stale:
+            Event.objects.filter(pk__in=stale).delete()
+        if kept:
+            Event.objects.bulk_update(kept, ['end_date', 'updated_at', *SHARED_FIELDS])
+        if missing:
+            Event.objects.bulk_create(missing)
+        last = rule_dates[-1] if rule_dates else None
+        Event.objects.filter(pk=event.pk).update(materialized_until=last, updated_at=Now())
+        event.materialized_until = last
+        # bulk_update and bulk_create skip post_save, so invalidate cached pages here
+        transaction.on_commit(lambda: _bump_sessions(kept))
+    return len(kept), len(stale), len(missing)
+
+
+def pending_series(until):
+    """Series whose rule still has sessions to create up to `until`"""
+    return Event.objects.filter(parent__isnull=True).exclude(recurrence='').annotate(
+        done=Coalesce('materialized_until', 'start_date')
+    ).filter(done__lt=until).filter(Q(recurrence_until__isnull=True) | Q(recurrence_until__gt=F('done')))
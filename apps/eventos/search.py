@@ -0,0 +1,121 @@
+"""
+Full-text search over events backed by an SQLite FTS5 table.
+
+The `eventos_event_fts` table (rowid = Event.id) indexes title, description,
+location and the professor's name. It is kept in sync by triggers created in
+migration 0007, uses the unicode61 tokenizer with diacritics removed so
+"introducao" matches "Introdução", and keeps prefix indexes so partial words
+typed in the search box still match.
+"""
+
+import re
+
+from django.db import connection
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'eventos_event_fts'
+
+# bm25 weights for (title, description, location, professor)
+RANK_EXPRESSION = f'bm25({FTS_TABLE}, 10.0, 1.0, 2.0, 2.0)'
+
+PROFESSOR_NAME = "COALESCE(NULLIF(TRIM(u.first_name || ' ' || u.last_name), ''), u.username)"
+
+REBUILD_SQL = (
+    f'DELETE FROM {FTS_TABLE}',
+    f"""
+    INSERT INTO {FTS_TABLE}(rowid, title, description, location, professor)
+    SELECT e.id, e.title, e.description, e.location, {PROFESSOR_NAME}
+    FROM eventos_event e
+    JOIN usuarios_usuario u ON u.id = e.professor_in_charge_id
+    """,
+)
+
+_INDEX_EVENT = f"""
+    INSERT INTO {FTS_TABLE}(rowid, title, description, location, professor)
+    SELECT new.id, new.title, new.description, new.location, {PROFESSOR_NAME}
+    FROM usuarios_usuario u WHERE u.id = new.professor_in_charge_id;
+"""
+
+# Same triggers as migration 0007. SQLite drops or breaks them whenever a
+# migration rebuilds eventos_event, so such migrations drop and recreate
+# them around their operations, with their own frozen copy of this SQL.
+TRIGGERS_SQL = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON eventos_event BEGIN
+        {_INDEX_EVENT}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+    AFTER UPDATE OF title, description, location, professor_in_charge_id ON eventos_event BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        {_INDEX_EVENT}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON eventos_event BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_professor_au
+    AFTER UPDATE OF first_name, last_name, username ON usuarios_usuario BEGIN
+        UPDATE {FTS_TABLE}
+        SET professor = COALESCE(NULLIF(TRIM(new.first_name || ' ' || new.last_name), ''), new.username)
+        WHERE rowid IN (SELECT id FROM eventos_event WHERE professor_in_charge_id = new.id);
+    END
+    """,
+)
+
+DROP_TRIGGERS_SQL = tuple(
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}' for suffix in ('ai', 'au', 'ad', 'professor_au')
+)
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def build_match_query(text):
+    """Turn free text into an FTS5 query: every word must match as a prefix"""
+    tokens = _TOKEN_RE.findall(text or '')
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def fts_enabled():
+    return connection.vendor == 'sqlite'
+
+
+def search_events(queryset, text):
+    """
+    Filter an Event queryset by free text, ordered by relevance.
+    The queryset gets a `search_rank` attribute (lower is better).
+    """
+    match = build_match_query(text)
+    if not match:
+        return queryset.none()
+
+    if not fts_enabled():
+        return queryset.filter(
+            Q(title__icontains=text) | Q(description__icontains=text) |
+            Q(location__icontains=text) | Q(professor_in_charge__first_name__icontains=text) |
+            Q(professor_in_charge__last_name__icontains=text)
+        )
+
+    matches = RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+    # bm25() only works inside a MATCH query, so each matched row ranks itself
+    rank = RawSQL(
+        f'SELECT {RANK_EXPRESSION} FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND rowid = eventos_event.id',
+        [match],
+        output_field=FloatField(),
+    )
+    return queryset.filter(pk__in=matches).annotate(search_rank=rank).order_by(
+        'search_rank', *queryset.query.order_by
+    )
+
+
+def rebuild_index():
+    """Reinstall the sync triggers and repopulate the FTS table"""
+    with connection.cursor() as cursor:
+        for sql in DROP_TRIGGERS_SQL + TRIGGERS_SQL + REBUILD_SQL:
+            cursor.execute(sql)
+
@@ -1,5 +1,8 @@
+import io
+
 from rest_framework import serializers
 from .models import Event, Registration
+from .services import enroll, read_identifier_csv, EnrollmentOutcome, ENROLLMENT_MESSAGES
 from apps.usuarios.serializers import UserSerializer
 
 class EventSerializer(serializers.ModelSerializer):
@@ -9,7 +12,7 @@ class EventSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Event
-        fields = ['id','title','description','event_type','start_date','end_date','start_time','end_time','location','capacity','vacancies_left','organizer','professor_in_charge','banner']
+        fields = ['id','title','description','event_type','start_date','end_date','start_time','end_time','recurrence','recurrence_until','parent','location','capacity','vacancies_left','organizer','professor_in_charge','banner']
 
     def get_vacancies_left(self, obj):
         return obj.vacancies_left()
@@ -36,16 +39,47 @@ class RegistrationSerializer(serializers.ModelSerializer):
 
     def validate(self, attrs):
         user = self.context['request'].user
-        event = attrs.get('event')
-        if event.registrations.filter(user=user).exists():
-            raise serializers.ValidationError('Usuário já inscrito neste evento.')
-        if event.registrations.count() >= event.capacity:
-            raise serializers.ValidationError('Capacidade do evento atingida.')
         if user.role == 'organizador':
             raise serializers.ValidationError('Organizadores não podem se inscrever.')
         return attrs
 
     def create(self, validated_data):
         user = self.context['request'].user
-        reg = Registration.objects.create(user=user, **validated_data)
+        outcome, reg = enroll(user, validated_data['event'])
+        if outcome != EnrollmentOutcome.ENROLLED:
+            raise serializers.ValidationError(ENROLLMENT_MESSAGES[outcome])
         return reg
+
+class BatchRegistrationSerializer(serializers.Serializer):
+    event = serializers.PrimaryKeyRelatedField(queryset=Event.objects.all())
+    users = serializers.ListField(
+        child=serializers.CharField(max_length=254),
+        allow_empty=False,
+        max_length=500,
+        help_text='IDs ou e-mails dos usuários a inscrever',
+    )
+
+    def validate_users(self, value):
+        return [item.strip() for item in value if item.strip()]
+
+class AttendanceSerializer(serializers.Serializer):
+    users = serializers.ListField(
+        child=serializers.CharField(max_length=254),
+        required=False,
+        max_length=5000,
+        help_text='IDs, e-mails ou usernames dos presentes',
+    )
+    file = serializers.FileField(required=False, help_text='CSV com um identificador por linha')
+
+    def validate(self, attrs):
+        identifiers = list(attrs.get('users') or [])
+        upload = attrs.get('file')
+        if upload is not None:
+            try:
+                identifiers += read_identifier_csv(io.TextIOWrapper(upload, encoding='utf-8-sig'))
+            except UnicodeDecodeError:
+                raise serializers.ValidationError({'file': 'O arquivo deve estar em UTF-8.'})
+        if not identifiers:
+            raise serializers.ValidationError('Informe a lista de usuários ou um arquivo CSV.')
+        attrs['identifiers'] = identifiers
+        return attrs
@@ -0,0 +1,434 @@
+"""
+Enrollment service shared by the web views, forms and API serializers.
+
+A seat is claimed with a single conditional UPDATE on Event.registrations_count
+inside the same transaction that inserts the Registration, so concurrent
+requests can never take more seats than the event capacity.
+
+Users that find an event full can be queued in its waitlist; cancelling a
+registration hands the freed seat to the head of the queue in the same
+transaction.
+
+A user can hold a seat for SEAT_HOLD_SECONDS before confirming. Holds are
+counted in Event.held_count, so vacancies and seat claims account for them;
+deleting a hold (released, taken, expired or cascaded) gives its seat back
+through a post_delete signal. Enrolling consumes the user's hold row inside
+the enrollment transaction. Expired holds are reclaimed lazily, with an
+indexed delete on one event when a seat claim on it fails or its page is
+shown, and in bulk by sync_registration_counts. Every path that frees a
+seat (cancellation, release, expiry) hands it to the waitlist first.
+
+Enrolling also checks the user's other registrations for schedule overlaps,
+warning or blocking according to ENROLLMENT_SCHEDULE_CONFLICTS.
+
+Presence is confirmed in bulk from a list of user identifiers: one query
+resolves them against the event registrations and one UPDATE per chunk flips
+presence_confirmed.
+"""
+
+import csv
+import datetime
+import heapq
+from enum import Enum
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Max, Q
+from django.db.models.functions import Lower, Now
+from django.utils import timezone
+
+from apps.usuarios.models import Usuario
+from . import caching, recurrence
+from .models import Event, Registration, SeatHold, WaitlistEntry
+
+
+class EnrollmentOutcome(Enum):
+    ENROLLED = 'enrolled'
+    WAITLISTED = 'waitlisted'
+    FULL = 'full'
+    DUPLICATE = 'duplicate'
+    FORBIDDEN = 'forbidden'
+    NOT_FOUND = 'not_found'
+    CONFLICT = 'conflict'
+    HELD = 'held'
+
+
+class AttendanceOutcome(Enum):
+    CONFIRMED = 'confirmed'
+    ALREADY_CONFIRMED = 'already_confirmed'
+    NOT_REGISTERED = 'not_registered'
+
+
+ENROLLMENT_MESSAGES = {
+    EnrollmentOutcome.ENROLLED: 'Inscrição realizada com sucesso.',
+    EnrollmentOutcome.WAITLISTED: 'Evento lotado. Você entrou na lista de espera.',
+    EnrollmentOutcome.FULL: 'Este evento atingiu a capacidade máxima.',
+    EnrollmentOutcome.DUPLICATE: 'Você já está inscrito neste evento.',
+    EnrollmentOutcome.FORBIDDEN: 'Organizadores não podem se inscrever em eventos.',
+    EnrollmentOutcome.NOT_FOUND: 'Usuário não encontrado.',
+    EnrollmentOutcome.CONFLICT: 'Você já está inscrito em um evento no mesmo horário.',
+    EnrollmentOutcome.HELD: 'Vaga reservada. Confirme sua inscrição antes que a reserva expire.',
+}
+
+
+def claim_seats(event_id, seats=1):
+    """Atomically reserve seats on an event, returns False if it would overbook"""
+    return Event.objects.filter(
+        pk=event_id,
+        registrations_count__lte=F('capacity') - F('held_count') - seats,
+    ).update(registrations_count=F('registrations_count') + seats, updated_at=Now()) == 1
+
+
+def release_seats(event_id, seats=1):
+    """Give back seats claimed with claim_seats"""
+    Event.objects.filter(pk=event_id, registrations_count__gte=seats).update(
+        registrations_count=F('registrations_count') - seats, updated_at=Now()
+    )
+
+
+def reclaim_expired_holds(event_id):
+    """Free the seats of the expired holds of one event for the waitlist, returns how many"""
+    with transaction.atomic():
+        # post_delete gives each hold's seat back, see apps.eventos.signals
+        reclaimed = SeatHold.objects.filter(event_id=event_id, expires_at__lte=timezone.now()).delete()[0]
+        if reclaimed:
+            promote_waitlist(event_id)
+    return reclaimed
+
+
+def _claim_hold(event_id):
+    return Event.objects.filter(
+        pk=event_id,
+        registrations_count__lte=F('capacity') - F('held_count') - 1,
+    ).update(held_count=F('held_count') + 1, updated_at=Now()) == 1
+
+
+def hold_seat(user, event):
+    """
+    Reserve a seat for the user for SEAT_HOLD_SECONDS, or extend their hold.
+    Returns a tuple (EnrollmentOutcome, SeatHold or None).
+    """
+    if user.role == Usuario.ROLE_ORGANIZADOR:
+        return EnrollmentOutcome.FORBIDDEN, None
+    if event.parent_id:
+        event = event.parent
+    if Registration.objects.filter(user=user, event=event).exists():
+        return EnrollmentOutcome.DUPLICATE, None
+
+    expires_at = timezone.now() + datetime.timedelta(seconds=settings.SEAT_HOLD_SECONDS)
+    try:
+        with transaction.atomic():
+            # An existing hold, even expired, still has its seat counted
+            if not SeatHold.objects.filter(user=user, event=event).update(expires_at=expires_at):
+                if not _claim_hold(event.pk) and not (reclaim_expired_holds(event.pk) and _claim_hold(event.pk)):
+                    return EnrollmentOutcome.FULL, None
+                SeatHold.objects.create(user=user, event=event, expires_at=expires_at)
+                transaction.on_commit(lambda: caching.bump_version(event.pk))
+    except IntegrityError:
+        # A concurrent request of the same user created it first
+        return EnrollmentOutcome.HELD, SeatHold.objects.get(user=user, event=event)
+
+    return EnrollmentOutcome.HELD, SeatHold(user=user, event=event, expires_at=expires_at)
+
+
+def release_hold(user, event):
+    """Give up a hold and hand its seat to the waitlist, returns False if there was none"""
+    event_id = event.series_id
+    with transaction.atomic():
+        if not SeatHold.objects.filter(user=user, event_id=event_id).delete()[0]:
+            return False
+        promote_next(event_id)
+    return True
+
+
+def _take_hold(user, event):
+    """Move the user's held seat to the registrations count, False if they hold none"""
+    # Even an expired hold still has its seat counted until it is reclaimed
+    hold = SeatHold.objects.select_for_update().filter(user=user, event=event).first()
+    if hold is None:
+        return False
+    hold.delete()
+    # Deleting the hold gave its seat back in this transaction; claim it
+    return claim_seats(event.pk)
+
+
+def _register(user, event):
+    """Take a seat (held or free) and insert the registration atomically; None if there is none"""
+    with transaction.atomic():
+        if _take_hold(user, event) or claim_seats(event.pk):
+            return Registration.objects.create(user=user, event=event)
+    return None
+
+
+def schedule_conflicts(user, event):
+    """
+    The user's registered events overlapping this one (every session of a
+    series), in one query: the date range narrows the candidates and the
+    times are compared in Python. Returns one event per conflicting series.
+    """
+    ranges = recurrence.session_ranges(event) if event.recurrence else [event.time_range()]
+    series_ids = Registration.objects.filter(user=user).values('event_id')
+    candidates = Event.objects.filter(
+        Q(pk__in=series_ids) | Q(parent_id__in=series_ids),
+        start_date__lte=ranges[-1][1].date(),
+        end_date__gte=ranges[0][0].date(),
+    ).exclude(pk=event.pk).exclude(parent_id=event.pk).only(
+        'id', 'parent_id', 'title', 'start_date', 'end_date', 'start_time', 'end_time'
+    )
+    conflicts = {}
+    for other in candidates:
+        other_start, other_end = other.time_range()
+        if other.series_id not in conflicts and any(start < other_end and other_start < end for start, end in ranges):
+            conflicts[other.series_id] = other
+    return list(conflicts.values())
+
+
+def find_overlaps(events):
+    """
+    Map each event id to the other events it overlaps with. Sweeps the
+    intervals in start order keeping a heap of the ones still running, so it
+    costs O(n log n) plus the number of overlaps.
+    """
+    overlaps = {}
+    running = []  # (end, id, event)
+    for (start, end), event in sorted(((e.time_range(), e) for e in events), key=lambda item: item[0][0]):
+        while running and running[0][0] <= start:
+            heapq.heappop(running)
+        for _, _, other in running:
+            overlaps.setdefault(event.pk, []).append(other)
+            overlaps.setdefault(other.pk, []).append(event)
+        heapq.heappush(running, (end, event.pk, event))
+    return overlaps
+
+
+def enroll(user, event, waitlist=False, conflicts=None):
+    """
+    Enroll a user in an event, optionally queueing them when it is full.
+    `conflicts` is 'warn', 'block' or 'off' (default: the
+    ENROLLMENT_SCHEDULE_CONFLICTS setting); with 'warn' the overlapping events
+    are set on registration.schedule_conflicts.
+    Returns a tuple (EnrollmentOutcome, Registration or WaitlistEntry or None).
+    """
+    if user.role == Usuario.ROLE_ORGANIZADOR:
+        return EnrollmentOutcome.FORBIDDEN, None
+    if event.parent_id:
+        # One registration covers every session of a series
+        event = event.parent
+
+    policy = conflicts or settings.ENROLLMENT_SCHEDULE_CONFLICTS
+    overlapping = schedule_conflicts(user, event) if policy != 'off' else []
+    if overlapping and policy == 'block':
+        return EnrollmentOutcome.CONFLICT, None
+
+    try:
+        registration = _register(user, event)
+        if registration is None:
+            # Only the failure path pays for telling "full" and "already enrolled" apart
+            if Registration.objects.filter(user=user, event=event).exists():
+                return EnrollmentOutcome.DUPLICATE, None
+            # Expired holds blocking free seats; the waitlist is served first
+            if reclaim_expired_holds(event.pk):
+                registration = _register(user, event)
+    except IntegrityError:
+        # unique (user, event) violated; the seat claim was rolled back with it
+        return EnrollmentOutcome.DUPLICATE, None
+
+    if registration is not None:
+        registration.schedule_conflicts = overlapping
+        return EnrollmentOutcome.ENROLLED, registration
+    if waitlist:
+        return join_waitlist(user, event)
+    return EnrollmentOutcome.FULL, None
+
+
+def _split_identifiers(identifiers):
+    """Separate numeric ids from lowercased e-mails/usernames"""
+    ids, names = set(), set()
+    for value in identifiers:
+        value = str(value).strip()
+        if value.isdigit():
+            ids.add(int(value))
+        elif value:
+            names.add(value.lower())
+    return ids, names
+
+
+def enroll_many(event, identifiers):
+    """
+    Enroll a list of users (ids or e-mails) in one pass: one lookup query, one
+    set-difference query against existing registrations, a single seat claim
+    and one bulk insert. Seats go to users in the order they were given.
+    Returns (list of (identifier, EnrollmentOutcome), number enrolled).
+    """
+    ids, emails = _split_identifiers(identifiers)
+    users = Usuario.objects.annotate(email_lower=Lower('email')).filter(
+        Q(pk__in=ids) | Q(email_lower__in=emails)
+    ).only('id', 'email', 'role')
+    by_identifier = {}
+    for user in users:
+        by_identifier[str(user.pk)] = user
+        by_identifier[user.email.lower()] = user
+
+    # Lapsed holds must not count as taken seats below
+    reclaim_expired_holds(event.series_id)
+    try:
+        with transaction.atomic():
+            # Lock the event row so capacity is read and claimed in one step
+            event = Event.objects.select_for_update().get(pk=event.series_id)
+            candidate_ids = [user.pk for user in by_identifier.values()]
+            enrolled_ids = set(
+                Registration.objects.filter(event=event, user_id__in=candidate_ids).values_list('user_id', flat=True)
+            )
+            available = max(0, event.capacity - event.registrations_count - event.held_count)
+
+            results, new_users = [], []
+            for identifier in identifiers:
+                user = by_identifier.get(str(identifier).strip().lower())
+                if user is None:
+                    outcome = EnrollmentOutcome.NOT_FOUND
+                elif user.role == Usuario.ROLE_ORGANIZADOR:
+                    outcome = EnrollmentOutcome.FORBIDDEN
+                elif user.pk in enrolled_ids:
+                    outcome = EnrollmentOutcome.DUPLICATE
+                elif len(new_users) >= available:
+                    outcome = EnrollmentOutcome.FULL
+                else:
+                    outcome = EnrollmentOutcome.ENROLLED
+                    new_users.append(user)
+                    # Repeated identifiers in the same batch count once
+                    enrolled_ids.add(user.pk)
+                results.append((identifier, outcome))
+
+            if new_users:
+                if not claim_seats(event.pk, len(new_users)):
+                    raise IntegrityError('Capacidade do evento alterada durante a inscrição em lote.')
+                # bulk_create skips post_save, so invalidate cached pages here
+                Registration.objects.bulk_create([Registration(user=user, event=event) for user in new_users])
+                transaction.on_commit(lambda: caching.bump_version(event.pk))
+    except IntegrityError:
+        # Seats or registrations changed under the batch and nothing was
+        # written: users enrolled meanwhile are duplicates, the rest found it full
+        registered = set(
+            Registration.objects.filter(
+                event_id=event.pk, user_id__in=[user.pk for user in new_users]
+            ).values_list('user_id', flat=True)
+        )
+        for index, (identifier, outcome) in enumerate(results):
+            if outcome == EnrollmentOutcome.ENROLLED:
+                user = by_identifier[str(identifier).strip().lower()]
+                outcome = EnrollmentOutcome.DUPLICATE if user.pk in registered else EnrollmentOutcome.FULL
+                results[index] = (identifier, outcome)
+        return results, 0
+
+    return results, len(new_users)
+
+
+def read_identifier_csv(handle):
+    """
+    Read user identifiers from the first column of a CSV file, skipping blank
+    lines and a user/id/email/username header row.
+    """
+    identifiers = []
+    for number, row in enumerate(csv.reader(handle), start=1):
+        if not row or not row[0].strip():
+            continue
+        value = row[0].strip()
+        if number == 1 and value.lower() in ('user', 'id', 'email', 'username'):
+            continue
+        identifiers.append(value)
+    return identifiers
+
+
+def confirm_attendance(event, identifiers, chunk_size=500, dry_run=False):
+    """
+    Confirm presence for the registrations matching the given user ids,
+    e-mails or usernames. Returns (list of (identifier, AttendanceOutcome),
+    number of registrations confirmed).
+    """
+    ids, names = _split_identifiers(identifiers)
+    rows = Registration.objects.filter(event_id=event.series_id).annotate(
+        email_lower=Lower('user__email'),
+        username_lower=Lower('user__username'),
+    ).filter(
+        Q(user_id__in=ids) | Q(email_lower__in=names) | Q(username_lower__in=names)
+    ).order_by().values_list('id', 'presence_confirmed', 'user_id', 'email_lower', 'username_lower')
+
+    by_identifier = {}
+    for registration_id, confirmed, user_id, email, username in rows:
+        for key in (str(user_id), email, username):
+            if key:
+                by_identifier[key] = (registration_id, confirmed)
+
+    results, to_confirm = [], []
+    seen = set()
+    for identifier in identifiers:
+        match = by_identifier.get(str(identifier).strip().lower())
+        if match is None:
+            outcome = AttendanceOutcome.NOT_REGISTERED
+        elif match[1] or match[0] in seen:
+            outcome = AttendanceOutcome.ALREADY_CONFIRMED
+        else:
+            outcome = AttendanceOutcome.CONFIRMED
+            seen.add(match[0])
+            to_confirm.append(match[0])
+        results.append((identifier, outcome))
+
+    if not dry_run:
+        with transaction.atomic():
+            for start in range(0, len(to_confirm), chunk_size):
+                Registration.objects.filter(
+                    id__in=to_confirm[start:start + chunk_size]
+                ).update(presence_confirmed=True)
+
+    return results, len(to_confirm)
+
+
+def join_waitlist(user, event):
+    """Append a user to the end of the event waitlist"""
+    try:
+        with transaction.atomic():
+            # Lock the event row so concurrent joins take positions one at a time
+            Event.objects.select_for_update().filter(pk=event.series_id).values_list('pk').first()
+            last = WaitlistEntry.objects.filter(event=event).aggregate(last=Max('position'))['last']
+            entry = WaitlistEntry.objects.create(user=user, event=event, position=(last or 0) + 1)
+    except IntegrityError:
+        # Already waiting; hand back the existing entry
+        entry = WaitlistEntry.objects.filter(user=user, event=event).first()
+        if entry is None:
+            raise
+    return EnrollmentOutcome.WAITLISTED, entry
+
+
+def cancel_enrollment(registration):
+    """
+    Delete a registration and give its seat to the head of the waitlist.
+    Returns the promoted Registration, or None if nobody was waiting.
+    """
+    with transaction.atomic():
+        registration.delete()
+        return promote_next(registration.event_id)
+
+
+def promote_next(event_id):
+    """Move the first waitlisted user into a free seat, if any"""
+    with transaction.atomic():
+        while True:
+            # Head of the queue through the (event, position) index
+            entry = WaitlistEntry.objects.filter(event_id=event_id).order_by('position').first()
+            if entry is None or not claim_seats(event_id):
+                return None
+            entry.delete()
+            try:
+                with transaction.atomic():
+                    return Registration.objects.create(user_id=entry.user_id, event_id=event_id)
+            except IntegrityError:
+                # Enrolled by other means meanwhile; release the seat and try the next in line
+                release_seats(event_id)
+
+
+def promote_waitlist(event_id):
+    """Fill every free seat from the waitlist, e.g. after a capacity increase"""
+    promoted = []
+    while (registration := promote_next(event_id)) is not None:
+        promoted.append(registration)
+    return promoted
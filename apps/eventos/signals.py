@@ -0,0 +1,49 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Now
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . import caching
+from .models import Event, Registration, SeatHold
+
+
+# Seats are counted when claimed by apps.eventos.services.enroll; only
+# deletions (cancel, cascades, admin) need to be tracked here.
+@receiver(post_delete, sender=Registration)
+def decrement_registrations_count(sender, instance, origin=None, **kwargs):
+    """Release the seat of a deleted registration"""
+    # The event itself is being deleted, no point in updating it
+    if isinstance(origin, Event) or getattr(origin, 'model', None) is Event:
+        return
+    Event.objects.filter(pk=instance.event_id, registrations_count__gt=0).update(
+        registrations_count=F('registrations_count') - 1, updated_at=Now()
+    )
+
+
+@receiver(post_delete, sender=SeatHold)
+def decrement_held_count(sender, instance, origin=None, **kwargs):
+    """Give back the seat of a deleted hold (released, taken, expired or cascaded)"""
+    if isinstance(origin, Event) or getattr(origin, 'model', None) is Event:
+        return
+    event_id = instance.event_id
+    Event.objects.filter(pk=event_id, held_count__gt=0).update(held_count=F('held_count') - 1, updated_at=Now())
+    transaction.on_commit(lambda: caching.bump_version(event_id))
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def invalidate_event_cache(sender, instance, **kwargs):
+    """Drop cached listings and the event detail"""
+    # After commit, so no request can re-cache the old rows in between.
+    # The pk is read now: deleted instances lose it before the commit.
+    event_id = instance.pk
+    transaction.on_commit(lambda: caching.bump_version(event_id))
+
+
+@receiver(post_save, sender=Registration)
+@receiver(post_delete, sender=Registration)
+def invalidate_registration_cache(sender, instance, **kwargs):
+    """Vacancies and the participant list changed"""
+    event_id = instance.event_id
+    transaction.on_commit(lambda: caching.bump_version(event_id))
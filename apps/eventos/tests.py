@@ -1,9 +1,27 @@
-from django.test import TestCase
+from django.db import DatabaseError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
 from django.core.exceptions import ValidationError
+from django.core.cache import cache
+from django.core.management import call_command
 from django.utils import timezone
-from .models import Event
+from .models import Event, Registration, SeatHold
+from . import live
+from .live import VacancyBroker
+from .search import search_events
+from .services import (
+    enroll, enroll_many, cancel_enrollment, confirm_attendance, schedule_conflicts, hold_seat, release_hold,
+    EnrollmentOutcome, AttendanceOutcome,
+)
 from apps.usuarios.models import Usuario
+from asgiref.sync import sync_to_async
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from unittest import mock
+import json
+import os
+import tempfile
 import datetime
+import threading
 
 class EventValidationTests(TestCase):
     def setUp(self):
@@ -60,3 +78,1209 @@ class EventValidationTests(TestCase):
         event.full_clean() # Should not raise
 
 
+class RegistrationsCountTests(TestCase):
+    def setUp(self):
+        self.professor = Usuario.objects.create_user(
+            username='prof', email='prof@example.com', password='password123',
+            role='professor', institution='Test University'
+        )
+        self.student = Usuario.objects.create_user(
+            username='aluno', email='aluno@example.com', password='password123',
+            role='aluno', institution='Test University'
+        )
+        future_date = timezone.localdate() + datetime.timedelta(days=10)
+        self.event = Event.objects.create(
+            title="Counted Event",
+            event_type="palestra",
+            start_date=future_date,
+            end_date=future_date,
+            location="Room 101",
+            capacity=2,
+            organizer=self.professor,
+            professor_in_charge=self.professor
+        )
+
+    def test_counter_follows_registrations(self):
+        """Test that creating and deleting registrations keeps the counter in sync"""
+        outcome, registration = enroll(self.student, self.event)
+        self.assertEqual(outcome, EnrollmentOutcome.ENROLLED)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.registrations_count, 1)
+        self.assertEqual(self.event.vacancies_left(), 1)
+
+        registration.delete()
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.registrations_count, 0)
+
+    def test_vacancies_left_does_not_query(self):
+        """Test that vacancies_left is computed from the stored counter"""
+        with self.assertNumQueries(0):
+            self.assertEqual(self.event.vacancies_left(), 2)
+
+    def test_sync_command_repairs_counter(self):
+        """Test that sync_registration_counts fixes a drifted counter"""
+        enroll(self.student, self.event)
+        Event.objects.filter(pk=self.event.pk).update(registrations_count=5)
+
+        call_command('sync_registration_counts', stdout=StringIO())
+
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.registrations_count, 1)
+
+
+class EnrollmentServiceTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.professor = Usuario.objects.create_user(
+            username='prof', email='prof@example.com', password='password123',
+            role='professor', institution='Test University'
+        )
+        self.organizer = Usuario.objects.create_user(
+            username='org', email='org@example.com', password='password123',
+            role='organizador'
+        )
+        self.students = [
+            Usuario.objects.create_user(
+                username=f'aluno{i}', email=f'aluno{i}@example.com', password='password123',
+                role='aluno', institution='Test University'
+            )
+            for i in range(2)
+        ]
+        future_date = timezone.localdate() + datetime.timedelta(days=10)
+        self.event = Event.objects.create(
+            title="Small Workshop",
+            event_type="workshop",
+            start_date=future_date,
+            end_date=future_date,
+            location="Lab 1",
+            capacity=1,
+            organizer=self.organizer,
+            professor_in_charge=self.professor
+        )
+
+    def test_outcomes(self):
+        """Test enrolled, duplicate, full and forbidden outcomes"""
+        self.assertEqual(enroll(self.students[0], self.event)[0], EnrollmentOutcome.ENROLLED)
+        self.assertEqual(enroll(self.students[0], self.event)[0], EnrollmentOutcome.DUPLICATE)
+        self.assertEqual(enroll(self.students[1], self.event)[0], EnrollmentOutcome.FULL)
+        self.assertEqual(enroll(self.organizer, self.event)[0], EnrollmentOutcome.FORBIDDEN)
+
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.registrations_count, 1)
+        self.assertEqual(self.event.registrations.count(), 1)
+
+    def test_api_waitlists_on_full_event(self):
+        """Test that the API entry point queues users when the event is full"""
+        enroll(self.students[0], self.event)
+        self.client.force_login(self.students[1])
+
+        response = self.client.post('/api/events/register/', {'event': self.event.pk})
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['waitlist_position'], 1)
+        self.assertEqual(self.event.registrations.count(), 1)
+
+    def test_cancel_promotes_waitlist_head(self):
+        """Test that a cancelled seat goes to the first user in the waitlist"""
+        third = Usuario.objects.create_user(
+            username='aluno2', email='aluno2@example.com', password='password123',
+            role='aluno', institution='Test University'
+        )
+        outcome, registration = enroll(self.students[0], self.event)
+        self.assertEqual(enroll(self.students[1], self.event, waitlist=True)[0], EnrollmentOutcome.WAITLISTED)
+        outcome, entry = enroll(third, self.event, waitlist=True)
+        self.assertEqual(entry.rank(), 2)
+
+        promoted = cancel_enrollment(registration)
+
+        self.assertEqual(promoted.user, self.students[1])
+        self.assertEqual(entry.rank(), 1)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.registrations_count, 1)
+        self.assertEqual(list(self.event.registrations.values_list('user', flat=True)), [self.students[1].pk])
+
+    def test_api_capacity_increase_promotes_waitlist(self):
+        """Test raising the capacity through the API enrolls the waitlisted users"""
+        enroll(self.students[0], self.event)
+        enroll(self.students[1], self.event, waitlist=True)
+        self.client.force_login(self.organizer)
+
+        response = self.client.patch(
+            f'/api/events/{self.event.pk}/', {'capacity': 2}, content_type='application/json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.event.registrations.count(), 2)
+        self.assertFalse(self.event.waitlist.exists())
+
+
+class EnrollmentContentionTests(TransactionTestCase):
+    WORKERS = 8
+    STUDENTS = 40
+    CAPACITY = 10
+
+    def setUp(self):
+        professor = Usuario.objects.create_user(
+            username='prof', email='prof@example.com', password='password123',
+            role='professor', institution='Test University'
+        )
+        self.students = Usuario.objects.bulk_create([
+            Usuario(username=f'aluno{i}', email=f'aluno{i}@example.com', role='aluno', institution='Test University')
+            for i in range(self.STUDENTS)
+        ])
+        future_date = timezone.localdate() + datetime.timedelta(days=10)
+        self.event = Event.objects.create(
+            title="Flash Crowd",
+            event_type="palestra",
+            start_date=future_date,
+            end_date=future_date,
+            location="Auditório",
+            capacity=self.CAPACITY,
+            organizer=professor,
+            professor_in_charge=professor
+        )
+
+    def test_capacity_is_never_exceeded(self):
+        """Test that concurrent enrollments never overbook the event"""
+        start = threading.Barrier(self.WORKERS)
+
+        def worker(students):
+            start.wait()
+            try:
+                return [enroll(student, self.event)[0] for student in students]
+            finally:
+                connection.close()
+
+        chunks = [self.students[i::self.WORKERS] for i in range(self.WORKERS)]
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as executor:
+            outcomes = [o for result in executor.map(worker, chunks) for o in result]
+
+        self.event.refresh_from_db()
+        self.assertEqual(outcomes.count(EnrollmentOutcome.ENROLLED), self.CAPACITY)
+        self.assertEqual(outcomes.count(EnrollmentOutcome.FULL), self.STUDENTS - self.CAPACITY)
+        self.assertEqual(self.event.registrations.count(), self.CAPACITY)
+        self.assertEqual(self.event.registrations_count, self.CAPACITY)
+
+
+class EventSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.professor = Usuario.objects.create_user(
+            username='prof', email='prof@example.com', password='password123',
+            role='professor', institution='Test University',
+            first_name='Mariana', last_name='Araújo'
+        )
+        future_date = timezone.localdate() + datetime.timedelta(days=10)
+        defaults = dict(
+            event_type='palestra', start_date=future_date, end_date=future_date,
+            capacity=10, organizer=self.professor, professor_in_charge=self.professor
+        )
+        self.intro = Event.objects.create(title='Introdução à Programação', location='Auditório', **defaults)
+        self.other = Event.objects.create(
+            title='Banco de Dados', description='Modelagem e introdução a SQL', location='Lab 2', **defaults
+        )
+
+    def search(self, text):
+        return list(search_events(Event.objects.order_by('start_date'), text))
+
+    def test_accent_insensitive_prefix_search(self):
+        """Test that searches ignore accents and match word prefixes"""
+        self.assertEqual(self.search('programacao'), [self.intro])
+        self.assertEqual(self.search('auditor'), [self.intro])
+
+    def test_title_matches_rank_first(self):
+        """Test that title matches outrank description matches"""
+        self.assertEqual(self.search('introducao'), [self.intro, self.other])
+
+    def test_index_follows_updates(self):
+        """Test that triggers keep the index in sync with events and professors"""
+        self.other.title = 'Redes de Computadores'
+        self.other.save()
+        self.assertEqual(self.search('redes'), [self.other])
+
+        self.professor.last_name = 'Souza'
+        self.professor.save()
+        self.assertEqual(len(self.search('souza')), 2)
+
+        self.intro.delete()
+        self.assertEqual(self.search('programacao'), [])
+
+    def test_web_and_api_use_search(self):
+        """Test the ?q= parameter on the web list and API"""
+        response = self.client.get('/eventos/', {'q': 'programação'})
+        self.assertEqual(list(response.context['events']), [self.intro])
+
+        self.client.force_login(self.professor)
+        response = self.client.get('/api/events/', {'q': 'dados'})
+        self.assertEqual([e['id'] for e in response.json()['results']], [self.other.pk])
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.professor = Usuario.objects.create_user(
+            username='prof', email='prof@example.com', password='password123',
+            role='professor', institution='Test University'
+        )
+        today = timezone.localdate()
+        # Several events per day so ties on start_date are broken by id
+        Event.objects.bulk_create([
+            Event(
+                title=f'Evento {i}', event_type='palestra',
+                start_date=today + datetime.timedelta(days=i // 3),
+                end_date=today + datetime.timedelta(days=i // 3),
+                location='Sala', capacity=10,
+                organizer=self.professor, professor_in_charge=self.professor
+            )
+            for i in range(30)
+        ])
+        self.expected = list(Event.objects.order_by('start_date', 'id').values_list('id', flat=True))
+
+    def test_api_walks_all_pages_forward_and_back(self):
+        """Test that next/previous cursors visit every event exactly once"""
+        self.client.force_login(self.professor)
+        seen, pages = [], []
+        url = '/api/events/'
+        while url:
+            data = self.client.get(url).json()
+            pages.append(data)
+            seen.extend(event['id'] for event in data['results'])
+            url = data['next']
+        self.assertEqual(seen, self.expected)
+        self.assertIsNone(pages[0]['previous'])
+
+        back = self.client.get(pages[-1]['previous']).json()
+        self.assertEqual(back['results'], pages[-2]['results'])
+
+    def test_web_list_uses_cursor_links(self):
+        """Test that the web list exposes a cursor for the next page"""
+        response = self.client.get('/eventos/', {'type': 'palestra'})
+        self.assertEqual([e.id for e in response.context['events']], self.expected[:12])
+        self.assertIn('type=palestra', response.context['next_page_query'])
+
+        response = self.client.get(f"/eventos/?{response.context['next_page_query']}")
+        self.assertEqual([e.id for e in response.context['events']], self.expected[12:24])
+
+    def test_invalid_cursor_is_not_found(self):
+        """Test that a garbage cursor answers 404"""
+        self.assertEqual(self.client.get('/eventos/', {'cursor': 'nope'}).status_code, 404)
+
+
+class EventCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.professor = Usuario.objects.create_user(
+            username='prof', email='prof@example.com', password='password123',
+            role='professor', institution='Test University'
+        )
+        self.student = Usuario.objects.create_user(
+            username='aluno', email='aluno@example.com', password='password123',
+            role='aluno', institution='Test University'
+        )
+        future_date = timezone.localdate() + datetime.timedelta(days=10)
+        self.event = Event.objects.create(
+            title='Cached Event', event_type='palestra', start_date=future_date, end_date=future_date,
+            location='Sala', capacity=5, organizer=self.professor, professor_in_charge=self.professor
+        )
+
+    def test_list_and_detail_served_from_cache(self):
+        """Test that repeated anonymous reads do not query the database"""
+        self.client.get('/eventos/')
+        self.client.get(f'/eventos/{self.event.pk}/')
+
+        with self.assertNumQueries(0):
+            self.client.get('/eventos/')
+            self.client.get(f'/eventos/{self.event.pk}/')
+
+    def test_enrollment_invalidates_cache(self):
+        """Test that a new registration bumps the cached vacancies"""
+        response = self.client.get('/eventos/')
+        self.assertEqual(response.context['events'][0].vacancies_left(), 5)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            enroll(self.student, self.event)
+
+        response = self.client.get('/eventos/')
+        self.assertEqual(response.context['events'][0].vacancies_left(), 4)
+        response = self.client.get(f'/eventos/{self.event.pk}/')
+        self.assertEqual(response.context['event'].vacancies_left(), 4)
+
+    def test_facet_counts(self):
+        """Test facet counts follow the search box but not the other filters"""
+        today = timezone.localdate()
+        Event.objects.create(
+            title='Oficina de Python', event_type='workshop', start_date=today, end_date=today,
+            location='Lab', capacity=5, organizer=self.professor, professor_in_charge=self.professor
+        )
+        past = today - datetime.timedelta(days=30)
+        Event.objects.create(
+            title='Oficina Encerrada', event_type='workshop', start_date=past, end_date=past,
+            location='Lab', capacity=1, registrations_count=1,
+            organizer=self.professor, professor_in_charge=self.professor
+        )
+
+        response = self.client.get('/eventos/', {'type': 'workshop', 'vacancies': '1'})
+        facets = response.context['facets']
+        self.assertEqual(facets['types'], {'palestra': 1, 'workshop': 2})
+        self.assertEqual((facets['upcoming'], facets['past'], facets['with_vacancies']), (2, 1, 2))
+        self.assertEqual([event.title for event in response.context['events']], ['Oficina de Python'])
+        self.assertIn(('workshop', 'Workshop', 2), response.context['event_types'])
+
+        response = self.client.get('/eventos/', {'q': 'oficina'})
+        self.assertEqual(response.context['facets']['types'], {'workshop': 2})
+        with self.assertNumQueries(0):
+            response = self.client.get('/eventos/', {'q': 'oficina'})
+        self.assertEqual(response.context['facets']['past'], 1)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.professor = Usuario.objects.create_user(
+            username='prof', email='prof@example.com', password='password123',
+            role='professor', institution='Test University'
+        )
+        self.student = Usuario.objects.create_user(
+            username='aluno', email='aluno@example.com', password='password123',
+            role='aluno', institution='Test University'
+        )
+        future_date = timezone.localdate() + datetime.timedelta(days=10)
+        self.event = Event.objects.create(
+            title='Polled Event', event_type='palestra', start_date=future_date, end_date=future_date,
+            location='Sala', capacity=5, organizer=self.professor, professor_in_charge=self.professor
+        )
+        self.client.force_login(self.student)
+
+    def test_list_answers_not_modified(self):
+        """Test that a matching ETag on the list costs a 304 and one query"""
+        etag = self.client.get('/api/events/')['ETag']
+
+        with self.assertNumQueries(3):  # session, user, fingerprint
+            response = self.client.get('/api/events/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            enroll(self.student, self.event)
+        response = self.client.get('/api/events/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['vacancies_left'], 4)
+
+    def test_detail_answers_not_modified(self):
+        """Test If-None-Match and If-Modified-Since on the detail endpoint"""
+        response = self.client.get(f'/api/events/{self.event.pk}/')
+        etag, last_modified = response['ETag'], response['Last-Modified']
+
+        response = self.client.get(f'/api/events/{self.event.pk}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(f'/api/events/{self.event.pk}/', HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+        self.event.title = 'Renamed'
+        self.event.save()
+        response = self.client.get(f'/api/events/{self.event.pk}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class ImportEventsCommandTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.organizer = Usuario.objects.create_user(
+            username='org', email='org@example.com', password='password123', role='organizador'
+        )
+        self.professor = Usuario.objects.create_user(
+            username='prof', email='prof@example.com', password='password123',
+            role='professor', institution='Test University'
+        )
+        self.future = (timezone.localdate() + datetime.timedelta(days=10)).isoformat()
+
+    def write(self, suffix, content):
+        handle = tempfile.NamedTemporaryFile('w', suffix=suffix, delete=False, encoding='utf-8')
+        with handle:
+            handle.write(content)
+        self.addCleanup(os.unlink, handle.name)
+        return handle.name
+
+    def test_csv_import_reports_bad_rows(self):
+        """Test that valid rows are inserted and invalid ones reported by line"""
+        path = self.write('.csv', (
+            'title,event_type,start_date,end_date,start_time,end_time,location,capacity,organizer,professor_in_charge\n'
+            f'Aula 1,seminario,{self.future},{self.future},10:00,12:00,Sala 1,30,org,prof@example.com\n'
+            f'Aula 2,seminario,{self.future},{self.future},,,Sala 1,30,ORG@example.com,prof\n'
+            f'Aula 3,seminario,{self.future},{self.future},12:00,10:00,Sala 1,30,org,prof\n'
+            f'Aula 4,seminario,{self.future},{self.future},,,Sala 1,30,org,nobody\n'
+            f'Aula 5,festa,{self.future},{self.future},,,Sala 1,30,org,prof\n'
+        ))
+        out, err = StringIO(), StringIO()
+
+        with self.assertNumQueries(6):  # 2 lookups, savepoint + 1 bulk insert + release, 1 audit
+            call_command('import_events', path, '--batch-size', '10', stdout=out, stderr=err)
+
+        self.assertEqual(list(Event.objects.order_by('title').values_list('title', flat=True)), ['Aula 1', 'Aula 2'])
+        errors = err.getvalue()
+        self.assertIn('line 4', errors)
+        self.assertIn('line 5', errors)
+        self.assertIn('line 6', errors)
+
+    def test_ndjson_dry_run(self):
+        """Test that dry-run validates NDJSON without inserting"""
+        row = {
+            'title': 'Seminário', 'event_type': 'seminario', 'start_date': self.future, 'end_date': self.future,
+            'location': 'Auditório', 'capacity': 50, 'organizer': 'org', 'professor_in_charge': 'prof',
+        }
+        path = self.write('.ndjson', json.dumps(row) + '\n' + 'not json\n')
+        out, err = StringIO(), StringIO()
+
+        call_command('import_events', path, '--dry-run', stdout=out, stderr=err)
+
+        self.assertFalse(Event.objects.exists())
+        self.assertIn('1 events imported, 1 rows rejected', out.getvalue())
+
+
+class BatchEnrollmentTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.professor = Usuario.objects.create_user(
+            username='prof', email='prof@example.com', password='password123',
+            role='professor', institution='Test University'
+        )
+        self.organizer = Usuario.objects.create_user(
+            username='org', email='org@example.com', password='password123',
+            role='organizador'
+        )
+        self.students = [
+            Usuario.objects.create_user(
+                username=f'aluno{i}', email=f'aluno{i}@example.com', password='password123',
+                role='aluno', institution='Test University'
+            )
+            for i in range(4)
+        ]
+        future_date = timezone.localdate() + datetime.timedelta(days=10)
+        self.event = Event.objects.create(
+            title='Turma Inteira', event_type='curso', start_date=future_date, end_date=future_date,
+            location='Auditório', capacity=3, organizer=self.organizer, professor_in_charge=self.professor
+        )
+        enroll(self.students[0], self.event)
+
+    def test_batch_results(self):
+        """Test per-user outcomes, capacity and a single aggregated audit entry"""
+        from apps.audit.models import AuditLog
+        self.client.force_login(self.organizer)
+        payload = {
+            'event': self.event.pk,
+            'users': [
+                str(self.students[0].pk),   # already registered
+                'ALUNO1@example.com',
+                str(self.students[2].pk),
+                'aluno2@example.com',       # repeated in the batch
+                str(self.students[3].pk),   # no seats left
+                str(self.organizer.pk),
+                'ninguem@example.com',
+            ],
+        }
+        response = self.client.post('/api/events/register/batch/', payload, content_type='application/json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['enrolled'], 2)
+        self.assertEqual(
+            [item['status'] for item in response.json()['results']],
+            ['duplicate', 'enrolled', 'enrolled', 'duplicate', 'full', 'forbidden', 'not_found'],
+        )
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.registrations_count, 3)
+        self.assertEqual(self.event.registrations.count(), 3)
+        self.assertEqual(AuditLog.objects.filter(user=self.organizer, action='registration').count(), 1)
+
+    def test_failed_seat_claim_reports_per_user(self):
+        """Test that a seat claim lost to a concurrent change is reported, not raised"""
+        self.client.force_login(self.organizer)
+        payload = {'event': self.event.pk, 'users': [str(self.students[0].pk), str(self.students[1].pk)]}
+        with mock.patch('apps.eventos.services.claim_seats', return_value=False):
+            response = self.client.post('/api/events/register/batch/', payload, content_type='application/json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['enrolled'], 0)
+        self.assertEqual([item['status'] for item in response.json()['results']], ['duplicate', 'full'])
+        self.assertEqual(self.event.registrations.count(), 1)
+
+    def test_only_event_organizer(self):
+        """Test that other users cannot enroll in batch"""
+        self.client.force_login(self.students[1])
+        response = self.client.post(
+            '/api/events/register/batch/',
+            {'event': self.event.pk, 'users': [str(self.students[2].pk)]},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(self.event.registrations.filter(user=self.students[2]).exists())
+
+
+class AttendanceTests(TestCase):
+    def setUp(self):
+        self.professor = Usuario.objects.create_user(
+            username='prof', email='prof@example.com', password='password123',
+            role='professor', institution='Test University'
+        )
+        self.organizer = Usuario.objects.create_user(
+            username='org', email='org@example.com', password='password123',
+            role='organizador'
+        )
+        self.students = Usuario.objects.bulk_create([
+            Usuario(username=f'aluno{i}', email=f'Aluno{i}@example.com', role='aluno')
+            for i in range(5)
+        ])
+        future_date = timezone.localdate() + datetime.timedelta(days=10)
+        self.event = Event.objects.create(
+            title='Aula Magna', event_type='palestra', start_date=future_date, end_date=future_date,
+            location='Auditório', capacity=10, organizer=self.organizer, professor_in_charge=self.professor
+        )
+        enroll_many(self.event, [str(student.pk) for student in self.students[:4]])
+
+    def test_confirm_attendance_batches_updates(self):
+        """Test one lookup query plus one UPDATE per chunk"""
+        identifiers = [str(self.students[0].pk), 'aluno1@EXAMPLE.com', 'aluno2', 'aluno2', 'aluno4', 'ninguem']
+        with self.assertNumQueries(5):  # lookup, savepoint, two chunked updates, release
+            results, confirmed = confirm_attendance(self.event, identifiers, chunk_size=2)
+        self.assertEqual(confirmed, 3)
+        self.assertEqual(
+            [outcome for _, outcome in results],
+            [AttendanceOutcome.CONFIRMED, AttendanceOutcome.CONFIRMED, AttendanceOutcome.CONFIRMED,
+             AttendanceOutcome.ALREADY_CONFIRMED, AttendanceOutcome.NOT_REGISTERED, AttendanceOutcome.NOT_REGISTERED],
+        )
+        self.assertEqual(self.event.registrations.filter(presence_confirmed=True).count(), 3)
+
+    def test_api_accepts_csv_upload(self):
+        """Test the organizer endpoint with an uploaded attendance CSV"""
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        upload = SimpleUploadedFile('presenca.csv', b'email\naluno0@example.com\naluno3@example.com\n', 'text/csv')
+        self.client.force_login(self.organizer)
+        response = self.client.post(f'/api/events/{self.event.pk}/attendance/', {'file': upload})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['confirmed'], 2)
+        self.client.force_login(self.students[0])
+        response = self.client.post(
+            f'/api/events/{self.event.pk}/attendance/', {'users': ['aluno1']}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_import_attendance_command(self):
+        """Test the management command and its dry run"""
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as handle:
+            handle.write(f'user\n{self.students[1].pk}\naluno2\nnaoinscrito\n')
+        self.addCleanup(os.unlink, handle.name)
+
+        call_command('import_attendance', self.event.pk, handle.name, '--dry-run', stdout=StringIO(), stderr=StringIO())
+        self.assertFalse(self.event.registrations.filter(presence_confirmed=True).exists())
+
+        out = StringIO()
+        call_command('import_attendance', self.event.pk, handle.name, stdout=out, stderr=StringIO())
+        self.assertIn('2 presences confirmed, 1 identifiers not found', out.getvalue())
+        self.assertEqual(self.event.registrations.filter(presence_confirmed=True).count(), 2)
+
+
+class CheckinTokenTests(TestCase):
+    def setUp(self):
+        from .checkin import checkin_queue
+        self.queue = checkin_queue
+        self.queue.forget()
+        self.professor = Usuario.objects.create_user(
+            username='prof', email='prof@example.com', password='password123',
+            role='professor', institution='Test University'
+        )
+        self.student = Usuario.objects.create_user(
+            username='aluno', email='aluno@example.com', password='password123',
+            role='aluno', institution='Test University'
+        )
+        self.organizer = Usuario.objects.create_user(
+            username='org', email='org@example.com', password='password123', role='organizador'
+        )
+        future_date = timezone.localdate() + datetime.timedelta(days=10)
+        self.event = Event.objects.create(
+            title='Portaria', event_type='palestra', start_date=future_date, end_date=future_date,
+            location='Sala', capacity=5, organizer=self.organizer, professor_in_charge=self.professor
+        )
+        self.registration = enroll(self.student, self.event)[1]
+
+    def tearDown(self):
+        self.queue.flush()
+
+    def post_scan(self, token, pk=None, **headers):
+        url = f'/api/events/{pk or self.event.pk}/checkin/'
+        return self.client.post(url, {'token': token}, content_type='application/json', **headers)
+
+    def test_scan_is_queued_without_queries(self):
+        """Test that scans verify offline, absorb duplicates and flush in one UPDATE"""
+        from .checkin import make_token, scanner_key
+        token = make_token(self.registration)
+        key = scanner_key(self.event.pk)
+
+        with self.assertNumQueries(0):
+            first = self.post_scan(token, HTTP_X_SCANNER_KEY=key)
+            second = self.post_scan(token, HTTP_X_SCANNER_KEY=key)
+        self.assertEqual(first.status_code, 202)
+        self.assertEqual(first.json()['status'], 'queued')
+        self.assertEqual(second.json()['status'], 'duplicate')
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.queue.flush(), 1)
+        self.registration.refresh_from_db()
+        self.assertTrue(self.registration.presence_confirmed)
+
+    def test_rejects_forged_or_foreign_tokens(self):
+        """Test tampered tokens and tokens for another event"""
+        from .checkin import make_token, scanner_key
+        token = make_token(self.registration)
+        forged = token.replace(f'.{self.registration.pk}:', f'.{self.registration.pk + 1}:', 1)
+        response = self.post_scan(forged, HTTP_X_SCANNER_KEY=scanner_key(self.event.pk))
+        self.assertEqual(response.status_code, 400)
+        other = self.post_scan(token, pk=self.event.pk + 1, HTTP_X_SCANNER_KEY=scanner_key(self.event.pk + 1))
+        self.assertEqual(other.status_code, 400)
+
+    def test_requires_scanner_credential(self):
+        """Test that students cannot check themselves in with their own token"""
+        from .checkin import make_token, scanner_key
+        token = make_token(self.registration)
+        self.assertEqual(self.post_scan(token).status_code, 401)
+        wrong_key = self.post_scan(token, HTTP_X_SCANNER_KEY=scanner_key(self.event.pk + 1))
+        self.assertEqual(wrong_key.status_code, 401)
+        self.client.force_login(self.student)
+        self.assertEqual(self.post_scan(token).status_code, 403)
+        self.assertEqual(self.queue.flush(), 0)
+
+        # Only the event's own organizer can scan with a session
+        other = Usuario.objects.create_user(
+            username='org2', email='org2@example.com', password='password123', role='organizador'
+        )
+        self.client.force_login(other)
+        self.assertEqual(self.post_scan(token).status_code, 403)
+        self.client.force_login(self.organizer)
+        self.assertEqual(self.post_scan(token).status_code, 202)
+
+    def test_throttle_is_per_event(self):
+        """Test the scan budget is counted per event, not per scanner address"""
+        from .checkin import make_token, scanner_key
+        from .throttles import CheckinThrottle
+        cache.clear()
+        token = make_token(self.registration)
+        with mock.patch.object(CheckinThrottle, 'THROTTLE_RATES', {'checkin': '2/min'}):
+            for _ in range(2):
+                self.assertEqual(self.post_scan(token, HTTP_X_SCANNER_KEY=scanner_key(self.event.pk)).status_code, 202)
+            self.assertEqual(self.post_scan(token, HTTP_X_SCANNER_KEY=scanner_key(self.event.pk)).status_code, 429)
+            # Another event's scanners behind the same address are unaffected
+            other = self.post_scan(token, pk=self.event.pk + 1, HTTP_X_SCANNER_KEY=scanner_key(self.event.pk + 1))
+            self.assertEqual(other.status_code, 400)
+
+    def test_failed_flush_keeps_scans(self):
+        """Test that scans whose write failed are retried, not marked as seen"""
+        from .checkin import make_token, scanner_key
+        token = make_token(self.registration)
+        key = scanner_key(self.event.pk)
+        self.post_scan(token, HTTP_X_SCANNER_KEY=key)
+
+        with mock.patch.object(Registration.objects, 'filter', side_effect=DatabaseError('locked')):
+            with self.assertRaises(DatabaseError):
+                self.queue.flush()
+        self.assertEqual(self.post_scan(token, HTTP_X_SCANNER_KEY=key).json()['status'], 'duplicate')
+
+        self.assertEqual(self.queue.flush(), 1)
+        self.registration.refresh_from_db()
+        self.assertTrue(self.registration.presence_confirmed)
+
+    def test_qr_code_only_for_owner(self):
+        """Test the QR image is a PNG served only to the registered user"""
+        url = f'/eventos/inscricoes/{self.registration.pk}/qrcode.png'
+        self.client.force_login(self.professor)
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.client.force_login(self.student)
+        response = self.client.get(url)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertTrue(response.content.startswith(b'\x89PNG'))
+
+
+class RegistrationExportTests(TestCase):
+    def setUp(self):
+        self.professor = Usuario.objects.create_user(
+            username='prof', email='prof@example.com', password='password123',
+            role='professor', institution='Test University'
+        )
+        self.organizer = Usuario.objects.create_user(
+            username='org', email='org@example.com', password='password123',
+            role='organizador'
+        )
+        students = Usuario.objects.bulk_create([
+            Usuario(username=f'aluno{i}', email=f'aluno{i}@example.com', first_name='José', role='aluno')
+            for i in range(3)
+        ])
+        future_date = timezone.localdate() + datetime.timedelta(days=10)
+        self.events = [
+            Event.objects.create(
+                title=f'Evento {i}', event_type='palestra', start_date=future_date, end_date=future_date,
+                location='Sala', capacity=10, organizer=self.organizer, professor_in_charge=self.professor
+            )
+            for i in range(2)
+        ]
+        enroll_many(self.events[0], [str(student.pk) for student in students])
+        enroll_many(self.events[1], [str(students[0].pk)])
+
+    def test_streams_event_and_global_csv(self):
+        """Test the per-event and global exports stream every registration"""
+        self.client.force_login(self.organizer)
+        response = self.client.get(f'/eventos/{self.events[0].pk}/inscricoes.csv')
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(lines[0].split(',')[:3], ['evento_id', 'evento', 'usuario'])
+        self.assertEqual(len(lines), 4)
+        self.assertIn('José', lines[1])
+
+        response = self.client.get('/eventos/inscricoes.csv')
+        self.assertEqual(len(b''.join(response.streaming_content).splitlines()), 5)
+
+    def test_only_organizers(self):
+        """Test that participants cannot export"""
+        self.client.force_login(self.professor)
+        response = self.client.get('/eventos/inscricoes.csv')
+        self.assertEqual(response.status_code, 302)
+
+    def test_other_organizers_see_only_their_events(self):
+        """Test organizers cannot export the participants of someone else's event"""
+        other = Usuario.objects.create_user(
+            username='org2', email='org2@example.com', password='password123', role='organizador'
+        )
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(f'/eventos/{self.events[0].pk}/inscricoes.csv').status_code, 404)
+        response = self.client.get('/eventos/inscricoes.csv')
+        self.assertEqual(len(b''.join(response.streaming_content).splitlines()), 1)
+
+
+class CalendarFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.professor = Usuario.objects.create_user(
+            username='prof', email='prof@example.com', password='password123',
+            role='professor', institution='Test University'
+        )
+        self.student = Usuario.objects.create_user(
+            username='aluno', email='aluno@example.com', password='password123',
+            role='aluno', institution='Test University'
+        )
+        future_date = timezone.localdate() + datetime.timedelta(days=10)
+        self.events = [
+            Event.objects.create(
+                title='Palestra; Ética, Dados', event_type='palestra', start_date=future_date, end_date=future_date,
+                start_time=datetime.time(19, 0), end_time=datetime.time(21, 0), description='x' * 200,
+                location='Auditório', capacity=5, organizer=self.professor, professor_in_charge=self.professor
+            ),
+            Event.objects.create(
+                title='Semana Acadêmica', event_type='seminario', start_date=future_date, end_date=future_date,
+                location='Campus', capacity=5, organizer=self.professor, professor_in_charge=self.professor
+            ),
+        ]
+
+    def test_public_feed_and_not_modified(self):
+        """Test the feed content and that polling with the ETag costs no query"""
+        response = self.client.get('/eventos/calendario.ics')
+        body = b''.join(response.streaming_content).decode()
+        self.assertEqual(body.count('BEGIN:VEVENT'), 2)
+        self.assertIn(r'SUMMARY:Palestra\; Ética\, Dados', body)
+        self.assertIn('DTSTART:', body)
+        self.assertIn('DTSTART;VALUE=DATE:', body)
+        self.assertTrue(all(len(line.encode()) <= 75 for line in body.split('\r\n')))
+
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get('/eventos/calendario.ics', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        with self.assertNumQueries(0):
+            response = self.client.get('/eventos/calendario.ics')
+        self.assertEqual(response.content.decode(), body)
+
+    def test_personal_feed_requires_signed_token(self):
+        """Test the per-user feed lists only the user's registrations"""
+        from .ical import feed_token
+        enroll(self.student, self.events[1])
+        response = self.client.get(f'/eventos/calendario/{feed_token(self.student)}.ics')
+        body = b''.join(response.streaming_content).decode()
+        self.assertEqual(body.count('BEGIN:VEVENT'), 1)
+        self.assertIn('Semana Acadêmica', body)
+
+        forged = feed_token(self.student).replace(f'{self.student.pk}:', f'{self.professor.pk}:', 1)
+        self.assertEqual(self.client.get(f'/eventos/calendario/{forged}.ics').status_code, 404)
+
+
+class ScheduleConflictTests(TestCase):
+    def setUp(self):
+        self.professor = Usuario.objects.create_user(
+            username='prof', email='prof@example.com', password='password123',
+            role='professor', institution='Test University'
+        )
+        self.student = Usuario.objects.create_user(
+            username='aluno', email='aluno@example.com', password='password123',
+            role='aluno', institution='Test University'
+        )
+        day = timezone.localdate() + datetime.timedelta(days=10)
+
+        def event(title, start, end, start_date=day, end_date=day):
+            return Event.objects.create(
+                title=title, event_type='workshop', start_date=start_date, end_date=end_date,
+                start_time=start, end_time=end, location='Lab', capacity=5,
+                organizer=self.professor, professor_in_charge=self.professor
+            )
+        self.morning = event('Manhã', datetime.time(8), datetime.time(12))
+        self.late_morning = event('Fim da manhã', datetime.time(11), datetime.time(13))
+        self.afternoon = event('Tarde', datetime.time(12), datetime.time(18))
+        self.all_day = event('Dia todo', None, None, day + datetime.timedelta(days=1), day + datetime.timedelta(days=1))
+
+    def test_enroll_warns_or_blocks_with_one_query(self):
+        """Test that the overlap check costs a single extra query"""
+        enroll(self.student, self.morning)
+        with self.assertNumQueries(1):
+            self.assertEqual(schedule_conflicts(self.student, self.late_morning), [self.morning])
+        self.assertEqual(schedule_conflicts(self.student, self.afternoon), [])  # touching ends are fine
+
+        outcome, _ = enroll(self.student, self.late_morning, conflicts='block')
+        self.assertEqual(outcome, EnrollmentOutcome.CONFLICT)
+        outcome, registration = enroll(self.student, self.late_morning)
+        self.assertEqual(outcome, EnrollmentOutcome.ENROLLED)
+        self.assertEqual(registration.schedule_conflicts, [self.morning])
+
+    def test_my_events_flags_overlaps(self):
+        """Test the interval sweep on the "my events" page"""
+        for event in (self.morning, self.late_morning, self.afternoon, self.all_day):
+            enroll(self.student, event, conflicts='off')
+        self.client.force_login(self.student)
+        response = self.client.get('/eventos/minhas-inscricoes/')
+        conflicts = {r.event.title: sorted(e.title for e in r.conflicts) for r in response.context['registrations']}
+        self.assertEqual(conflicts, {
+            'Manhã': ['Fim da manhã'],
+            'Fim da manhã': ['Manhã', 'Tarde'],
+            'Tarde': ['Fim da manhã'],
+            'Dia todo': [],
+        })
+
+
+class RecurringEventTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.professor = Usuario.objects.create_user(
+            username='prof', email='prof@example.com', password='password123',
+            role='professor', institution='Test University'
+        )
+        self.organizer = Usuario.objects.create_user(
+            username='org', email='org@example.com', password='password123',
+            role='organizador'
+        )
+        self.student = Usuario.objects.create_user(
+            username='aluno', email='aluno@example.com', password='password123',
+            role='aluno', institution='Test University'
+        )
+        self.start = timezone.localdate() + datetime.timedelta(days=1)
+
+    def create_series(self, **extra):
+        self.client.force_login(self.organizer)
+        data = {
+            'title': 'Seminário Semanal', 'description': '', 'event_type': 'seminario',
+            'start_date': self.start, 'end_date': self.start, 'start_time': '14:00', 'end_time': '16:00',
+            'recurrence': 'weekly', 'location': 'Sala 1', 'capacity': 2,
+            'professor_in_charge': self.professor.pk, **extra,
+        }
+        response = self.client.post('/eventos/criar/', data)
+        self.assertEqual(response.status_code, 302)
+        return Event.objects.get(parent__isnull=True, title='Seminário Semanal')
+
+    def test_sessions_materialized_in_bulk(self):
+        """Test a bounded series creates every session with one insert"""
+        series = self.create_series(recurrence_until=self.start + datetime.timedelta(weeks=9))
+        sessions = list(series.sessions.order_by('start_date'))
+        self.assertEqual(len(sessions), 9)
+        self.assertEqual(sessions[-1].start_date, self.start + datetime.timedelta(weeks=9))
+        self.assertEqual(sessions[0].start_time, datetime.time(14, 0))
+
+        # Listing stays one query over Event rows, sessions included
+        response = self.client.get('/eventos/', {'type': 'seminario'})
+        self.assertEqual(response.context['facets']['types']['seminario'], 10)
+
+    @override_settings(RECURRENCE_WINDOW_DAYS=30)
+    def test_open_series_extended_by_command(self):
+        """Test the rolling window and the materialize_sessions command"""
+        series = self.create_series()
+        self.assertEqual(series.sessions.count(), 4)
+
+        call_command('materialize_sessions', '--days', '60', stdout=StringIO())
+        self.assertEqual(series.sessions.count(), 8)
+        call_command('materialize_sessions', '--days', '60', stdout=StringIO())
+        self.assertEqual(series.sessions.count(), 8)
+
+    def test_one_enrollment_for_all_sessions(self):
+        """Test enrolling from a session registers in the series and checks every session"""
+        series = self.create_series(recurrence_until=self.start + datetime.timedelta(weeks=3))
+        third = series.sessions.order_by('start_date')[1]
+
+        outcome, registration = enroll(self.student, third)
+        self.assertEqual(outcome, EnrollmentOutcome.ENROLLED)
+        self.assertEqual(registration.event_id, series.pk)
+        self.assertEqual(Event.objects.get(pk=third.pk).vacancies_left(), 1)
+        self.assertEqual(enroll(self.student, series)[0], EnrollmentOutcome.DUPLICATE)
+        self.client.force_login(self.student)
+        response = self.client.get(f'/eventos/{third.pk}/')
+        self.assertTrue(response.context['is_enrolled'])
+        self.assertEqual(len(response.context['sessions']), 4)
+
+        clash_day = self.start + datetime.timedelta(weeks=2)
+        clash = Event.objects.create(
+            title='Workshop', event_type='workshop', start_date=clash_day, end_date=clash_day,
+            start_time=datetime.time(15), end_time=datetime.time(17), location='Lab', capacity=5,
+            organizer=self.organizer, professor_in_charge=self.professor
+        )
+        self.assertEqual(schedule_conflicts(self.student, clash), [third])
+
+    def test_full_series_has_no_vacancies_in_list(self):
+        """Test that sessions of a full series are not listed as having vacancies"""
+        series = self.create_series(recurrence_until=self.start + datetime.timedelta(weeks=2), capacity=1)
+        enroll(self.student, series)
+
+        response = self.client.get('/eventos/', {'vacancies': '1'})
+        self.assertEqual(list(response.context['events']), [])
+        self.assertEqual(response.context['facets']['with_vacancies'], 0)
+
+    def test_edit_updates_future_sessions(self):
+        """Test editing a series copies its fields to the sessions and drops those past the new end"""
+        series = self.create_series(recurrence_until=self.start + datetime.timedelta(weeks=4))
+        data = {
+            'title': 'Seminário Renomeado', 'description': '', 'event_type': 'seminario',
+            'start_date': self.start, 'end_date': self.start, 'start_time': '14:00', 'end_time': '16:00',
+            'recurrence': 'weekly', 'recurrence_until': self.start + datetime.timedelta(weeks=2),
+            'location': 'Sala 2', 'capacity': 5, 'professor_in_charge': self.professor.pk,
+        }
+        response = self.client.post(f'/eventos/{series.pk}/editar/', data)
+        self.assertEqual(response.status_code, 302)
+
+        sessions = list(series.sessions.order_by('start_date'))
+        self.assertEqual([session.start_date for session in sessions],
+                         [self.start + datetime.timedelta(weeks=week) for week in (1, 2)])
+        self.assertEqual({(s.title, s.location, s.capacity) for s in sessions}, {('Seminário Renomeado', 'Sala 2', 5)})
+
+    def test_api_update_materializes_sessions(self):
+        """Test extending a series through the API creates its new sessions"""
+        series = self.create_series(recurrence_until=self.start + datetime.timedelta(weeks=1))
+        response = self.client.patch(
+            f'/api/events/{series.pk}/',
+            {'recurrence_until': str(self.start + datetime.timedelta(weeks=3)), 'location': 'Sala 3'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(series.sessions.count(), 3)
+        self.assertFalse(series.sessions.exclude(location='Sala 3').exists())
+
+
+class SeatHoldTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.professor = Usuario.objects.create_user(
+            username='prof', email='prof@example.com', password='password123',
+            role='professor', institution='Test University'
+        )
+        self.students = Usuario.objects.bulk_create([
+            Usuario(username=f'aluno{i}', email=f'aluno{i}@example.com', role='aluno') for i in range(2)
+        ])
+        future_date = timezone.localdate() + datetime.timedelta(days=10)
+        self.event = Event.objects.create(
+            title='Última Vaga', event_type='workshop', start_date=future_date, end_date=future_date,
+            location='Lab', capacity=1, organizer=self.professor, professor_in_charge=self.professor
+        )
+
+    def test_hold_reserves_the_seat(self):
+        """Test a held seat is not available to others and converts on enroll"""
+        outcome, hold = hold_seat(self.students[0], self.event)
+        self.assertEqual(outcome, EnrollmentOutcome.HELD)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.vacancies_left(), 0)
+        self.assertEqual(enroll(self.students[1], self.event)[0], EnrollmentOutcome.FULL)
+        self.assertEqual(hold_seat(self.students[1], self.event)[0], EnrollmentOutcome.FULL)
+
+        self.assertEqual(enroll(self.students[0], self.event)[0], EnrollmentOutcome.ENROLLED)
+        self.event.refresh_from_db()
+        self.assertEqual((self.event.registrations_count, self.event.held_count), (1, 0))
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_expired_hold_reclaimed_lazily(self):
+        """Test an expired hold gives its seat to the next user that asks"""
+        hold_seat(self.students[0], self.event)
+        SeatHold.objects.update(expires_at=timezone.now() - datetime.timedelta(seconds=1))
+
+        outcome, _ = enroll(self.students[1], self.event)
+        self.assertEqual(outcome, EnrollmentOutcome.ENROLLED)
+        self.event.refresh_from_db()
+        self.assertEqual((self.event.registrations_count, self.event.held_count), (1, 0))
+        self.assertEqual(enroll(self.students[0], self.event)[0], EnrollmentOutcome.FULL)
+
+    def test_release_over_api(self):
+        """Test holding and releasing through the API"""
+        self.client.force_login(self.students[0])
+        response = self.client.post(f'/api/events/{self.event.pk}/hold/')
+        self.assertEqual(response.status_code, 201)
+        self.assertIn('expires_at', response.json())
+        self.assertEqual(self.client.delete(f'/api/events/{self.event.pk}/hold/').status_code, 204)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.held_count, 0)
+
+    def test_cascaded_hold_gives_seat_back(self):
+        """Test that deleting the user of a hold frees its seat"""
+        hold_seat(self.students[0], self.event)
+        self.students[0].delete()
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.held_count, 0)
+        self.assertEqual(enroll(self.students[1], self.event)[0], EnrollmentOutcome.ENROLLED)
+
+    def test_sync_command_rebuilds_held_count(self):
+        """Test that sync_registration_counts drops expired holds and recounts the rest"""
+        other = Event.objects.create(
+            title='Outra', event_type='workshop', start_date=self.event.start_date, end_date=self.event.end_date,
+            location='Lab', capacity=5, organizer=self.professor, professor_in_charge=self.professor
+        )
+        hold_seat(self.students[0], self.event)
+        hold_seat(self.students[1], other)
+        SeatHold.objects.filter(event=self.event).update(expires_at=timezone.now() - datetime.timedelta(seconds=1))
+        Event.objects.filter(pk=other.pk).update(held_count=3)
+
+        call_command('sync_registration_counts', stdout=StringIO())
+
+        self.assertEqual(list(SeatHold.objects.values_list('event', flat=True)), [other.pk])
+        self.assertEqual(Event.objects.get(pk=self.event.pk).held_count, 0)
+        self.assertEqual(Event.objects.get(pk=other.pk).held_count, 1)
+
+    def test_enroll_consumes_hold_without_cache(self):
+        """Test enrolling takes the held seat even when the cache lost track of the hold"""
+        Event.objects.filter(pk=self.event.pk).update(capacity=5)
+        self.event.refresh_from_db()
+        hold_seat(self.students[0], self.event)
+        cache.clear()
+
+        self.assertEqual(enroll(self.students[0], self.event)[0], EnrollmentOutcome.ENROLLED)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.vacancies_left(), 4)
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_freed_holds_go_to_waitlist(self):
+        """Test released and lapsed holds promote the head of the waitlist"""
+        hold_seat(self.students[0], self.event)
+        enroll(self.students[1], self.event, waitlist=True)
+        self.assertTrue(release_hold(self.students[0], self.event))
+        self.assertTrue(Registration.objects.filter(user=self.students[1], event=self.event).exists())
+
+        third = Usuario.objects.create(username='aluno2', email='aluno2@example.com', role='aluno')
+        Event.objects.filter(pk=self.event.pk).update(capacity=2)
+        hold_seat(self.students[0], self.event)
+        enroll(third, self.event, waitlist=True)
+        SeatHold.objects.update(expires_at=timezone.now() - datetime.timedelta(seconds=1))
+
+        # Showing the event page gives the lapsed seat back
+        response = self.client.get(f'/eventos/{self.event.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(Registration.objects.filter(user=third, event=self.event).exists())
+        self.event.refresh_from_db()
+        self.assertEqual((self.event.registrations_count, self.event.held_count), (2, 0))
+
+    def test_sync_command_promotes_waitlist(self):
+        """Test the expired holds swept by sync_registration_counts go to the waitlist"""
+        hold_seat(self.students[0], self.event)
+        enroll(self.students[1], self.event, waitlist=True)
+        SeatHold.objects.update(expires_at=timezone.now() - datetime.timedelta(seconds=1))
+
+        call_command('sync_registration_counts', stdout=StringIO())
+
+        self.assertTrue(Registration.objects.filter(user=self.students[1], event=self.event).exists())
+        self.assertFalse(self.event.waitlist.exists())
+
+
+@override_settings(LIVE_VACANCY_INTERVAL=3600)
+class LiveVacancyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.professor = Usuario.objects.create_user(
+            username='prof', email='prof@example.com', password='password123',
+            role='professor', institution='Test University'
+        )
+        self.students = Usuario.objects.bulk_create([
+            Usuario(username=f'aluno{i}', email=f'aluno{i}@example.com', role='aluno') for i in range(2)
+        ])
+        future_date = timezone.localdate() + datetime.timedelta(days=10)
+        self.event = Event.objects.create(
+            title='Ao Vivo', event_type='palestra', start_date=future_date, end_date=future_date,
+            location='Auditório', capacity=3, organizer=self.professor, professor_in_charge=self.professor
+        )
+        self.url = f'/eventos/{self.event.pk}/vagas/'
+
+    def test_unchanged_poll_is_304_without_queries(self):
+        """Test polls revalidate against the cache version and see new registrations"""
+        first = self.client.get(self.url)
+        self.assertEqual(first.json(), {'event': self.event.pk, 'vacancies_left': 3})
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for student in self.students:
+                enroll(student, self.event)
+        second = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json()['vacancies_left'], 1)
+
+    def test_session_reports_series_vacancies(self):
+        """Test a session's poll answers with the seats of its series"""
+        session = Event.objects.create(
+            title='Ao Vivo', event_type='palestra', start_date=self.event.start_date, end_date=self.event.end_date,
+            location='Auditório', capacity=3, organizer=self.professor, professor_in_charge=self.professor,
+            parent=self.event,
+        )
+        enroll(self.students[0], self.event)
+        response = self.client.get(f'/eventos/{session.pk}/vagas/')
+        self.assertEqual(response.json(), {'event': self.event.pk, 'vacancies_left': 2})
+        self.assertEqual(self.client.get('/eventos/999999/vagas/').status_code, 404)
+
+    def enroll_students(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for student in self.students:
+                enroll(student, self.event)
+
+    async def test_broker_coalesces_changes(self):
+        """Test several changes between polls reach watchers as one update"""
+        broker = VacancyBroker()
+        watchers = [broker.subscribe(self.event.pk, 3) for _ in range(2)]
+        try:
+            await sync_to_async(self.enroll_students)()
+            await broker.poll()
+            for queue in watchers:
+                self.assertEqual(queue.get_nowait(), 1)
+                self.assertTrue(queue.empty())
+
+            # Nothing changed since: nothing is published
+            await broker.poll()
+            self.assertTrue(all(queue.empty() for queue in watchers))
+
+            for queue in watchers:
+                broker.unsubscribe(self.event.pk, queue)
+            self.assertEqual(broker.watchers, {})
+        finally:
+            broker.task.cancel()
+
+    async def test_stream_sends_current_vacancies(self):
+        """Test the SSE endpoint starts with the current count"""
+        response = await self.async_client.get(f'/eventos/{self.event.pk}/vagas/stream/')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        try:
+            first = await anext(aiter(response.streaming_content))
+            self.assertIn(b'event: vacancies', first)
+            self.assertIn(b'"vacancies_left": 3', first)
+        finally:
+            live.broker.watchers.clear()
+            live.broker.task.cancel()
+
+        response = await self.async_client.get('/eventos/999999/vagas/stream/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_wsgi_falls_back_to_polling(self):
+        """Test that without ASGI the stream declines and the page is set up to poll"""
+        self.assertEqual(self.client.get(f'/eventos/{self.event.pk}/vagas/stream/').status_code, 204)
+        response = self.client.get(f'/eventos/{self.event.pk}/')
+        self.assertFalse(response.context['vacancy_stream'])
+        self.assertNotContains(response, 'data-stream=')
@@ -1,7 +1,14 @@
-from rest_framework.throttling import UserRateThrottle
+from rest_framework.throttling import SimpleRateThrottle, UserRateThrottle
 
 class EventListThrottle(UserRateThrottle):
     scope = 'event_list'
 
 class RegistrationThrottle(UserRateThrottle):
     scope = 'registration'
+
+class CheckinThrottle(SimpleRateThrottle):
+    """Per event, not per client: every door scanner may share one device or NAT address"""
+    scope = 'checkin'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': view.kwargs['pk']}
@@ -11,13 +11,27 @@ urlpatterns = [
     path('<int:pk>/editar/', views.EventUpdateView.as_view(), name='update'),
     path('<int:pk>/excluir/', views.EventDeleteView.as_view(), name='delete'),
     path('<int:pk>/inscrever/', views.EnrollView.as_view(), name='enroll'),
+    path('<int:pk>/reservar/', views.HoldSeatView.as_view(), name='hold'),
+    path('<int:pk>/reserva/cancelar/', views.ReleaseSeatView.as_view(), name='release_hold'),
     path('<int:pk>/cancelar/', views.CancelEnrollmentView.as_view(), name='cancel'),
+    path('<int:pk>/lista-espera/sair/', views.LeaveWaitlistView.as_view(), name='leave_waitlist'),
+    path('<int:pk>/vagas/', views.EventVacanciesView.as_view(), name='vacancies'),
+    path('<int:pk>/vagas/stream/', views.EventVacancyStreamView.as_view(), name='vacancy_stream'),
+    path('<int:pk>/inscricoes.csv', views.RegistrationExportView.as_view(), name='export_registrations'),
+    path('inscricoes.csv', views.RegistrationExportView.as_view(), name='export_all_registrations'),
     path('<int:pk>/demo-finalizar/', views.DemoEndEventView.as_view(), name='demo_end'),
     path('minhas-inscricoes/', views.MyEventsView.as_view(), name='my_events'),
+    path('calendario.ics', views.EventCalendarFeedView.as_view(), name='calendar'),
+    path('calendario/<str:token>.ics', views.EventCalendarFeedView.as_view(), name='user_calendar'),
+    path('inscricoes/<int:pk>/qrcode.png', views.CheckinQRView.as_view(), name='checkin_qr'),
     
     # API views
     path('api/', views.EventListAPIView.as_view(), name='api_list'),
     path('api/create/', views.EventCreateAPIView.as_view(), name='api_create'),
     path('api/<int:pk>/', views.EventDetailAPIView.as_view(), name='api_detail'),
+    path('api/<int:pk>/attendance/', views.EventAttendanceAPIView.as_view(), name='api_attendance'),
+    path('api/<int:pk>/checkin/', views.EventCheckinAPIView.as_view(), name='api_checkin'),
+    path('api/<int:pk>/hold/', views.SeatHoldAPIView.as_view(), name='api_hold'),
     path('api/register/', views.RegisterForEventAPIView.as_view(), name='api_register'),
+    path('api/register/batch/', views.BatchRegisterForEventAPIView.as_view(), name='api_register_batch'),
 ]
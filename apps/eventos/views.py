@@ -1,12 +1,40 @@
+import csv
+import hashlib
+from datetime import date, timedelta
+
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.shortcuts import redirect, get_object_or_404
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.core.signing import BadSignature, SignatureExpired
+from django.db.models import Count, Q
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import LessThan
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView, View
+from django.views.generic.list import MultipleObjectMixin
 
-from .models import Event, Registration
+from .models import Event, Registration, SeatHold, WaitlistEntry
+from .checkin import checkin_queue, is_scanner_key, make_token, qr_png, read_token, scanner_key
 from .forms import EventForm
+from .live import vacancies, vacancy_stream
+from .recurrence import materialize_sessions, update_sessions
+from .search import search_events
+from . import caching, ical
+from .services import (
+    enroll, enroll_many, confirm_attendance, cancel_enrollment, promote_waitlist, find_overlaps,
+    hold_seat, release_hold, reclaim_expired_holds,
+    EnrollmentOutcome, ENROLLMENT_MESSAGES,
+)
 from apps.audit.models import AuditLog
+from apps.certificados.services import issue_certificates, pending_registrations
+from Projeto_01_Web.pagination import KeysetPaginationMixin, KeysetAPIPagination
 
 
 class OrganizerRequiredMixin(UserPassesTestMixin):
@@ -19,34 +47,109 @@ class OrganizerRequiredMixin(UserPassesTestMixin):
         return redirect('eventos:list')
 
 
-class EventListView(ListView):
+def has_vacancies():
+    """Condition for free seats; sessions of a series use their first session's counters"""
+    return LessThan(
+        Coalesce('parent__registrations_count', 'registrations_count'),
+        Coalesce('parent__capacity', 'capacity') - Coalesce('parent__held_count', 'held_count'),
+    )
+
+
+def event_facets(queryset):
+    """
+    Counts for the list filters (per type, upcoming/past, with vacancies)
+    from a single GROUP BY event_type query.
+    """
+    today = timezone.localdate()
+    rows = queryset.order_by().values('event_type').annotate(
+        total=Count('id'),
+        upcoming=Count('id', filter=Q(end_date__gte=today)),
+        with_vacancies=Count('id', filter=has_vacancies()),
+    )
+    facets = {'types': {}, 'total': 0, 'upcoming': 0, 'past': 0, 'with_vacancies': 0}
+    for row in rows:
+        facets['types'][row['event_type']] = row['total']
+        facets['total'] += row['total']
+        facets['upcoming'] += row['upcoming']
+        facets['past'] += row['total'] - row['upcoming']
+        facets['with_vacancies'] += row['with_vacancies']
+    return facets
+
+
+class EventListView(KeysetPaginationMixin, ListView):
     """List all events"""
     model = Event
     template_name = 'eventos/event_list.html'
     context_object_name = 'events'
-    ordering = ['start_date']
+    ordering = ['start_date', 'id']
+    keyset_ordering = ('start_date', 'id')
     paginate_by = 12
+    # Context entries stored in the versioned listing cache
+    CACHED_CONTEXT = ('events', 'is_paginated', 'next_page_query', 'previous_page_query', 'facets')
+    
+    def use_keyset_pagination(self):
+        # Search results are ordered by relevance, page them by number
+        return not self.request.GET.get('q')
+    
+    def get_search_queryset(self):
+        """Events matching the search box only; facets are counted on this"""
+        # Sessions of a series show the vacancies of their first session
+        queryset = super().get_queryset().select_related('parent')
+        
+        # Full-text search, ranked by relevance
+        search = self.request.GET.get('q')
+        if search:
+            queryset = search_events(queryset, search)
+        
+        return queryset
     
     def get_queryset(self):
-        queryset = super().get_queryset()
+        queryset = self.get_search_queryset()
         
         # Filter by event type
         event_type = self.request.GET.get('type')
         if event_type:
             queryset = queryset.filter(event_type=event_type)
         
-        # Search
-        search = self.request.GET.get('q')
-        if search:
-            queryset = queryset.filter(title__icontains=search)
+        # Filter by upcoming/past
+        when = self.request.GET.get('when')
+        if when == 'upcoming':
+            queryset = queryset.filter(end_date__gte=timezone.localdate())
+        elif when == 'past':
+            queryset = queryset.filter(end_date__lt=timezone.localdate())
+        
+        # Only events with free seats
+        if self.request.GET.get('vacancies'):
+            queryset = queryset.filter(has_vacancies())
         
         return queryset
     
     def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context['event_types'] = Event.EVENT_TYPES
-        context['selected_type'] = self.request.GET.get('type', '')
-        context['search_query'] = self.request.GET.get('q', '')
+        get = self.request.GET
+        key = caching.listing_key(
+            get.get('type', ''), get.get('q', ''), get.get('when', ''), get.get('vacancies', ''),
+            get.get(self.cursor_param, ''), get.get(self.page_kwarg, '')
+        )
+        listing = cache.get(key)
+        if listing is None:
+            context = super().get_context_data(**kwargs)
+            context['facets'] = event_facets(self.get_search_queryset())
+            listing = {name: context[name] for name in self.CACHED_CONTEXT}
+            listing['events'] = list(listing['events'])
+            cache.set(key, listing, settings.EVENT_CACHE_TIMEOUT)
+        else:
+            # Cache hit: skip MultipleObjectMixin, there is nothing left to query
+            kwargs.pop('object_list', None)
+            context = super(MultipleObjectMixin, self).get_context_data(**kwargs)
+            context.update(listing)
+        
+        context['event_types'] = [
+            (value, label, context['facets']['types'].get(value, 0)) for value, label in Event.EVENT_TYPES
+        ]
+        context['selected_type'] = get.get('type', '')
+        context['selected_when'] = get.get('when', '')
+        context['only_vacancies'] = bool(get.get('vacancies'))
+        context['search_query'] = get.get('q', '')
         return context
 
 
@@ -56,23 +159,61 @@ class EventDetailView(DetailView):
     template_name = 'eventos/event_detail.html'
     context_object_name = 'event'
     
+    def get_queryset(self):
+        return super().get_queryset().select_related('organizer', 'professor_in_charge')
+    
+    def get_object(self, queryset=None):
+        # Only the user-specific enrollment state below is computed per request
+        return caching.get_or_set(
+            caching.detail_key(self.kwargs['pk']),
+            lambda: super(EventDetailView, self).get_object(queryset),
+        )
+    
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         event = self.object
         user = self.request.user
+        series_id = event.series_id
+        if event.parent_id:
+            # Registrations and seats live on the first session, cached under its own version
+            event.parent = caching.get_or_set(caching.detail_key(series_id), lambda: Event.objects.get(pk=series_id))
         
         context['is_enrolled'] = False
         context['can_enroll'] = False
+        context['seat_hold'] = None
+        context['can_join_waitlist'] = False
+        context['waitlist_entry'] = None
+        
+        series = event.parent if event.parent_id else event
+        if series.held_count and reclaim_expired_holds(series_id):
+            # Lapsed holds gave their seats back, possibly to the waitlist
+            series.refresh_from_db(fields=['registrations_count', 'held_count'])
         
         if user.is_authenticated:
-            context['is_enrolled'] = Registration.objects.filter(user=user, event=event).exists()
-            context['can_enroll'] = (
-                user.role != 'organizador' and 
-                not context['is_enrolled'] and 
-                event.vacancies_left() > 0
-            )
+            context['is_enrolled'] = Registration.objects.filter(user=user, event_id=series_id).exists()
+            can_register = user.role != 'organizador' and not context['is_enrolled']
+            if can_register:
+                context['seat_hold'] = SeatHold.objects.filter(
+                    user=user, event_id=series_id, expires_at__gt=timezone.now()
+                ).first()
+            context['can_enroll'] = can_register and (context['seat_hold'] is not None or event.vacancies_left() > 0)
+            if can_register and not context['can_enroll']:
+                context['waitlist_entry'] = WaitlistEntry.objects.filter(user=user, event_id=series_id).first()
+                context['can_join_waitlist'] = context['waitlist_entry'] is None
+            if event.organizer_id == user.pk:
+                # Door scanners check in with this key, see EventCheckinAPIView
+                context['scanner_key'] = scanner_key(series_id)
         
-        context['registrations'] = event.registrations.select_related('user').order_by('-registered_at')[:10]
+        context['registrations'] = Registration.objects.filter(
+            event_id=series_id
+        ).select_related('user').order_by('-registered_at')[:10]
+        # Pushed over SSE when served by ASGI, polled otherwise
+        context['vacancy_stream'] = isinstance(self.request, ASGIRequest)
+        context['vacancy_poll_ms'] = settings.LIVE_VACANCY_POLL_INTERVAL * 1000
+        if event.recurrence or event.parent_id:
+            context['sessions'] = Event.objects.filter(
+                Q(pk=series_id) | Q(parent_id=series_id)
+            ).order_by('start_date', 'id').only('id', 'start_date', 'start_time', 'end_time', 'location')
         return context
 
 
@@ -86,6 +227,7 @@ class EventCreateView(LoginRequiredMixin, OrganizerRequiredMixin, CreateView):
     def form_valid(self, form):
         form.instance.organizer = self.request.user
         response = super().form_valid(form)
+        sessions = materialize_sessions(self.object)
         
         AuditLog.objects.create(
             user=self.request.user,
@@ -94,6 +236,8 @@ class EventCreateView(LoginRequiredMixin, OrganizerRequiredMixin, CreateView):
         )
         
         messages.success(self.request, f'Evento "{self.object.title}" criado com sucesso!')
+        if sessions:
+            messages.info(self.request, f'{sessions} sessões seguintes foram criadas.')
         return response
     
     def get_context_data(self, **kwargs):
@@ -114,6 +258,8 @@ class EventUpdateView(LoginRequiredMixin, OrganizerRequiredMixin, UpdateView):
     
     def form_valid(self, form):
         response = super().form_valid(form)
+        # Future sessions follow the edit: changed fields, shortened or extended repetition
+        update_sessions(self.object)
         
         AuditLog.objects.create(
             user=self.request.user,
@@ -121,6 +267,14 @@ class EventUpdateView(LoginRequiredMixin, OrganizerRequiredMixin, UpdateView):
             description=f'Editou evento: {self.object.title}'
         )
         
+        # A capacity increase frees seats for whoever is waiting
+        for registration in promote_waitlist(self.object.pk):
+            AuditLog.objects.create(
+                user=registration.user,
+                action='registration',
+                description=f'Promovido da lista de espera no evento: {self.object.title}'
+            )
+        
         messages.success(self.request, f'Evento "{self.object.title}" atualizado com sucesso!')
         return response
     
@@ -157,22 +311,17 @@ class EnrollView(LoginRequiredMixin, View):
         event = get_object_or_404(Event, pk=pk)
         user = request.user
         
-        # Validate enrollment
-        if user.role == 'organizador':
-            messages.error(request, 'Organizadores não podem se inscrever em eventos.')
+        outcome, registration = enroll(user, event, waitlist=True)
+        if outcome == EnrollmentOutcome.WAITLISTED:
+            messages.info(request, f'{ENROLLMENT_MESSAGES[outcome]} Posição: {registration.rank()}.')
             return redirect('eventos:detail', pk=pk)
-        
-        if Registration.objects.filter(user=user, event=event).exists():
-            messages.warning(request, 'Você já está inscrito neste evento.')
+        if outcome == EnrollmentOutcome.DUPLICATE:
+            messages.warning(request, ENROLLMENT_MESSAGES[outcome])
             return redirect('eventos:detail', pk=pk)
-        
-        if event.vacancies_left() <= 0:
-            messages.error(request, 'Este evento atingiu a capacidade máxima.')
+        if outcome != EnrollmentOutcome.ENROLLED:
+            messages.error(request, ENROLLMENT_MESSAGES[outcome])
             return redirect('eventos:detail', pk=pk)
         
-        # Create registration
-        Registration.objects.create(user=user, event=event)
-        
         AuditLog.objects.create(
             user=user,
             action='registration',
@@ -180,6 +329,9 @@ class EnrollView(LoginRequiredMixin, View):
         )
         
         messages.success(request, f'Inscrição no evento "{event.title}" realizada com sucesso!')
+        if registration.schedule_conflicts:
+            titles = ', '.join(other.title for other in registration.schedule_conflicts)
+            messages.warning(request, f'Atenção: conflito de horário com {titles}.')
         return redirect('eventos:detail', pk=pk)
 
 
@@ -187,20 +339,58 @@ class CancelEnrollmentView(LoginRequiredMixin, View):
     """Cancel enrollment in an event"""
     def post(self, request, pk):
         event = get_object_or_404(Event, pk=pk)
-        registration = get_object_or_404(Registration, user=request.user, event=event)
+        registration = get_object_or_404(Registration, user=request.user, event_id=event.series_id)
         
-        registration.delete()
+        promoted = cancel_enrollment(registration)
         
         AuditLog.objects.create(
             user=request.user,
             action='registration',
             description=f'Cancelou inscrição no evento: {event.title}'
         )
+        if promoted:
+            AuditLog.objects.create(
+                user=promoted.user,
+                action='registration',
+                description=f'Promovido da lista de espera no evento: {event.title}'
+            )
         
         messages.info(request, f'Inscrição no evento "{event.title}" cancelada.')
         return redirect('eventos:detail', pk=pk)
 
 
+class LeaveWaitlistView(LoginRequiredMixin, View):
+    """Leave the waitlist of an event"""
+    def post(self, request, pk):
+        event = get_object_or_404(Event, pk=pk)
+        WaitlistEntry.objects.filter(user=request.user, event_id=event.series_id).delete()
+        
+        messages.info(request, f'Você saiu da lista de espera do evento "{event.title}".')
+        return redirect('eventos:detail', pk=pk)
+
+
+class HoldSeatView(LoginRequiredMixin, View):
+    """Reserve a seat for a few minutes before confirming the enrollment"""
+    def post(self, request, pk):
+        event = get_object_or_404(Event, pk=pk)
+        outcome, hold = hold_seat(request.user, event)
+        if outcome == EnrollmentOutcome.HELD:
+            expires = timezone.localtime(hold.expires_at).strftime('%H:%M')
+            messages.info(request, f'{ENROLLMENT_MESSAGES[outcome]} Reservada até {expires}.')
+        else:
+            messages.error(request, ENROLLMENT_MESSAGES[outcome])
+        return redirect('eventos:detail', pk=pk)
+
+
+class ReleaseSeatView(LoginRequiredMixin, View):
+    """Give up a seat hold"""
+    def post(self, request, pk):
+        event = get_object_or_404(Event, pk=pk)
+        if release_hold(request.user, event):
+            messages.info(request, 'Reserva de vaga cancelada.')
+        return redirect('eventos:detail', pk=pk)
+
+
 class MyEventsView(LoginRequiredMixin, ListView):
     """List user's enrolled events"""
     template_name = 'eventos/my_events.html'
@@ -210,6 +400,204 @@ class MyEventsView(LoginRequiredMixin, ListView):
         return Registration.objects.filter(
             user=self.request.user
         ).select_related('event').order_by('-registered_at')
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Events are already loaded by select_related; only the later
+        # sessions of recurring series need one more query
+        series = {registration.event_id: registration.event for registration in context['registrations']}
+        sessions = list(series.values())
+        recurring = [pk for pk, event in series.items() if event.recurrence]
+        if recurring:
+            sessions += Event.objects.filter(parent_id__in=recurring).only(
+                'id', 'parent_id', 'start_date', 'end_date', 'start_time', 'end_time'
+            )
+        overlaps = find_overlaps(sessions)
+        conflicts = {}
+        for session in sessions:
+            found = conflicts.setdefault(session.series_id, {})
+            for other in overlaps.get(session.pk, []):
+                if other.series_id != session.series_id:
+                    found.setdefault(other.series_id, series.get(other.series_id, other))
+        for registration in context['registrations']:
+            registration.conflicts = list(conflicts.get(registration.event.series_id, {}).values())
+        context['calendar_feed_url'] = self.request.build_absolute_uri(
+            reverse('eventos:user_calendar', args=[ical.feed_token(self.request.user)])
+        )
+        return context
+
+
+class _Echo:
+    """File-like object whose write() returns the line, for csv.writer streaming"""
+    def write(self, value):
+        return value
+
+
+class RegistrationExportView(LoginRequiredMixin, OrganizerRequiredMixin, View):
+    """
+    Stream the registrations of one of the user's events (or of all of them)
+    as CSV; staff can export any event. Rows are read with a server-side chunked iterator, so memory stays flat
+    and the first bytes go out before the query has been fully consumed.
+    """
+    HEADER = ('evento_id', 'evento', 'usuario', 'nome', 'email', 'instituicao', 'inscrito_em', 'presenca')
+    COLUMNS = (
+        'event_id', 'event__title', 'user__username', 'user__first_name', 'user__last_name',
+        'user__email', 'user__institution', 'registered_at', 'presence_confirmed',
+    )
+    chunk_size = 2000
+
+    def get(self, request, pk=None):
+        registrations = Registration.objects.all()
+        if not request.user.is_staff:
+            registrations = registrations.filter(event__organizer=request.user)
+        filename = 'inscricoes.csv'
+        if pk is not None:
+            event = get_object_or_404(Event, pk=pk)
+            if event.organizer_id != request.user.pk and not request.user.is_staff:
+                raise Http404('Evento não encontrado.')
+            registrations = registrations.filter(event_id=event.series_id)
+            filename = f'inscricoes-evento-{event.pk}.csv'
+        rows = registrations.order_by('event_id', 'id').values_list(*self.COLUMNS).iterator(chunk_size=self.chunk_size)
+
+        response = StreamingHttpResponse(self._stream(rows), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    def _stream(self, rows):
+        writer = csv.writer(_Echo())
+        # BOM so spreadsheet apps read the accents as UTF-8
+        yield '\ufeff' + writer.writerow(self.HEADER)
+        for event_id, title, username, first_name, last_name, email, institution, registered_at, present in rows:
+            yield writer.writerow((
+                event_id, title, username, f'{first_name} {last_name}'.strip(), email, institution or '',
+                timezone.localtime(registered_at).strftime('%d/%m/%Y %H:%M'), 'sim' if present else 'não',
+            ))
+
+
+def _cache_stream(key, chunks):
+    """Yield chunks while keeping a copy, cached once the stream completes"""
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+    cache.set(key, ''.join(parts), settings.EVENT_CACHE_TIMEOUT)
+
+
+def _calendar_key(request, user_id=None):
+    # Versioned like the listing: any event or registration change renews it
+    return caching.listing_key('ical', request.get_host(), user_id or '')
+
+
+def _calendar_etag(request, token=None):
+    user_id = None
+    if token is not None:
+        try:
+            user_id = ical.read_feed_token(token)
+        except BadSignature:
+            return None
+    return hashlib.md5(_calendar_key(request, user_id).encode()).hexdigest()
+
+
+class EventCalendarFeedView(View):
+    """
+    iCalendar feed of every event, or of a user's registrations when a signed
+    token is given. The ETag comes from the cache version, so polling clients
+    get a 304 without any query.
+    """
+    @method_decorator(condition(etag_func=lambda request, token=None: _calendar_etag(request, token)))
+    def get(self, request, token=None):
+        events, name, user_id = Event.objects.all(), 'SGEA - Eventos', None
+        if token is not None:
+            try:
+                user_id = ical.read_feed_token(token)
+            except BadSignature:
+                raise Http404('Calendário não encontrado.')
+            series_ids = Registration.objects.filter(user_id=user_id).values('event_id')
+            events = Event.objects.filter(Q(pk__in=series_ids) | Q(parent_id__in=series_ids))
+            name = 'SGEA - Minhas Inscrições'
+
+        content_type = 'text/calendar; charset=utf-8'
+        key = _calendar_key(request, user_id)
+        body = cache.get(key)
+        if body is not None:
+            return HttpResponse(body, content_type=content_type)
+
+        detail_url = lambda pk: request.build_absolute_uri(reverse('eventos:detail', args=[pk]))
+        return StreamingHttpResponse(
+            _cache_stream(key, ical.generate(events, name, detail_url)), content_type=content_type
+        )
+
+
+class CheckinQRView(LoginRequiredMixin, View):
+    """PNG QR code with the signed check-in token of one of the user's registrations"""
+    def get(self, request, pk):
+        registration = get_object_or_404(Registration, pk=pk, user=request.user)
+        response = HttpResponse(qr_png(make_token(registration)), content_type='image/png')
+        response['Cache-Control'] = 'private, max-age=86400'
+        return response
+
+
+def _series_id(pk):
+    """Event holding the seats of pk; sessions never change series, so no versioning"""
+    def lookup():
+        rows = list(Event.objects.filter(pk=pk).values_list('parent_id', flat=True)[:1])
+        if not rows:
+            raise Http404('Evento não encontrado.')
+        return rows[0] or pk
+    return caching.get_or_set(f'eventos:series:{pk}', lookup)
+
+
+def _vacancies_key(pk):
+    # Versioned by the series event, bumped on every registration, hold or edit
+    return caching.detail_key(_series_id(pk), 'vacancies')
+
+
+class EventVacanciesView(View):
+    """
+    Vacancies of an event as JSON, polled every LIVE_VACANCY_POLL_INTERVAL
+    seconds by detail pages that cannot stream (WSGI). The ETag is the cache
+    version of the series, so a poll with nothing new is a 304 from two
+    cache reads.
+    """
+    @method_decorator(condition(etag_func=lambda request, pk: hashlib.md5(_vacancies_key(pk).encode()).hexdigest()))
+    def get(self, request, pk):
+        series_id = _series_id(pk)
+        left = caching.get_or_set(
+            _vacancies_key(pk),
+            lambda: get_object_or_404(Event, pk=series_id).vacancies_left(),
+        )
+        response = JsonResponse({'event': series_id, 'vacancies_left': left})
+        # Revalidate on every poll; the browser sends If-None-Match itself
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+
+class EventVacancyStreamView(View):
+    """
+    Server-Sent Events stream of an event's vacancies (async, needs ASGI).
+    Watchers share one publisher, see apps.eventos.live.
+    """
+    async def get(self, request, pk):
+        if not isinstance(request, ASGIRequest):
+            # WSGI would buffer the whole stream; 204 tells EventSource to stop and the page to poll
+            return HttpResponse(status=204)
+        fields = ('capacity', 'registrations_count', 'held_count')
+        event = await Event.objects.filter(pk=pk).values('parent_id', *fields).afirst()
+        if event is None:
+            raise Http404('Evento não encontrado.')
+        series_id = event['parent_id'] or pk
+        if event['parent_id']:
+            # Seats of a recurring event are counted on its first session
+            event = await Event.objects.filter(pk=series_id).values(*fields).aget()
+
+        response = StreamingHttpResponse(
+            vacancy_stream(series_id, vacancies(*(event[field] for field in fields))),
+            content_type='text/event-stream',
+        )
+        response['Cache-Control'] = 'no-cache'
+        # Tell nginx not to buffer the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
 
 
 class DemoEndEventView(LoginRequiredMixin, OrganizerRequiredMixin, View):
@@ -218,11 +606,6 @@ class DemoEndEventView(LoginRequiredMixin, OrganizerRequiredMixin, View):
     This is for presentation/demo purposes only.
     """
     def post(self, request, pk):
-        from datetime import date, timedelta
-        from django.utils import timezone
-        from django.core.files.base import ContentFile
-        from apps.certificados.models import Certificado
-        
         event = get_object_or_404(Event, pk=pk)
         
         # Step 1: End the event (set end_date to yesterday)
@@ -236,77 +619,107 @@ class DemoEndEventView(LoginRequiredMixin, OrganizerRequiredMixin, View):
         confirmed_count = registrations.update(presence_confirmed=True)
         
         # Step 3: Generate certificates for all confirmed participants
-        certificates_created = 0
-        for registration in registrations.select_related('user'):
-            user = registration.user
-            
-            # Skip if certificate already exists
-            if Certificado.objects.filter(user=user, event=event).exists():
-                continue
-            
-            # Generate certificate
-            certificate_content = f"""
-================================================================================
-                    CERTIFICADO DE PARTICIPAÇÃO
-================================================================================
-
-Certificamos que
-
-                        {user.get_full_name() or user.username}
-
-participou do evento
-
-                        {event.title}
-
-Tipo: {event.get_event_type_display()}
-Data: {event.start_date.strftime('%d/%m/%Y')} a {event.end_date.strftime('%d/%m/%Y')}
-Local: {event.location}
-
-Professor Responsável: {event.professor_in_charge.get_full_name() or event.professor_in_charge.username}
-Organizador: {event.organizer.get_full_name() or event.organizer.username}
-
-================================================================================
-            SGEA - Sistema de Gestão de Eventos Acadêmicos
-                    Emitido em: {timezone.localdate().strftime('%d/%m/%Y')}
-================================================================================
-"""
-            certificate = Certificado(user=user, event=event)
-            filename = f'certificado_{event.id}_{user.id}.txt'
-            certificate.file.save(filename, ContentFile(certificate_content.encode('utf-8')))
-            certificate.save()
-            certificates_created += 1
+        certificates_created, failed = issue_certificates(pending_registrations().filter(event=event))
         
         # Log the demo action
         AuditLog.objects.create(
             user=request.user,
             action='demo_end_event',
-            description=f'[DEMO] Finalizou evento "{event.title}", confirmou {confirmed_count} presenças, gerou {certificates_created} certificados'
+            description=f'[DEMO] Finalizou evento "{event.title}", confirmou {confirmed_count} presenças, gerou {certificates_created} certificados, {len(failed)} falharam'
         )
         
         messages.success(
             request, 
             f'✅ Demo: Evento finalizado! {confirmed_count} presenças confirmadas, {certificates_created} certificados gerados.'
         )
+        if failed:
+            messages.error(request, f'{len(failed)} certificados não puderam ser gerados. Veja o log do servidor.')
         return redirect('eventos:detail', pk=pk)
 
 
 # API Views for backwards compatibility
+from django.db.models import Max
 from rest_framework import generics, permissions, status
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
-from .serializers import EventSerializer, EventCreateSerializer, RegistrationSerializer
-from .throttles import EventListThrottle, RegistrationThrottle
+from .serializers import EventSerializer, EventCreateSerializer, RegistrationSerializer, BatchRegistrationSerializer, AttendanceSerializer
+from .throttles import CheckinThrottle, EventListThrottle, RegistrationThrottle
+
+
+def _event_list_fingerprint(request):
+    """(etag, last_modified) of the event list from a single aggregate query"""
+    if not hasattr(request, '_event_list_fingerprint'):
+        stats = Event.objects.aggregate(last=Max('updated_at'), total=Count('id'))
+        # Host and query string change the payload (filters, absolute links)
+        raw = f"{request.get_host()}|{request.GET.urlencode()}|{stats['total']}|{stats['last']}"
+        request._event_list_fingerprint = (hashlib.md5(raw.encode()).hexdigest(), stats['last'])
+    return request._event_list_fingerprint
+
+
+def _event_detail_fingerprint(request, pk):
+    """(etag, last_modified) of one event, or (None, None) if it does not exist"""
+    if not hasattr(request, '_event_detail_fingerprint'):
+        updated_at = Event.objects.filter(pk=pk).values_list('updated_at', flat=True).first()
+        etag = hashlib.md5(f'{pk}|{updated_at}'.encode()).hexdigest() if updated_at else None
+        request._event_detail_fingerprint = (etag, updated_at)
+    return request._event_detail_fingerprint
+
+
+# Answer If-None-Match / If-Modified-Since with 304 before serializing anything
+event_list_conditional = condition(
+    etag_func=lambda request, *args, **kwargs: _event_list_fingerprint(request)[0],
+    last_modified_func=lambda request, *args, **kwargs: _event_list_fingerprint(request)[1],
+)
+event_detail_conditional = condition(
+    etag_func=lambda request, pk, *args, **kwargs: _event_detail_fingerprint(request, pk)[0],
+    last_modified_func=lambda request, pk, *args, **kwargs: _event_detail_fingerprint(request, pk)[1],
+)
+
+
+class EventAPIPagination(KeysetAPIPagination):
+    page_size = 20
+    ordering = ('start_date', 'id')
+
+
+class EventSearchAPIPagination(PageNumberPagination):
+    page_size = 20
 
 
 class EventListAPIView(generics.ListAPIView):
     """API: List events"""
-    queryset = Event.objects.all().order_by('start_date')
+    queryset = Event.objects.select_related('parent').order_by('start_date', 'id')
     serializer_class = EventSerializer
     permission_classes = [permissions.IsAuthenticated]
     throttle_classes = [EventListThrottle]
 
+    @property
+    def pagination_class(self):
+        # Search results are ordered by relevance, page them by number
+        if self.request.query_params.get('q'):
+            return EventSearchAPIPagination
+        return EventAPIPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        search = self.request.query_params.get('q')
+        if search:
+            queryset = search_events(queryset, search)
+        return queryset
+
+    @method_decorator(event_list_conditional)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
     def list(self, request, *args, **kwargs):
         AuditLog.objects.create(user=request.user, action='api_event_list', description='Listou eventos via API')
-        return super().list(request, *args, **kwargs)
+        params = request.query_params
+        # Host is part of the key: pagination links are absolute URLs
+        key = caching.listing_key(
+            'api', request.get_host(), params.get('q', ''), params.get('cursor', ''), params.get('page', '')
+        )
+        data = caching.get_or_set(key, lambda: super(EventListAPIView, self).list(request, *args, **kwargs).data)
+        return Response(data)
 
 
 class EventCreateAPIView(generics.CreateAPIView):
@@ -318,9 +731,9 @@ class EventCreateAPIView(generics.CreateAPIView):
     def perform_create(self, serializer):
         user = self.request.user
         if user.role != 'organizador':
-            from rest_framework.exceptions import PermissionDenied
             raise PermissionDenied('Apenas organizadores podem criar eventos.')
         serializer.save(organizer=user)
+        materialize_sessions(serializer.instance)
         AuditLog.objects.create(user=user, action='create_event', description=f'Criou evento via API: {serializer.instance.id}')
 
 
@@ -330,6 +743,21 @@ class EventDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = EventCreateSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    @method_decorator(event_detail_conditional)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def perform_update(self, serializer):
+        event = serializer.save()
+        update_sessions(event)
+        # A capacity increase frees seats for whoever is waiting
+        for registration in promote_waitlist(event.series_id):
+            AuditLog.objects.create(
+                user=registration.user,
+                action='registration',
+                description=f'Promovido da lista de espera no evento: {event.title}'
+            )
+
 
 class RegisterForEventAPIView(generics.CreateAPIView):
     """API: Register for event"""
@@ -340,6 +768,139 @@ class RegisterForEventAPIView(generics.CreateAPIView):
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data, context={'request': request})
         serializer.is_valid(raise_exception=True)
-        self.perform_create(serializer)
-        AuditLog.objects.create(user=request.user, action='registration', description=f'Inscreveu-se via API no evento {serializer.instance.event.id}')
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        event = serializer.validated_data['event']
+        outcome, registration = enroll(request.user, event, waitlist=True)
+        if outcome == EnrollmentOutcome.WAITLISTED:
+            return Response(
+                {'detail': ENROLLMENT_MESSAGES[outcome], 'event': event.id, 'waitlist_position': registration.rank()},
+                status=status.HTTP_202_ACCEPTED,
+            )
+        if outcome != EnrollmentOutcome.ENROLLED:
+            return Response({'detail': ENROLLMENT_MESSAGES[outcome]}, status=status.HTTP_400_BAD_REQUEST)
+        serializer.instance = registration
+        AuditLog.objects.create(user=request.user, action='registration', description=f'Inscreveu-se via API no evento {event.id}')
+        data = dict(serializer.data, schedule_conflicts=[other.id for other in registration.schedule_conflicts])
+        return Response(data, status=status.HTTP_201_CREATED)
+
+
+class BatchRegisterForEventAPIView(generics.GenericAPIView):
+    """API: Register many users for an event in one call (event organizer only)"""
+    serializer_class = BatchRegistrationSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [RegistrationThrottle]
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        event = serializer.validated_data['event']
+        if event.organizer_id != request.user.id:
+            raise PermissionDenied('Apenas o organizador do evento pode inscrever participantes em lote.')
+
+        results, enrolled = enroll_many(event, serializer.validated_data['users'])
+        AuditLog.objects.create(
+            user=request.user,
+            action='registration',
+            description=f'Inscreveu {enrolled} de {len(results)} usuários em lote via API no evento {event.id}'
+        )
+        return Response({
+            'event': event.id,
+            'enrolled': enrolled,
+            'results': [
+                {
+                    'user': identifier,
+                    'status': outcome.value,
+                    'detail': ENROLLMENT_MESSAGES[outcome],
+                }
+                for identifier, outcome in results
+            ],
+        }, status=status.HTTP_200_OK)
+
+
+class EventAttendanceAPIView(generics.GenericAPIView):
+    """API: Confirm presence of many participants (event organizer only)"""
+    serializer_class = AttendanceSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, pk):
+        event = get_object_or_404(Event, pk=pk)
+        if event.organizer_id != request.user.id:
+            raise PermissionDenied('Apenas o organizador do evento pode confirmar presenças.')
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        results, confirmed = confirm_attendance(event, serializer.validated_data['identifiers'])
+        if confirmed:
+            AuditLog.objects.create(
+                user=request.user,
+                action='confirm_presence',
+                description=f'Confirmou presença de {confirmed} inscritos via API no evento {event.id}'
+            )
+        return Response({
+            'event': event.id,
+            'confirmed': confirmed,
+            'results': [{'user': identifier, 'status': outcome.value} for identifier, outcome in results],
+        })
+
+
+class IsCheckinScanner(permissions.BasePermission):
+    """Door scanner with the event's scanner key, or a session of its organizer (or staff)"""
+    message = 'Chave do leitor de check-in ausente ou inválida.'
+
+    def has_permission(self, request, view):
+        # The key is checked first: it needs no session or user lookup
+        pk = view.kwargs['pk']
+        if is_scanner_key(pk, request.headers.get('X-Scanner-Key')):
+            return True
+        user = request.user
+        if not user.is_authenticated:
+            return False
+        return user.is_staff or Event.objects.filter(pk=pk, organizer_id=user.pk).exists()
+
+
+class EventCheckinAPIView(generics.GenericAPIView):
+    """
+    API: Door scanner check-in. The scanner sends the event's scanner key
+    (X-Scanner-Key header) or uses its organizer's session; the key and the
+    signed token are verified without a database read, and presence is
+    written in batches.
+    """
+    permission_classes = [IsCheckinScanner]
+    throttle_classes = [CheckinThrottle]
+
+    def post(self, request, pk):
+        try:
+            event_id, registration_id = read_token(str(request.data.get('token', '')))
+        except SignatureExpired:
+            return Response({'detail': 'QR code expirado.'}, status=status.HTTP_400_BAD_REQUEST)
+        except BadSignature:
+            return Response({'detail': 'QR code inválido.'}, status=status.HTTP_400_BAD_REQUEST)
+        if event_id != pk:
+            return Response({'detail': 'QR code de outro evento.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        queued = checkin_queue.add(registration_id)
+        return Response(
+            {'registration': registration_id, 'status': 'queued' if queued else 'duplicate'},
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+
+class SeatHoldAPIView(generics.GenericAPIView):
+    """API: Hold a seat (POST, also extends it) or release it (DELETE)"""
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [RegistrationThrottle]
+
+    def post(self, request, pk):
+        event = get_object_or_404(Event, pk=pk)
+        outcome, hold = hold_seat(request.user, event)
+        if outcome != EnrollmentOutcome.HELD:
+            return Response({'detail': ENROLLMENT_MESSAGES[outcome]}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            {'detail': ENROLLMENT_MESSAGES[outcome], 'event': hold.event_id, 'expires_at': hold.expires_at},
+            status=status.HTTP_201_CREATED,
+        )
+
+    def delete(self, request, pk):
+        event = get_object_or_404(Event, pk=pk)
+        if not release_hold(request.user, event):
+            return Response({'detail': 'Nenhuma reserva ativa.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(status=status.HTTP_204_NO_CONTENT)
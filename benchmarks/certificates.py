@@ -0,0 +1,100 @@
+"""
+Benchmark: PDF certificate rendering, and generate_certificates with 1 vs N workers.
+Run with: python benchmarks/certificates.py [--participants 5000] [--workers 1 2 4]
+
+First times render_pdf alone: compiling an event layout, then stamping one
+participant (the per-certificate cost, which should stay well under 50 ms).
+Then creates ended events with confirmed participants and times a full run
+for each worker count, deleting the certificates in between. Files are
+written to a temporary MEDIA_ROOT.
+"""
+
+import argparse
+import datetime
+import os
+import shutil
+import tempfile
+import time
+
+from common import benchmark_database, create_people, measure, report, setup_django
+
+
+def create_participants(count, organizer, professor, per_event=200):
+    from apps.eventos.models import Event, Registration
+    from apps.usuarios.models import Usuario
+
+    Usuario.objects.bulk_create([
+        Usuario(username=f'cert{i}', email=f'cert{i}@bench.local', role='aluno',
+                first_name='Participante', last_name=str(i))
+        for i in range(count)
+    ], batch_size=5000)
+    students = list(Usuario.objects.filter(role='aluno').values_list('id', flat=True))
+    day = datetime.date.today() - datetime.timedelta(days=7)
+    events = Event.objects.bulk_create([
+        Event(title=f'Evento encerrado {i}', event_type='curso', start_date=day, end_date=day,
+              location='Auditório', capacity=per_event, organizer=organizer, professor_in_charge=professor)
+        for i in range(0, count, per_event)
+    ])
+    Registration.objects.bulk_create([
+        Registration(user_id=user_id, event=events[i // per_event], presence_confirmed=True)
+        for i, user_id in enumerate(students)
+    ], batch_size=5000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--participants', type=int, default=5000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, os.cpu_count() or 4])
+    args = parser.parse_args()
+
+    setup_django()
+    from io import StringIO
+    from django.conf import settings
+    from django.core.management import call_command
+    from apps.audit.models import AuditLog
+    from apps.certificados import rendering
+    from apps.certificados.models import Certificado
+
+    context = {
+        'user_id': 1, 'event_id': 1, 'email': 'bench@bench.local', 'name': 'Maria Aparecida dos Santos',
+        'title': 'Introdução à Inteligência Artificial', 'event_type': 'Curso', 'start_date': '01/03/2026',
+        'end_date': '05/03/2026', 'location': 'Auditório Central', 'professor': 'Mariana Araújo',
+        'organizer': 'João Silva', 'issued': '06/03/2026', 'issued_at': '2026-03-06T12:00:00+00:00',
+        'code': 'ABCD-EFGH-JKLM',
+    }
+
+    def compile_layout():
+        rendering._compiled.cache_clear()
+        rendering.layout_for(context)
+
+    report('compile event layout', measure(compile_layout, 20))
+    report('render_pdf (layout cached)', measure(lambda: rendering.render_pdf(context), 200))
+    print()
+
+    media = tempfile.mkdtemp()
+    settings.MEDIA_ROOT = media
+    try:
+        with benchmark_database():
+            organizer, professor = create_people()
+            create_participants(args.participants, organizer, professor)
+            print(f'{args.participants} participants, {os.cpu_count()} CPUs\n')
+
+            baseline = None
+            for workers in dict.fromkeys(args.workers):
+                Certificado.objects.all().delete()
+                AuditLog.objects.all().delete()
+                shutil.rmtree(os.path.join(media, 'certificates'), ignore_errors=True)
+
+                start = time.perf_counter()
+                call_command('generate_certificates', workers=workers, stdout=StringIO())
+                elapsed = time.perf_counter() - start
+                baseline = baseline or elapsed
+                created = Certificado.objects.count()
+                print(f'{workers:>2} workers   {elapsed:8.2f} s   {created / elapsed:8.0f} certificates/s   '
+                      f'speedup {baseline / elapsed:5.2f}x')
+    finally:
+        shutil.rmtree(media, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+Shared helpers for the standalone benchmark scripts in this folder.
+
+Every benchmark runs against a throwaway database created with Django's
+test database machinery, so it never touches db.sqlite3.
+"""
+
+import itertools
+import os
+import random
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+WORDS = (
+    'introdução programação dados redes segurança inteligência artificial '
+    'aprendizado máquina computação gráfica engenharia software física química '
+    'biologia matemática estatística economia direito história filosofia '
+    'sociologia educação robótica sistemas distribuídos nuvem banco pesquisa '
+    'metodologia científica empreendedorismo inovação sustentabilidade energia'
+).split()
+
+
+def setup_django():
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Projeto_01_Web.settings')
+    import django
+    django.setup()
+
+
+@contextmanager
+def benchmark_database():
+    """Create a migrated scratch database and drop it afterwards"""
+    from django.db import connection
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+SYLLABLES = 'ba be bi bo bu ca ce ci co cu da de di do du fa fe fi fo fu la le li lo lu ma me mi mo mu na ne ni no nu pa pe pi po pu ra re ri ro ru sa se si so su ta te ti to tu ção são'.split()
+
+
+def _vocabulary(size=20000, seed=7):
+    """Real words mixed into synthetic ones, drawn with a Zipf-like weight"""
+    rng = random.Random(seed)
+    vocabulary = [''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(size)]
+    for i, word in enumerate(WORDS):
+        vocabulary[i * (size // len(WORDS))] = word
+    weights = [1 / (rank + 1) for rank in range(size)]
+    return vocabulary, list(itertools.accumulate(weights))
+
+
+VOCABULARY, CUM_WEIGHTS = _vocabulary()
+
+
+def sentence(rng, size):
+    return ' '.join(rng.choices(VOCABULARY, cum_weights=CUM_WEIGHTS, k=size))
+
+
+def create_people():
+    from apps.usuarios.models import Usuario
+    organizer = Usuario.objects.create(username='bench_org', email='org@bench.local', role='organizador')
+    professor = Usuario.objects.create(
+        username='bench_prof', email='prof@bench.local', role='professor',
+        first_name='Mariana', last_name='Araújo', institution='Bench',
+    )
+    return organizer, professor
+
+
+def create_events(count, organizer, professor, seed=42, batch_size=5000):
+    """bulk_create `count` synthetic events spread over two years"""
+    import datetime
+    from apps.eventos.models import Event
+
+    rng = random.Random(seed)
+    today = datetime.date.today()
+    types = [value for value, _ in Event.EVENT_TYPES]
+    batch = []
+    for i in range(count):
+        start = today + datetime.timedelta(days=rng.randint(-365, 365))
+        batch.append(Event(
+            title=sentence(rng, 4).capitalize(),
+            description=sentence(rng, 30),
+            event_type=rng.choice(types),
+            start_date=start,
+            end_date=start + datetime.timedelta(days=rng.randint(0, 3)),
+            location=f'Sala {rng.randint(1, 300)}',
+            capacity=rng.randint(10, 500),
+            organizer=organizer,
+            professor_in_charge=professor,
+        ))
+        if len(batch) >= batch_size:
+            Event.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        Event.objects.bulk_create(batch)
+
+
+def measure(func, repeat=20):
+    """Run func `repeat` times and return timings in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(label, timings):
+    timings = sorted(timings)
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(f'{label:<40} median {statistics.median(timings):9.2f} ms   p95 {p95:9.2f} ms')
+
+
+def percentiles(timings, points=(50, 95, 99)):
+    """Nearest-rank percentiles of a list of timings, plus the maximum"""
+    if not timings:
+        return {f'p{point}': 0.0 for point in points} | {'max': 0.0}
+    timings = sorted(timings)
+    result = {f'p{point}': timings[min(len(timings) - 1, int(len(timings) * point / 100))] for point in points}
+    result['max'] = timings[-1]
+    return result
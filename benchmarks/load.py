@@ -0,0 +1,292 @@
+"""
+Load test: a flash crowd of students opening and enrolling in one event.
+Run with: python benchmarks/load.py [--users 500] [--concurrency 50] [--capacity 100] [--output load.json]
+
+Serves the project from a threaded WSGI server on a random local port and
+drives it with asyncio clients over plain HTTP, one scenario at a time:
+
+  listing   GET  /eventos/
+  detail    GET  /eventos/<id>/
+  enroll    POST /eventos/<id>/inscrever/        (logged in, session cookie)
+  api       POST /api/events/register/           (token authentication)
+  mixed     listing -> detail -> enroll or api, per user
+
+Each enrollment scenario gets its own event. Reports latency percentiles,
+throughput and database queries per request, checks that the event was not
+overbooked, and can save everything as JSON (--output) to compare against
+the results of another commit (--compare).
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import subprocess
+import threading
+import time
+from collections import Counter
+
+from common import BASE_DIR, benchmark_database, create_events, create_people, percentiles, setup_django
+
+SCENARIOS = ('listing', 'detail', 'enroll', 'api', 'mixed')
+
+
+def start_server():
+    """Serve the WSGI application in a background thread, returns (server, port)"""
+    from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+    from django.core.wsgi import get_wsgi_application
+    from django.db import connection
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    application = get_wsgi_application()
+
+    def counted(environ, start_response):
+        # Queries run in the request thread; report them in a response header
+        queries = [0]
+
+        def count(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        def start(status, headers, exc_info=None):
+            return start_response(status, headers + [('X-Queries', str(queries[0]))], exc_info)
+
+        try:
+            with connection.execute_wrapper(count):
+                return application(environ, start)
+        finally:
+            connection.close()
+
+    server = ThreadedWSGIServer(('127.0.0.1', 0), QuietHandler, allow_reuse_address=True)
+    server.daemon_threads = True
+    server.set_app(counted)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, server.server_address[1]
+
+
+async def request(port, method, path, headers=None, body=b''):
+    """Minimal HTTP/1.1 client; returns (status, response headers)"""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    lines = [f'{method} {path} HTTP/1.1', f'Host: 127.0.0.1:{port}', 'Connection: close',
+             f'Content-Length: {len(body)}']
+    lines += [f'{name}: {value}' for name, value in (headers or {}).items()]
+    writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head = response.split(b'\r\n\r\n', 1)[0].decode('latin-1').split('\r\n')
+    status = int(head[0].split()[1])
+    response_headers = dict(line.split(': ', 1) for line in head[1:] if ': ' in line)
+    return status, response_headers
+
+
+class Recorder:
+    def __init__(self):
+        self.timings = []
+        self.queries = []
+        self.statuses = Counter()
+
+    async def call(self, port, method, path, headers=None, body=b''):
+        start = time.perf_counter()
+        try:
+            status, response_headers = await request(port, method, path, headers, body)
+        except OSError:
+            self.statuses['connection error'] += 1
+            return
+        self.timings.append((time.perf_counter() - start) * 1000)
+        self.statuses[status] += 1
+        self.queries.append(int(response_headers.get('X-Queries', 0)))
+
+    def summary(self, elapsed):
+        done = len(self.timings)
+        return {
+            'requests': done,
+            'errors': sum(count for status, count in self.statuses.items() if status == 'connection error' or status >= 500),
+            'statuses': {str(status): count for status, count in sorted(self.statuses.items(), key=str)},
+            'seconds': round(elapsed, 3),
+            'throughput': round(done / elapsed, 1) if elapsed else 0,
+            'latency_ms': {key: round(value, 2) for key, value in percentiles(self.timings).items()},
+            'queries': {
+                'mean': round(sum(self.queries) / done, 2) if done else 0,
+                'max': max(self.queries, default=0),
+            },
+        }
+
+
+def create_students(count):
+    """Students with a logged-in session, a CSRF cookie and an API token each"""
+    from django.conf import settings
+    from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+    from django.contrib.sessions.backends.db import SessionStore
+    from django.middleware.csrf import _get_new_csrf_string
+    from rest_framework.authtoken.models import Token
+    from apps.usuarios.models import Usuario
+
+    Usuario.objects.bulk_create([
+        Usuario(username=f'load{i}', email=f'load{i}@bench.local', role='aluno') for i in range(count)
+    ])
+    students = list(Usuario.objects.filter(username__startswith='load').order_by('id'))
+    tokens = {token.user_id: token.key for token in Token.objects.bulk_create(
+        [Token(user=student, key=Token.generate_key()) for student in students]
+    )}
+    clients = []
+    for student in students:
+        session = SessionStore()
+        session[SESSION_KEY] = str(student.pk)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = student.get_session_auth_hash()
+        session.create()
+        csrf = _get_new_csrf_string()
+        clients.append({
+            'web': {'Cookie': f'{settings.SESSION_COOKIE_NAME}={session.session_key}; {settings.CSRF_COOKIE_NAME}={csrf}',
+                    'X-CSRFToken': csrf},
+            'api': {'Authorization': f'Token {tokens[student.pk]}', 'Content-Type': 'application/json'},
+        })
+    return clients
+
+
+def create_target(organizer, professor, capacity, offset):
+    from apps.eventos.models import Event
+    day = datetime.date.today() + datetime.timedelta(days=30 + offset)
+    return Event.objects.create(
+        title=f'Flash crowd {offset}', event_type='palestra', start_date=day, end_date=day,
+        location='Auditório', capacity=capacity, organizer=organizer, professor_in_charge=professor,
+    )
+
+
+async def run_scenario(name, port, event_id, clients, concurrency):
+    recorder = Recorder()
+    gate = asyncio.Semaphore(concurrency)
+    body = json.dumps({'event': event_id}).encode()
+
+    async def visit(index, client):
+        async with gate:
+            if name in ('listing', 'mixed'):
+                await recorder.call(port, 'GET', '/eventos/')
+            if name in ('detail', 'mixed'):
+                await recorder.call(port, 'GET', f'/eventos/{event_id}/', client['web'])
+            if name == 'enroll' or (name == 'mixed' and index % 2 == 0):
+                await recorder.call(port, 'POST', f'/eventos/{event_id}/inscrever/', client['web'])
+            elif name in ('api', 'mixed'):
+                await recorder.call(port, 'POST', '/api/events/register/', client['api'], body)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(visit(index, client) for index, client in enumerate(clients)))
+    return recorder.summary(time.perf_counter() - start)
+
+
+def capacity_check(event_id, attempts):
+    """Registrations never exceed capacity, the counter agrees, nobody is lost"""
+    from apps.eventos.models import Event
+    event = Event.objects.get(pk=event_id)
+    registered = event.registrations.count()
+    waitlisted = event.waitlist.count()
+    return {
+        'capacity': event.capacity,
+        'registrations': registered,
+        'registrations_count': event.registrations_count,
+        'waitlist': waitlisted,
+        'ok': (
+            registered == min(event.capacity, attempts)
+            and event.registrations_count == registered
+            and registered + waitlisted == attempts
+        ),
+    }
+
+
+def print_summary(name, summary):
+    latency, queries = summary['latency_ms'], summary['queries']
+    print(
+        f'{name:<8} {summary["requests"]:6d} req  {summary["throughput"]:8.1f} req/s   '
+        f'p50 {latency["p50"]:8.2f}  p95 {latency["p95"]:8.2f}  p99 {latency["p99"]:8.2f} ms   '
+        f'{queries["mean"]:5.1f} queries/req   errors {summary["errors"]}'
+    )
+    check = summary.get('capacity_check')
+    if check:
+        state = 'OK' if check['ok'] else 'FAILED'
+        print(f'{"":<8} capacity {state}: {check["registrations"]}/{check["capacity"]} registered '
+              f'(counter {check["registrations_count"]}), {check["waitlist"]} on the waitlist')
+
+
+def compare(previous, current):
+    print(f'\nCompared with {previous.get("commit") or "previous run"}:')
+    for name, summary in current['scenarios'].items():
+        old = previous.get('scenarios', {}).get(name)
+        if not old:
+            continue
+        change = lambda new, before: f'{(new - before) / before * 100:+.1f}%' if before else 'n/a'
+        print(
+            f'{name:<8} throughput {change(summary["throughput"], old["throughput"]):>8}   '
+            f'p95 {change(summary["latency_ms"]["p95"], old["latency_ms"]["p95"]):>8}   '
+            f'queries/req {old["queries"]["mean"]} -> {summary["queries"]["mean"]}'
+        )
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--capacity', type=int, default=100)
+    parser.add_argument('--events', type=int, default=1000, help='Background events in the listing')
+    parser.add_argument('--scenario', choices=SCENARIOS, action='append', help='Repeatable; default: all')
+    parser.add_argument('--output', help='Save the results to this JSON file')
+    parser.add_argument('--compare', help='JSON file of a previous run to compare with')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    # Measure the production code path, not the debug query log
+    settings.DEBUG = False
+    settings.ALLOWED_HOSTS = ['127.0.0.1']
+    # Every simulated user registers once; don't let the daily rate limits interfere
+    settings.REST_FRAMEWORK = dict(settings.REST_FRAMEWORK, DEFAULT_THROTTLE_RATES={
+        scope: None for scope in settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']
+    })
+
+    results = {
+        'commit': git_commit(),
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'options': {key: getattr(args, key) for key in ('users', 'concurrency', 'capacity', 'events')},
+        'scenarios': {},
+    }
+    with benchmark_database():
+        organizer, professor = create_people()
+        create_events(args.events, organizer, professor)
+        clients = create_students(args.users)
+        server, port = start_server()
+        print(f'{args.events} events, {args.users} users, {args.concurrency} concurrent, port {port}\n')
+        try:
+            for offset, name in enumerate(args.scenario or SCENARIOS):
+                event = create_target(organizer, professor, args.capacity, offset)
+                summary = asyncio.run(run_scenario(name, port, event.pk, clients, args.concurrency))
+                if name in ('enroll', 'api', 'mixed'):
+                    summary['capacity_check'] = capacity_check(event.pk, len(clients))
+                results['scenarios'][name] = summary
+                print_summary(name, summary)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(results, handle, indent=2)
+        print(f'\nSaved to {args.output}')
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as handle:
+            compare(json.load(handle), results)
+
+
+if __name__ == '__main__':
+    main()
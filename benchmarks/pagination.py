@@ -0,0 +1,71 @@
+"""
+Benchmark: OFFSET vs keyset pagination on deep pages.
+Run with: python benchmarks/pagination.py [--rows 100000] [--page 1000]
+
+Times page 1 and page N of the event listing (12 per page, start_date/id)
+and of the audit log (50 per page, -timestamp/-id).
+"""
+
+import argparse
+
+from common import benchmark_database, create_events, create_people, measure, report, setup_django
+
+
+def create_logs(count, user, batch_size=5000):
+    from apps.audit.models import AuditLog
+
+    batch = []
+    for i in range(count):
+        batch.append(AuditLog(user=user, action='registration', description=f'Log {i}'))
+        if len(batch) >= batch_size:
+            AuditLog.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        AuditLog.objects.bulk_create(batch)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--page', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.core.paginator import Paginator
+    from apps.audit.models import AuditLog
+    from apps.eventos.models import Event
+    from Projeto_01_Web.pagination import KeysetPaginator, encode_cursor
+
+    with benchmark_database():
+        organizer, professor = create_people()
+        create_events(args.rows, organizer, professor)
+        create_logs(args.rows, organizer)
+        print(f'{args.rows} events and {args.rows} audit logs\n')
+
+        cases = [
+            ('events', Event.objects.all(), 12, ('start_date', 'id')),
+            ('audit', AuditLog.objects.select_related('user'), 50, ('-timestamp', '-id')),
+        ]
+        for label, queryset, per_page, ordering in cases:
+            ordered = queryset.order_by(*ordering)
+            fields = [name.lstrip('-') for name in ordering]
+
+            def offset_page(number):
+                page = Paginator(ordered, per_page).page(number)
+                list(page.object_list)
+
+            # Cursor pointing at the last row of page N-1 (not timed)
+            edge = ordered.values_list(*fields)[(args.page - 1) * per_page - 1]
+            cursor = encode_cursor(list(edge))
+            keyset = KeysetPaginator(queryset, per_page, ordering)
+
+            report(f'{label} OFFSET page 1', measure(lambda: offset_page(1), args.repeat))
+            report(f'{label} OFFSET page {args.page}', measure(lambda: offset_page(args.page), args.repeat))
+            report(f'{label} keyset page 1', measure(lambda: keyset.page(None), args.repeat))
+            report(f'{label} keyset page {args.page}', measure(lambda: keyset.page(cursor), args.repeat))
+            print()
+
+
+if __name__ == '__main__':
+    main()
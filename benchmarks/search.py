@@ -0,0 +1,45 @@
+"""
+Benchmark: FTS5 search vs the old title__icontains LIKE scan.
+Run with: python benchmarks/search.py [--events 100000]
+
+Measures what EventListView does for one search page: count + first 12 rows.
+"""
+
+import argparse
+
+from common import benchmark_database, create_events, create_people, measure, report, setup_django
+
+TERMS = ['programação', 'dados', 'inteligência artificial', 'robót', 'metodologia científica']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--events', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.core.paginator import Paginator
+    from apps.eventos.models import Event
+    from apps.eventos.search import search_events
+
+    def page(queryset):
+        paginator = Paginator(queryset, 12)
+        list(paginator.page(1).object_list)
+
+    with benchmark_database():
+        organizer, professor = create_people()
+        create_events(args.events, organizer, professor)
+        print(f'{args.events} synthetic events\n')
+
+        base = Event.objects.order_by('start_date')
+        for term in TERMS:
+            like = measure(lambda: page(base.filter(title__icontains=term)), args.repeat)
+            fts = measure(lambda: page(search_events(base, term)), args.repeat)
+            report(f'LIKE  "{term}"', like)
+            report(f'FTS5  "{term}"', fts)
+            print()
+
+
+if __name__ == '__main__':
+    main()